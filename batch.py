@@ -0,0 +1,76 @@
+"""Transcribe existing audio files and folders in bulk"""
+import argparse
+import sys
+
+from utils.config_manager import ConfigManager
+from utils.usage_ledger import UsageLedger
+from services.transcription_service import TranscriptionService
+from services.batch_transcriber import BatchTranscriber, find_audio_files
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Transcribe audio files and folders in bulk")
+    parser.add_argument("inputs", nargs="+",
+                        help="audio files or directories")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file (.jsonl or .txt)")
+    parser.add_argument("--format", choices=["jsonl", "text"],
+                        help="output format, guessed from the output extension")
+    parser.add_argument("--model", help="speech-to-text model to use")
+    parser.add_argument("--decode-workers", type=int,
+                        help="number of decoding processes (default: CPU count)")
+    parser.add_argument("--upload-workers", type=int, default=4,
+                        help="maximum number of concurrent uploads")
+    parser.add_argument("--checkpoint",
+                        help="checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the checkpoint and start over")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Batch transcription entry point"""
+    args = parse_args(argv)
+
+    config = ConfigManager().load_config()
+    output_format = args.format or (
+        "text" if args.output.lower().endswith(".txt") else "jsonl")
+
+    files = find_audio_files(args.inputs)
+    if not files:
+        print("No audio files found", file=sys.stderr)
+        return 1
+
+    transcription_service = TranscriptionService(
+        config.get("api_key", ""), usage_ledger=UsageLedger(),
+        base_url=config.get("api_base_url"))
+    transcription_service.set_gateway(
+        config.get("gateway_url"), config.get("gateway_token"))
+
+    transcriber = BatchTranscriber(
+        transcription_service,
+        model=args.model or config.get("stt_model", "gpt-4o-mini-transcribe"),
+        decode_workers=args.decode_workers,
+        upload_workers=args.upload_workers
+    )
+    stats = transcriber.run(
+        files,
+        args.output,
+        output_format=output_format,
+        checkpoint_path=args.checkpoint,
+        resume=not args.restart
+    )
+    transcription_service.usage_ledger.close()
+
+    print(f"Transcribed {stats['files']} files ({stats['failed']} failed) "
+          f"in {stats['elapsed_seconds']:.1f}s: "
+          f"{stats['files_per_minute']:.1f} files/min, "
+          f"{stats['audio_hours_per_hour']:.1f} audio-hours/hour, "
+          f"{stats['bytes_uploaded'] / 1e6:.1f} MB uploaded", file=sys.stderr)
+    return 0 if not stats["failed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
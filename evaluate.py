@@ -0,0 +1,114 @@
+"""Compare transcription backends and upload formats on a local corpus"""
+import argparse
+import json
+import sys
+
+from utils.config_manager import ConfigManager
+from services.evaluator import UPLOAD_FORMATS, Backend, Evaluator, load_corpus
+
+
+def parse_backend(spec, config):
+    """
+    Parse a --backend value: NAME=MODEL[@BASE_URL] or just MODEL
+
+    A BASE_URL points at another OpenAI-compatible endpoint, such as a
+    local model server. Without one the configured endpoint is used.
+    """
+    name, _, target = spec.rpartition("=")
+    model, _, base_url = target.partition("@")
+    return Backend(
+        name or model,
+        model,
+        api_key=config.get("api_key", ""),
+        base_url=base_url or config.get("api_base_url"),
+        gateway_url=None if base_url else config.get("gateway_url"),
+        gateway_token=config.get("gateway_token")
+    )
+
+
+def load_backends(args, config):
+    """Backends from --backend, else eval_backends in config.json, else stt_model"""
+    if args.backend:
+        return [parse_backend(spec, config) for spec in args.backend]
+
+    if config.get("eval_backends"):
+        return [Backend(
+            entry.get("name", entry["model"]),
+            entry["model"],
+            api_key=entry.get("api_key", config.get("api_key", "")),
+            base_url=entry.get("base_url", config.get("api_base_url")),
+            gateway_url=entry.get("gateway_url"),
+            gateway_token=entry.get("gateway_token")
+        ) for entry in config["eval_backends"]]
+
+    return [parse_backend(config.get("stt_model", "gpt-4o-mini-transcribe"), config)]
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Measure accuracy, latency and cost of transcription "
+                    "backends on clips with ground-truth transcripts")
+    parser.add_argument("corpus",
+                        help="directory of audio clips, each with a .txt transcript")
+    parser.add_argument("--backend", action="append",
+                        help="NAME=MODEL[@BASE_URL], repeatable "
+                             "(default: eval_backends or stt_model from config.json)")
+    parser.add_argument("--formats", default="wav44k,wav16k",
+                        help=f"comma separated upload formats: {', '.join(UPLOAD_FORMATS)}")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="requests in flight at once per backend")
+    parser.add_argument("--cache", default="eval_cache.json",
+                        help="transcripts kept between runs")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def format_results(results):
+    """Render the results as a text table"""
+    header = (f"{'backend':<24} {'format':<9} {'clips':>5} {'new':>4} {'fail':>4} "
+              f"{'WER':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'clips/min':>9} {'MB':>7}")
+    lines = [header, "-" * len(header)]
+    for result in results:
+        wer = f"{result['wer'] * 100:.1f}%" if result["wer"] is not None else "-"
+        throughput = (f"{result['clips_per_minute']:.1f}"
+                      if result["clips_per_minute"] is not None else "-")
+        lines.append(
+            f"{result['backend'][:24]:<24} {result['format']:<9} "
+            f"{result['clips']:>5} {result['evaluated']:>4} {result['failed']:>4} "
+            f"{wer:>7} {result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} "
+            f"{result['p99_ms']:>8.0f} {throughput:>9} "
+            f"{result['bytes_uploaded'] / 1e6:>7.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Evaluation entry point"""
+    args = parse_args(argv)
+    config = ConfigManager().load_config()
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in UPLOAD_FORMATS]
+    if unknown:
+        print(f"Unknown upload formats: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    clips = load_corpus(args.corpus)
+    if not clips:
+        print("No clips with transcripts found", file=sys.stderr)
+        return 1
+
+    evaluator = Evaluator(load_backends(args, config), formats,
+                          concurrency=args.concurrency, cache_path=args.cache)
+    results = evaluator.run(clips)
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 0 if not any(result["failed"] for result in results) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Run a shared transcription gateway for many desktop clients"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from services.gateway import TranscriptionGateway
+
+
+def load_keys(args):
+    """API keys from --keys-file (one per line) or OPENAI_API_KEYS (comma separated)"""
+    if args.keys_file:
+        with open(args.keys_file, "r") as file:
+            return [line.strip() for line in file
+                    if line.strip() and not line.startswith("#")]
+    return [key.strip() for key in os.environ.get("OPENAI_API_KEYS", "").split(",")
+            if key.strip()]
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Shared transcription gateway with pooled API keys")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to bind (use 0.0.0.0 for the network)")
+    parser.add_argument("--port", type=int, default=47950)
+    parser.add_argument("--keys-file",
+                        help="file with one OpenAI API key per line "
+                             "(default: OPENAI_API_KEYS environment variable)")
+    parser.add_argument("--upstream-url", default="https://api.openai.com/v1",
+                        help="API the requests are forwarded to")
+    parser.add_argument("--users-file",
+                        help="JSON object of client token to user name; "
+                             "without it any token is accepted as the user name, "
+                             "which is only allowed on a loopback host")
+    parser.add_argument("--user-rpm", type=int, default=20,
+                        help="requests per minute allowed per user")
+    parser.add_argument("--max-concurrent", type=int, default=8,
+                        help="upstream requests in flight at once")
+    parser.add_argument("--cache-size", type=int, default=512,
+                        help="transcripts kept for identical audio")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Gateway entry point"""
+    args = parse_args(argv)
+
+    keys = load_keys(args)
+    if not keys:
+        print("No API keys, use --keys-file or OPENAI_API_KEYS", file=sys.stderr)
+        return 1
+
+    users = None
+    if args.users_file:
+        with open(args.users_file, "r") as file:
+            users = json.load(file)
+
+    try:
+        gateway = TranscriptionGateway(
+            keys,
+            upstream_url=args.upstream_url,
+            users=users,
+            user_requests_per_minute=args.user_rpm,
+            max_concurrent=args.max_concurrent,
+            cache_size=args.cache_size,
+            host=args.host,
+            port=args.port
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    gateway.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        gateway.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Headless entry point: hotkey, record, transcribe and paste without any UI"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import sys
+import threading
+import time
+
+from utils.config_manager import ConfigManager
+from utils.history_manager import HistoryManager
+from utils.audio_recorder import AudioRecorder
+from utils.hotkey_manager import HotkeyManager
+from utils.paste_text_manager import PasteTextManager
+from utils.text_processor import TextProcessor
+from utils.diagnostics import Diagnostics
+from utils.usage_ledger import UsageLedger
+from utils.profiler import ProfileSession
+from services.transcription_service import TranscriptionService
+from services.cleanup_service import CleanupService
+
+
+class HeadlessApplication:
+    """Runs the dictation pipeline without Tk, logging status as JSON lines"""
+
+    def __init__(self, model=None, paste=True, hotkey=None, mode=None,
+                 status_stream=None):
+        """
+        Initialize the headless application
+
+        Args:
+            model: Speech-to-text model overriding the configured one
+            paste: Whether to paste results into the active application
+            hotkey: Hotkey overriding the configured one
+            mode: Recording mode ('hold' or 'toggle') overriding the config
+            status_stream: Stream receiving the JSON status lines,
+                defaults to stdout
+        """
+        self.status_stream = status_stream or sys.stdout
+
+        self.config_manager = ConfigManager()
+        self.config = self.config_manager.load_config()
+
+        self.model = model or self.config.get("stt_model", "whisper-1")
+        self.paste = paste
+        self.hotkey = hotkey or self.config.get("record_hotkey", "ctrl+shift")
+        self.mode = mode or self.config.get("record_mode", "hold")
+
+        self.diagnostics = Diagnostics()
+        self.history_manager = HistoryManager(self.config_manager)
+        self.audio_recorder = AudioRecorder(
+            self.config.get("capture_mode", "thread"), self.diagnostics,
+            self.config.get("input_device"))
+        self.transcription_service = TranscriptionService(
+            self.config.get("api_key", ""), self.diagnostics,
+            usage_ledger=UsageLedger(), base_url=self.config.get("api_base_url"))
+        self.transcription_service.set_gateway(
+            self.config.get("gateway_url"), self.config.get("gateway_token"))
+        self.cleanup_service = CleanupService(
+            self.config.get("api_key", ""), self.diagnostics)
+        self.hotkey_manager = HotkeyManager()
+        self.paste_text_manager = PasteTextManager(
+            self.config_manager, self.diagnostics) if paste else None
+        self.text_processor = TextProcessor(
+            self.config.get("text_replacements", {}),
+            self.config.get("voice_commands", {})
+        )
+
+        self.recording = False
+        self.recording_thread = None
+        self.recording_generation = 0
+        self.profile_session = None
+        self._lock = threading.Lock()
+        # Each dictation is transcribed on its own thread, but pastes go
+        # through the clipboard and must not interleave
+        self._paste_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def run(self):
+        """Arm the hotkey and block until interrupted"""
+        self.hotkey_manager.set_hotkey(
+            self.hotkey,
+            self.mode,
+            self._on_hotkey_press,
+            self._stop_recording if self.mode == "hold" else None
+        )
+        self._log("ready", hotkey=self.hotkey, mode=self.mode, model=self.model)
+
+        try:
+            while not self._stopped.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+
+        self.audio_recorder.close()
+        self.transcription_service.async_core.close()
+        self.transcription_service.usage_ledger.close()
+        self._log("exit", hotkey_latency=self.hotkey_manager.get_latency_stats())
+
+    def start_profile(self, dictations=None, seconds=None):
+        """Profile CPU and memory for the next dictations or seconds"""
+        if self.profile_session and self.profile_session.active:
+            return False
+
+        self.profile_session = ProfileSession(
+            dictations, seconds, self.diagnostics,
+            on_finished=lambda path: self._log("profile_saved", path=path))
+        self.profile_session.start()
+        return True
+
+    def stop(self):
+        """Stop the run loop"""
+        self._stopped.set()
+
+    def _on_hotkey_press(self):
+        """Start recording, or toggle it in toggle mode"""
+        if self.mode == "toggle" and self.recording:
+            self._stop_recording()
+        else:
+            self._start_recording()
+
+    def _start_recording(self):
+        """Start recording audio"""
+        with self._lock:
+            if self.recording:
+                return
+            self.recording = True
+            self.recording_generation += 1
+
+            on_end_of_speech = None
+            if self.mode == "toggle" and self.config.get("auto_stop_enabled", False):
+                generation = self.recording_generation
+                on_end_of_speech = lambda: self.hotkey_manager.run_on_worker(
+                    lambda: self._auto_stop_recording(generation))
+
+            try:
+                self.recording_thread = self.audio_recorder.start_recording(
+                    on_end_of_speech=on_end_of_speech,
+                    trailing_silence_ms=self.config.get("auto_stop_silence_ms", 1500))
+            except OSError as e:
+                self.recording = False
+                self.recording_thread = None
+                self._log("error", error=f"Could not start recording: {e}")
+                return
+        self._log("recording_started")
+
+    def _auto_stop_recording(self, generation):
+        """Stop the recording once the speaker has finished (toggle mode)"""
+        if self.recording and generation == self.recording_generation:
+            self._log("end_of_speech")
+            self._stop_recording()
+
+    def _stop_recording(self):
+        """Stop recording and transcribe in the background"""
+        with self._lock:
+            if not self.recording:
+                return
+            self.recording = False
+
+        self.audio_recorder.stop_recording()
+        if self.recording_thread:
+            self.recording_thread.join()
+
+        filename = self.audio_recorder.save_audio()
+        self._log("recording_stopped", saved=filename is not None)
+        if filename:
+            threading.Thread(target=self._transcribe, args=(
+                filename,), daemon=True).start()
+
+    def _transcribe(self, filename):
+        """Transcribe, post-process, paste and store a recording"""
+        start_time = time.perf_counter()
+        self._log("transcribing")
+        try:
+            text = self.transcription_service.transcribe(filename, self.model)
+            text = self.text_processor.process(text)
+
+            if self.config.get("cleanup_enabled", False):
+                future = self.cleanup_service.start_cleanup(
+                    text, self.config.get("cleanup_model", "gpt-4o-mini"))
+                try:
+                    text = future.result(
+                        timeout=self.config.get("cleanup_budget_ms", 1500) / 1000)
+                except concurrent.futures.TimeoutError:
+                    self._log("cleanup_timeout")
+                except Exception as e:
+                    self._log("cleanup_error", error=str(e))
+        except Exception as e:
+            self._log("error", error=str(e))
+        else:
+            with self._paste_lock:
+                if self.paste_text_manager:
+                    self.paste_text_manager.paste_text(text)
+                self.history_manager.add_entry(text)
+
+            self._log("transcribed", text=text,
+                      seconds=round(time.perf_counter() - start_time, 3))
+        finally:
+            self.audio_recorder.delete_recording(filename)
+
+            profile_session = self.profile_session
+            if profile_session:
+                profile_session.dictation_finished()
+
+    def _log(self, event, **fields):
+        """Write one structured status line to stdout"""
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        print(json.dumps(record, ensure_ascii=False),
+              file=self.status_stream, flush=True)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Too Lazy to Type without the UI")
+    parser.add_argument("--model", help="speech-to-text model to use")
+    parser.add_argument("--hotkey", help="record hotkey, e.g. ctrl+shift")
+    parser.add_argument("--mode", choices=["hold", "toggle"],
+                        help="recording mode")
+    parser.add_argument("--no-paste", action="store_true",
+                        help="only log transcripts, do not paste them")
+    parser.add_argument("--profile-dictations", type=int, metavar="N",
+                        help="capture a CPU and memory profile of the next N dictations")
+    parser.add_argument("--profile-seconds", type=int, metavar="N",
+                        help="capture a CPU and memory profile of the next N seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Headless entry point"""
+    args = parse_args(argv)
+
+    # Keep stdout for status lines only, other prints go to stderr
+    status_stream = sys.stdout
+    sys.stdout = sys.stderr
+
+    app = HeadlessApplication(
+        model=args.model,
+        paste=not args.no_paste,
+        hotkey=args.hotkey,
+        mode=args.mode,
+        status_stream=status_stream
+    )
+    if args.profile_dictations or args.profile_seconds:
+        app.start_profile(args.profile_dictations, args.profile_seconds)
+    app.run()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
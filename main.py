@@ -1,5 +1,24 @@
+import argparse
+import multiprocessing
+
 from ui.main_window import MainApplication
 
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Too Lazy to Type")
+    parser.add_argument("--profile-dictations", type=int, metavar="N",
+                        help="capture a CPU and memory profile of the next N dictations")
+    parser.add_argument("--profile-seconds", type=int, metavar="N",
+                        help="capture a CPU and memory profile of the next N seconds")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    # Needed by the capture process in a frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+    args = parse_args()
     app = MainApplication()
-    app.run()
\ No newline at end of file
+    if args.profile_dictations or args.profile_seconds:
+        app.start_profile(args.profile_dictations, args.profile_seconds)
+    app.run()
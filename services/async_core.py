@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Failures the SDK would retry by itself. The shared clients have their
+# retries disabled, so the services retry these with a backoff.
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.APITimeoutError,
+                    openai.InternalServerError)
+
+
+class AsyncCore:
+    """One background event loop running the API requests of every service
+
+    Work is submitted from any thread as a coroutine and comes back as a
+    concurrent.futures.Future. All clients share one connection pool, so
+    concurrent requests multiplex over a few connections (HTTP/2 when the
+    h2 package is installed) instead of each holding a thread and a socket.
+    """
+
+    MAX_CONNECTIONS = 8
+    MAX_KEEPALIVE_CONNECTIONS = 4
+    TIMEOUT = 60.0
+    CONNECT_TIMEOUT = 10.0
+
+    # Clients kept for different keys or endpoints, they share the pool
+    MAX_CLIENTS = 8
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._clients = OrderedDict()
+
+    def submit(self, coroutine):
+        """
+        Run a coroutine on the event loop
+
+        Args:
+            coroutine: Coroutine object, usually calling get_client()
+
+        Returns:
+            A concurrent.futures.Future with the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def get_client(self, api_key, base_url=None):
+        """
+        Get an AsyncOpenAI client on the shared pool (call on the loop)
+
+        Args:
+            api_key: API key
+            base_url: API base URL, None for OPENAI_BASE_URL or the default
+
+        Returns:
+            AsyncOpenAI client without automatic retries
+        """
+        key = (api_key, base_url)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS),
+                timeout=httpx.Timeout(self.TIMEOUT, connect=self.CONNECT_TIMEOUT)
+            )
+
+        # Retries are left to the shared rate limiter
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                             http_client=self._http_client)
+        self._clients[key] = client
+        if len(self._clients) > self.MAX_CLIENTS:
+            # Not closed, that would close the shared pool
+            self._clients.popitem(last=False)
+        return client
+
+    def close(self, timeout=2.0):
+        """Close the connections and stop the event loop"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._close_clients(), loop).result(timeout)
+        except Exception as e:
+            print(f"Could not close API connections: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+
+    async def _close_clients(self):
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def _get_loop(self):
+        """Get the event loop, starting its thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._loop,), name="api-io",
+                    daemon=True)
+                self._thread.start()
+            return self._loop
+
+    @staticmethod
+    def _run(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
+
+
+# Shared by every service in the process, so they share the connections
+SHARED_ASYNC_CORE = AsyncCore()
@@ -0,0 +1,270 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from utils.audio_utils import read_wav, resample, write_wav
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".mp4", ".mpeg", ".mpga",
+                    ".webm", ".ogg", ".oga", ".flac"}
+
+# Speech models are trained on 16 kHz audio, so nothing is lost by
+# uploading at this rate and the files get much smaller
+UPLOAD_RATE = 16000
+
+
+def find_audio_files(inputs):
+    """
+    Expand files and directories into a sorted list of audio files
+
+    Args:
+        inputs: File and directory paths
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        files.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def prepare_audio(path, work_dir):
+    """
+    Decode and resample one file to 16 kHz mono WAV (runs in a worker process)
+
+    WAV files are decoded with numpy, other formats with ffmpeg when it is
+    installed. Without ffmpeg they are uploaded as they are.
+
+    Returns:
+        Dictionary with the upload path and the audio duration in seconds
+        (None when unknown)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    handle, upload_path = tempfile.mkstemp(suffix=".wav", dir=work_dir)
+    os.close(handle)
+
+    if extension == ".wav":
+        try:
+            samples, rate = read_wav(path)
+        except (ValueError, EOFError) as e:
+            # Compressed WAV variants are left to ffmpeg or the API
+            print(f"Could not decode {path}: {e}", file=sys.stderr)
+        else:
+            samples = resample(samples, rate, UPLOAD_RATE)
+            write_wav(upload_path, samples, UPLOAD_RATE)
+            return {"upload_path": upload_path,
+                    "duration": len(samples) / UPLOAD_RATE}
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        result = subprocess.run(
+            [ffmpeg, "-v", "error", "-i", path, "-f", "s16le",
+             "-ac", "1", "-ar", str(UPLOAD_RATE), "-"],
+            capture_output=True,
+            check=True
+        )
+        samples = np.frombuffer(result.stdout, dtype=np.int16)
+        write_wav(upload_path, samples, UPLOAD_RATE)
+        return {"upload_path": upload_path,
+                "duration": len(samples) / UPLOAD_RATE}
+
+    os.remove(upload_path)
+    return {"upload_path": path, "duration": None}
+
+
+class BatchTranscriber:
+    """Transcribes many audio files with parallel decoding and uploads"""
+
+    def __init__(self, transcription_service, model="gpt-4o-mini-transcribe",
+                 decode_workers=None, upload_workers=4):
+        """
+        Initialize the batch transcriber
+
+        Args:
+            transcription_service: The TranscriptionService used for uploads
+            model: Speech-to-text model
+            decode_workers: Number of decoding processes (defaults to CPU count)
+            upload_workers: Maximum number of concurrent uploads, they run
+                on the transcription service's event loop, not in threads
+        """
+        self.transcription_service = transcription_service
+        self.model = model
+        self.decode_workers = decode_workers
+        self.upload_workers = upload_workers
+
+    def run(self, files, output_path, output_format="jsonl",
+            checkpoint_path=None, resume=True):
+        """
+        Transcribe files, writing each result as soon as it finishes
+
+        Args:
+            files: Audio file paths
+            output_path: File receiving the results
+            output_format: 'jsonl' or 'text'
+            checkpoint_path: File recording finished inputs, defaults to
+                the output path with '.checkpoint' appended
+            resume: Skip files already listed in the checkpoint
+
+        Returns:
+            Dictionary with the run statistics
+        """
+        checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+        done = self._load_checkpoint(checkpoint_path) if resume else set()
+        pending = [f for f in files if self._file_key(f) not in done]
+
+        if len(pending) < len(files):
+            print(f"Resuming: {len(files) - len(pending)} files already done",
+                  file=sys.stderr)
+
+        mode = "a" if resume else "w"
+        stats = {"files": 0, "failed": 0, "audio_seconds": 0.0,
+                 "bytes_uploaded": 0}
+        write_lock = threading.Lock()
+        start_time = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(prefix="tltt_batch_") as work_dir, \
+                open(output_path, mode, encoding="utf-8") as output, \
+                open(checkpoint_path, mode, encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(max_workers=self.decode_workers) as decoders:
+
+            # Decodes run at most a window ahead of the uploads, so only that
+            # many converted files wait in the work directory at once
+            window = max(2 * self.upload_workers,
+                         self.decode_workers or os.cpu_count() or 1)
+            remaining = iter(pending)
+            decodes = {}
+            self._submit_decodes(decoders, remaining, decodes, window, work_dir)
+
+            # Upload future -> (path, prepared, start time)
+            uploads = {}
+            while decodes:
+                finished, _ = wait(decodes, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = decodes.pop(future)
+                    try:
+                        prepared = future.result()
+                    except Exception as e:
+                        self._record_failure(path, e, stats, write_lock)
+                        continue
+
+                    if len(uploads) >= self.upload_workers:
+                        self._finish_uploads(uploads, output, output_format,
+                                             checkpoint, stats, write_lock)
+                    self._start_upload(uploads, path, prepared, stats, write_lock)
+                self._submit_decodes(decoders, remaining, decodes, window, work_dir)
+
+            while uploads:
+                self._finish_uploads(uploads, output, output_format,
+                                     checkpoint, stats, write_lock)
+
+        elapsed = time.perf_counter() - start_time
+        stats["elapsed_seconds"] = elapsed
+        stats["files_per_minute"] = stats["files"] / elapsed * 60 if elapsed else 0.0
+        stats["audio_hours_per_hour"] = stats["audio_seconds"] / elapsed if elapsed else 0.0
+        return stats
+
+    @staticmethod
+    def _submit_decodes(decoders, remaining, decodes, window, work_dir):
+        """Top the decodes in flight up to the window from the remaining files"""
+        while len(decodes) < window:
+            path = next(remaining, None)
+            if path is None:
+                return
+            decodes[decoders.submit(prepare_audio, path, work_dir)] = path
+
+    def _start_upload(self, uploads, path, prepared, stats, write_lock):
+        """Submit one prepared file to the transcription service"""
+        upload_path = prepared["upload_path"]
+        try:
+            prepared["size"] = os.path.getsize(upload_path)
+            future = self.transcription_service.submit_transcription(
+                upload_path, self.model, priority="batch", timestamps=False)
+        except Exception as e:
+            self._record_failure(path, e, stats, write_lock)
+            return
+        finally:
+            # The file is read by the time the request is submitted
+            if upload_path != path and os.path.exists(upload_path):
+                os.remove(upload_path)
+        uploads[future] = (path, prepared, time.perf_counter())
+
+    def _finish_uploads(self, uploads, output, output_format, checkpoint,
+                        stats, write_lock):
+        """Wait for at least one upload to finish and write the results"""
+        done, _ = wait(uploads, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, prepared, start_time = uploads.pop(future)
+            try:
+                text = future.result()["text"]
+            except Exception as e:
+                self._record_failure(path, e, stats, write_lock)
+                continue
+            self._write_result(path, prepared, text, start_time, output,
+                               output_format, checkpoint, stats, write_lock)
+
+    def _write_result(self, path, prepared, text, start_time, output,
+                      output_format, checkpoint, stats, write_lock):
+        """Write one transcript and mark its file done"""
+        seconds = time.perf_counter() - start_time
+        with write_lock:
+            if output_format == "text":
+                output.write(f"## {path}\n{text}\n\n")
+            else:
+                output.write(json.dumps({
+                    "file": path,
+                    "text": text,
+                    "audio_seconds": prepared["duration"],
+                    "seconds": round(seconds, 3)
+                }, ensure_ascii=False) + "\n")
+            output.flush()
+
+            # Only marked done once the result is safely written
+            checkpoint.write(json.dumps({"key": self._file_key(path)}) + "\n")
+            checkpoint.flush()
+
+            stats["files"] += 1
+            stats["bytes_uploaded"] += prepared["size"]
+            stats["audio_seconds"] += prepared["duration"] or 0.0
+
+        print(f"Done {path} in {seconds:.1f}s", file=sys.stderr)
+
+    @staticmethod
+    def _record_failure(path, error, stats, write_lock):
+        """Count and report a failed file, it stays out of the checkpoint"""
+        with write_lock:
+            stats["failed"] += 1
+        print(f"Failed {path}: {error}", file=sys.stderr)
+
+    @staticmethod
+    def _file_key(path):
+        """Identify a file by path, size and modification time"""
+        stat = os.stat(path)
+        return f"{path}|{stat.st_size}|{int(stat.st_mtime)}"
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path):
+        """Read the keys of finished files from a checkpoint"""
+        done = set()
+        if not os.path.exists(checkpoint_path):
+            return done
+        with open(checkpoint_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    done.add(json.loads(line)["key"])
+                except (ValueError, KeyError):
+                    # Last line may be cut off by an interrupted run
+                    continue
+        return done
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import openai
+
+from services.async_core import SHARED_ASYNC_CORE, TRANSIENT_ERRORS
+from services.rate_limiter import SHARED_RATE_LIMITER
+
+CLEANUP_PROMPT = (
+    "You clean up dictated text. Fix punctuation and capitalization, remove "
+    "filler words (um, uh, like, you know), split run-on sentences and apply "
+    "obvious formatting. Keep the wording, meaning and language unchanged. "
+    "Reply with the cleaned text only."
+)
+
+
+class CleanupService:
+    """Cleans up transcripts with a chat model, with results cached by input"""
+
+    CACHE_SIZE = 256
+
+    # Hard cap for a request that keeps running after the budget expired
+    REQUEST_TIMEOUT = 30.0
+
+    # Transient failures are retried once after a short pause
+    MAX_ATTEMPTS = 2
+    RETRY_BACKOFF = 0.25
+
+    def __init__(self, api_key, diagnostics=None, rate_limiter=None, async_core=None):
+        """
+        Initialize the cleanup service
+
+        Args:
+            api_key: OpenAI API key
+            diagnostics: Optional Diagnostics instance receiving timings
+            rate_limiter: RateLimiter shared with the other API calls
+            async_core: AsyncCore the requests run on, defaults to the
+                shared one
+        """
+        self.api_key = api_key
+        self.diagnostics = diagnostics
+        self.rate_limiter = rate_limiter or SHARED_RATE_LIMITER
+        self.async_core = async_core or SHARED_ASYNC_CORE
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def set_api_key(self, api_key):
+        """Update the API key"""
+        self.api_key = api_key
+
+    def start_cleanup(self, text, model="gpt-4o-mini"):
+        """
+        Start cleaning up a transcript
+
+        Args:
+            text: The transcript to clean up
+            model: Chat model used for the cleanup
+
+        Returns:
+            A Future resolving to the cleaned text. Cached results come back
+            as an already completed future.
+        """
+        with self._cache_lock:
+            cached = self._cache.get((model, text))
+            if cached is not None:
+                self._cache.move_to_end((model, text))
+
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        return self.async_core.submit(self._cleanup(self.api_key, text, model))
+
+    async def _cleanup(self, api_key, text, model):
+        """Stream the cleaned text from the chat model (runs on the loop)"""
+        if not api_key:
+            raise ValueError("API key is not set")
+
+        client = self.async_core.get_client(api_key)
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            await self.rate_limiter.acquire_async("interactive")
+
+            start_time = time.perf_counter()
+            try:
+                parts = await self._stream_cleanup(client, text, model)
+                break
+            except TRANSIENT_ERRORS as e:
+                if self.diagnostics:
+                    self.diagnostics.record_failure("cleanup", e)
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                print(f"Cleanup request failed ({e}), retrying")
+                await asyncio.sleep(self.RETRY_BACKOFF * 2 ** (attempt - 1))
+            except Exception as e:
+                # No retry on a 429, a late cleanup is worth less than the budget
+                if isinstance(e, openai.RateLimitError):
+                    self.rate_limiter.on_rate_limited(e.response.headers)
+                if self.diagnostics:
+                    self.diagnostics.record_failure("cleanup", e)
+                raise
+
+        if self.diagnostics:
+            self.diagnostics.record_timing(
+                "cleanup", time.perf_counter() - start_time)
+
+        # Never replace a transcript with an empty answer
+        cleaned = "".join(parts).strip() or text
+
+        with self._cache_lock:
+            self._cache[(model, text)] = cleaned
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        return cleaned
+
+    async def _stream_cleanup(self, client, text, model):
+        """Send one cleanup request and collect the streamed parts"""
+        raw_response = await client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": CLEANUP_PROMPT},
+                {"role": "user", "content": text}
+            ],
+            temperature=0,
+            stream=True,
+            timeout=self.REQUEST_TIMEOUT
+        )
+        self.rate_limiter.update_from_headers(raw_response.headers)
+        stream = raw_response.parse()
+
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        return parts
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from services.batch_transcriber import find_audio_files
+from services.rate_limiter import RateLimiter
+from services.transcription_service import TranscriptionService
+from utils.audio_utils import read_wav, resample, write_wav
+from utils.diagnostics import Diagnostics
+
+# Upload formats: sample rate of the mono 16-bit WAV sent, None for the
+# clip as it is. wav44k is what the app records, wav16k what batch sends.
+UPLOAD_FORMATS = {"original": None, "wav44k": 44100, "wav16k": 16000}
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, for scoring"""
+    return _PUNCTUATION.sub(" ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Count the word substitutions, deletions and insertions between texts
+
+    Returns:
+        Tuple of (errors, number of reference words)
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+
+    # Edit distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_corpus(directory):
+    """
+    Find the clips of a corpus and their ground truth
+
+    Every audio file needs a transcript next to it with the same name and
+    a .txt extension, e.g. meeting-01.wav and meeting-01.txt.
+
+    Returns:
+        List of dictionaries with 'path', 'reference', 'hash' and
+        'duration' (0 when the clip is not a WAV file)
+    """
+    clips = []
+    for path in find_audio_files([directory]):
+        transcript = os.path.splitext(path)[0] + ".txt"
+        if not os.path.exists(transcript):
+            print(f"Skipping {path}: no {os.path.basename(transcript)}",
+                  file=sys.stderr)
+            continue
+
+        with open(transcript, "r", encoding="utf-8") as file:
+            reference = file.read().strip()
+        with open(path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        try:
+            with wave.open(path, "rb") as wf:
+                duration = wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError):
+            duration = 0.0
+        clips.append({"path": path, "reference": reference, "hash": digest,
+                      "duration": duration})
+    return clips
+
+
+class Backend:
+    """A transcription setup to evaluate: model and endpoint"""
+
+    def __init__(self, name, model, api_key="", base_url=None, gateway_url=None,
+                 gateway_token=None):
+        """
+        Initialize the backend
+
+        Args:
+            name: Label in the report
+            model: Speech-to-text model
+            api_key: API key, local servers usually accept any value
+            base_url: OpenAI-compatible endpoint, e.g. a local model server
+            gateway_url: Shared gateway used instead of the endpoint
+            gateway_token: Client token for the gateway
+        """
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.gateway_url = gateway_url
+        self.gateway_token = gateway_token
+
+    @property
+    def signature(self):
+        """What the transcripts depend on, the key is left out"""
+        return f"{self.model}|{self.base_url or ''}|{self.gateway_url or ''}"
+
+    def create_service(self):
+        """Build a TranscriptionService with its own rate limiter"""
+        service = TranscriptionService(
+            self.api_key, rate_limiter=RateLimiter(), base_url=self.base_url)
+        service.set_gateway(self.gateway_url, self.gateway_token)
+        return service
+
+
+class Evaluator:
+    """Runs a corpus through backends and upload formats and scores them"""
+
+    def __init__(self, backends, formats=("wav44k", "wav16k"), concurrency=4,
+                 cache_path="eval_cache.json"):
+        """
+        Initialize the evaluator
+
+        Args:
+            backends: Backend instances to compare
+            formats: Names from UPLOAD_FORMATS
+            concurrency: Requests in flight at once for one backend
+            cache_path: JSON file keeping every transcript by clip, backend
+                and format, so re-runs only send what changed
+        """
+        self.backends = backends
+        self.formats = formats
+        self.concurrency = concurrency
+        self.cache_path = cache_path
+        self.cache = self._load_cache()
+
+    def run(self, clips):
+        """
+        Evaluate every backend and format on the clips
+
+        Args:
+            clips: Clips from load_corpus
+
+        Returns:
+            List of one result dictionary per backend and format
+        """
+        results = []
+        with tempfile.TemporaryDirectory(prefix="tltt_eval_") as work_dir:
+            for backend in self.backends:
+                service = backend.create_service()
+                for upload_format in self.formats:
+                    results.append(self._run_group(
+                        service, backend, upload_format, clips, work_dir))
+                    self._save_cache()
+        return results
+
+    def _run_group(self, service, backend, upload_format, clips, work_dir):
+        """Evaluate one backend with one upload format"""
+        entries = {}
+        fresh = {}
+        failed = 0
+
+        # Future -> (clip, cache key, upload size, submit time, completion time)
+        in_flight = {}
+        start_time = time.perf_counter()
+        for clip in clips:
+            key = f"{clip['hash']}|{backend.signature}|{upload_format}"
+            cached = self.cache.get(key)
+            if cached is not None:
+                entries[clip["path"]] = cached
+                continue
+
+            if len(in_flight) >= self.concurrency:
+                failed += self._collect(in_flight, entries, fresh)
+
+            upload_path = clip["path"]
+            try:
+                upload_path = self._prepare(clip["path"], upload_format, work_dir)
+                size = os.path.getsize(upload_path)
+                future = service.submit_transcription(
+                    upload_path, backend.model, priority="batch", timestamps=False)
+            except Exception as e:
+                print(f"Failed {clip['path']} ({backend.name}, {upload_format}): {e}",
+                      file=sys.stderr)
+                failed += 1
+                continue
+            finally:
+                if upload_path != clip["path"] and os.path.exists(upload_path):
+                    os.remove(upload_path)
+
+            # Latency ends when the loop completes the request, not when
+            # this thread gets around to it
+            done_at = {}
+            future.add_done_callback(
+                lambda _, done_at=done_at: done_at.setdefault("time", time.perf_counter()))
+            in_flight[future] = (clip, key, size, time.perf_counter(), done_at)
+
+        while in_flight:
+            failed += self._collect(in_flight, entries, fresh)
+        elapsed = time.perf_counter() - start_time
+
+        for key, entry in fresh.items():
+            self.cache[key] = entry
+        return self._score(backend, upload_format, clips, entries, len(fresh),
+                           failed, elapsed)
+
+    def _collect(self, in_flight, entries, fresh):
+        """
+        Wait for at least one request and keep its result
+
+        Returns:
+            Number of failed requests
+        """
+        failed = 0
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            clip, key, size, submitted, done_at = in_flight.pop(future)
+            try:
+                text = future.result()["text"]
+            except Exception as e:
+                print(f"Failed {clip['path']}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            entry = {
+                "text": text,
+                "latency": done_at.get("time", time.perf_counter()) - submitted,
+                "bytes": size
+            }
+            entries[clip["path"]] = fresh[key] = entry
+        return failed
+
+    @staticmethod
+    def _prepare(path, upload_format, work_dir):
+        """Convert a clip to the upload format, returns the file to send"""
+        rate = UPLOAD_FORMATS[upload_format]
+        if rate is None:
+            return path
+
+        try:
+            samples, source_rate = read_wav(path)
+        except (wave.Error, ValueError, EOFError) as e:
+            raise ValueError(f"{upload_format} needs a PCM WAV clip: {e}")
+        handle, upload_path = tempfile.mkstemp(suffix=".wav", dir=work_dir)
+        os.close(handle)
+        write_wav(upload_path, resample(samples, source_rate, rate), rate)
+        return upload_path
+
+    @staticmethod
+    def _score(backend, upload_format, clips, entries, fresh_count, failed, elapsed):
+        """Aggregate word error rate, latency, throughput and bytes"""
+        diagnostics = Diagnostics(max_samples=max(1, len(clips)))
+        errors = words = size = 0
+        audio_seconds = 0.0
+        for clip in clips:
+            entry = entries.get(clip["path"])
+            if entry is None:
+                continue
+            clip_errors, clip_words = word_errors(clip["reference"], entry["text"])
+            errors += clip_errors
+            words += clip_words
+            size += entry["bytes"]
+            audio_seconds += clip["duration"]
+            diagnostics.record_timing("latency", entry["latency"])
+
+        latency = diagnostics.get_stats("latency")
+        return {
+            "backend": backend.name,
+            "model": backend.model,
+            "format": upload_format,
+            "clips": len(entries),
+            "evaluated": fresh_count,
+            "failed": failed,
+            "wer": errors / words if words else None,
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+            "p99_ms": latency["p99_ms"],
+            # Measured on the requests sent in this run only
+            "clips_per_minute": fresh_count / elapsed * 60
+            if fresh_count and elapsed else None,
+            "bytes_uploaded": size,
+            "audio_seconds": audio_seconds
+        }
+
+    def _load_cache(self):
+        """Load cached transcripts, starting empty if missing or damaged"""
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (ValueError, OSError) as e:
+            print(f"Ignoring the evaluation cache: {e}", file=sys.stderr)
+            return {}
+
+    def _save_cache(self):
+        with open(self.cache_path, "w", encoding="utf-8") as file:
+            json.dump(self.cache, file)
@@ -0,0 +1,451 @@
+import hashlib
+import http.client
+import ipaddress
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from services.multipart import (RequestTooLarge, build_multipart, parse_multipart,
+                                read_request_body)
+from services.rate_limiter import RateLimiter
+from utils.diagnostics import Diagnostics
+
+
+class UpstreamKey:
+    """One API key with its own rate limiter and idle connections"""
+
+    def __init__(self, index, api_key, upstream_url, max_idle_connections):
+        self.name = f"key-{index}"
+        self.api_key = api_key
+        self.limiter = RateLimiter()
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+        url = urlsplit(upstream_url)
+        self._connection_class = (http.client.HTTPSConnection
+                                  if url.scheme == "https"
+                                  else http.client.HTTPConnection)
+        self._host = url.hostname
+        self._port = url.port
+        self.base_path = url.path.rstrip("/")
+        self._idle = queue.LifoQueue(maxsize=max_idle_connections)
+
+    def post(self, path, body, content_type, timeout=60):
+        """
+        Send a request upstream on a pooled keep-alive connection
+
+        Returns:
+            Tuple of (status, headers, body)
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": content_type,
+            "Content-Length": str(len(body))
+        }
+        for attempt in range(2):
+            connection, reused = self._get_connection(timeout)
+            try:
+                connection.request("POST", self.base_path + path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                # An idle connection may have been closed by the server
+                if reused and attempt == 0:
+                    continue
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                try:
+                    self._idle.put_nowait(connection)
+                except queue.Full:
+                    connection.close()
+            return response.status, response.headers, data
+
+    def _get_connection(self, timeout):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connection_class(self._host, self._port, timeout=timeout), False
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "requests": self.requests,
+                "errors": self.errors}
+
+
+class FairScheduler:
+    """Limits concurrent upstream requests, serving waiting users in turn"""
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max_concurrent
+        self._condition = threading.Condition()
+        self._active = 0
+        # User -> waiting tickets, in round robin order
+        self._waiting = OrderedDict()
+
+    def acquire(self, user):
+        """Block until this user's turn for an upstream slot"""
+        ticket = object()
+        with self._condition:
+            self._waiting.setdefault(user, deque()).append(ticket)
+            while not (self._active < self.max_concurrent
+                       and self._next_ticket() is ticket):
+                self._condition.wait()
+
+            tickets = self._waiting.pop(user)
+            tickets.popleft()
+            if tickets:
+                # Back of the line for this user's next request
+                self._waiting[user] = tickets
+            self._active += 1
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _next_ticket(self):
+        for tickets in self._waiting.values():
+            return tickets[0]
+        return None
+
+
+class UserRateLimits:
+    """Per-user token buckets"""
+
+    def __init__(self, requests_per_minute):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1.0, requests_per_minute / 6)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, user):
+        """
+        Take a token for a request
+
+        Returns:
+            Seconds to wait before retrying, 0 when the request is allowed
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(user, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[user] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[user] = (tokens - 1, now)
+            return 0
+
+
+def _is_loopback(host):
+    """Check whether a bind address only accepts local connections"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class TranscriptionGateway:
+    """OpenAI-compatible transcription endpoint shared by many clients"""
+
+    # Upstream statuses retried on another key
+    RETRY_STATUSES = (429, 500, 502, 503)
+
+    # Largest request accepted: the API's 25 MB upload limit plus the form
+    MAX_BODY_BYTES = 26 * 1024 * 1024
+
+    def __init__(self, api_keys, upstream_url="https://api.openai.com/v1",
+                 users=None, user_requests_per_minute=20, max_concurrent=8,
+                 cache_size=512, host="127.0.0.1", port=47950):
+        """
+        Initialize the gateway
+
+        Args:
+            api_keys: OpenAI API keys requests are balanced across
+            upstream_url: API base URL the requests are forwarded to
+            users: Dictionary of client token to user name, None to accept
+                any token and use it as the user name (loopback hosts only)
+            user_requests_per_minute: Rate limit of each user
+            max_concurrent: Upstream requests in flight at once
+            cache_size: Number of transcripts kept for identical audio
+            host: Interface to bind
+            port: TCP port
+
+        Raises:
+            ValueError: Without API keys, or when a host reachable from the
+                network is bound without users
+        """
+        if not api_keys:
+            raise ValueError("The gateway needs at least one API key")
+        if users is None and not _is_loopback(host):
+            raise ValueError(
+                f"Binding {host} without users would let anyone on the network "
+                "use the API keys, add a users file")
+
+        self.keys = [UpstreamKey(index, key, upstream_url, max_concurrent)
+                     for index, key in enumerate(api_keys)]
+        self.users = users
+        self.user_limits = UserRateLimits(user_requests_per_minute)
+        self.scheduler = FairScheduler(max_concurrent)
+        self.cache_size = cache_size
+        self.host = host
+        self.port = port
+
+        self.diagnostics = Diagnostics(max_samples=1000)
+        self.counters = {"requests": 0, "cache_hits": 0, "deduplicated": 0,
+                         "upstream_requests": 0, "rate_limited": 0, "errors": 0}
+        self.user_requests = {}
+
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._keys_lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Transcription gateway listening on http://{self.host}:{self.port}/v1")
+
+    def stop(self):
+        """Stop serving"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def get_metrics(self):
+        """
+        Get aggregate gateway metrics
+
+        Returns:
+            JSON-serializable dictionary of counters, latency statistics,
+            per-key and per-user counts
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            users = dict(self.user_requests)
+            cached = len(self._cache)
+        return {
+            "counters": counters,
+            "cache_entries": cached,
+            "latency": {name: self.diagnostics.get_stats(name)
+                        for name in ("gateway_total", "gateway_upstream")},
+            "keys": {key.name: key.stats() for key in self.keys},
+            "users": users
+        }
+
+    def transcribe(self, user, fields, files):
+        """
+        Answer one transcription request, from the cache when possible
+
+        Returns:
+            Tuple of (status, content type, body)
+        """
+        start = time.perf_counter()
+        result = self._transcribe_once(user, self._cache_key(fields, files),
+                                       fields, files)
+        self.diagnostics.record_timing("gateway_total", time.perf_counter() - start)
+        return result
+
+    def _transcribe_once(self, user, key, fields, files):
+        """Serve from the cache, join an identical request or forward it"""
+        with self._lock:
+            self.counters["requests"] += 1
+            self.user_requests[user] = self.user_requests.get(user, 0) + 1
+
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+                return cached
+
+            # Identical audio already on its way upstream: share the answer
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self.counters["deduplicated"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._forward(user, fields, files)
+        except Exception as e:
+            result = (502, "application/json", json.dumps(
+                {"error": {"message": f"upstream failed: {e}"}}).encode())
+
+        with self._lock:
+            del self._in_flight[key]
+            if result[0] == 200:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self.counters["errors"] += 1
+        future.set_result(result)
+        return result
+
+    def _forward(self, user, fields, files):
+        """Send the request upstream, moving to another key on 429 or 5xx"""
+        body, content_type = build_multipart(fields, files)
+
+        self.scheduler.acquire(user)
+        try:
+            tried = set()
+            while True:
+                upstream = self._pick_key(tried)
+                tried.add(upstream)
+                upstream.limiter.acquire("interactive")
+
+                with self._keys_lock:
+                    upstream.in_flight += 1
+                    upstream.requests += 1
+                with self._lock:
+                    self.counters["upstream_requests"] += 1
+
+                start = time.perf_counter()
+                try:
+                    status, headers, data = upstream.post(
+                        "/audio/transcriptions", body, content_type)
+                except (OSError, http.client.HTTPException):
+                    upstream.errors += 1
+                    if len(tried) == len(self.keys):
+                        raise
+                    continue
+                finally:
+                    with self._keys_lock:
+                        upstream.in_flight -= 1
+
+                self.diagnostics.record_timing(
+                    "gateway_upstream", time.perf_counter() - start)
+                if status == 429:
+                    upstream.limiter.on_rate_limited(headers)
+                else:
+                    upstream.limiter.update_from_headers(headers)
+
+                if status in self.RETRY_STATUSES:
+                    upstream.errors += 1
+                    if len(tried) < len(self.keys):
+                        continue
+                return status, headers.get("Content-Type", "application/json"), data
+        finally:
+            self.scheduler.release()
+
+    def _pick_key(self, exclude):
+        """Least busy key that has not been tried yet"""
+        with self._keys_lock:
+            candidates = [key for key in self.keys if key not in exclude] or self.keys
+            return min(candidates, key=lambda key: (key.in_flight, key.requests))
+
+    @staticmethod
+    def _cache_key(fields, files):
+        """Hash of every field and the audio, so options are part of the key"""
+        digest = hashlib.sha256()
+        for name in sorted(fields):
+            digest.update(f"{name}={fields[name]}\0".encode())
+        for name in sorted(files):
+            digest.update(name.encode() + b"\0" + files[name][2])
+        return digest.hexdigest()
+
+    def _authenticate(self, header):
+        """Get the user of an Authorization header, None if not allowed"""
+        if not header.startswith("Bearer "):
+            return None
+        token = header[len("Bearer "):].strip()
+        if not token:
+            return None
+        if self.users is None:
+            return token
+        return self.users.get(token)
+
+    def _make_handler(self):
+        """Build the request handler class bound to this gateway"""
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path.rstrip("/") in ("/metrics", "/v1/metrics"):
+                    self._send(200, "application/json",
+                               json.dumps(gateway.get_metrics()).encode())
+                else:
+                    self._send_error(404, "not found")
+
+            def do_POST(self):
+                # Rejected before the body is read, which is then left
+                # unread and the connection closed
+                user = gateway._authenticate(self.headers.get("Authorization", ""))
+                if user is None:
+                    self.close_connection = True
+                    self._send_error(401, "unknown client token")
+                    return
+                if self.path.rstrip("/") != "/v1/audio/transcriptions":
+                    self.close_connection = True
+                    self._send_error(404, "not found")
+                    return
+
+                try:
+                    body, _ = read_request_body(self, gateway.MAX_BODY_BYTES)
+                except RequestTooLarge as e:
+                    self.close_connection = True
+                    self._send_error(413, str(e))
+                    return
+                except ValueError:
+                    self.close_connection = True
+                    self._send_error(400, "malformed request body")
+                    return
+
+                fields, files = parse_multipart(body, self.headers.get("Content-Type"))
+                if "file" not in files or "model" not in fields:
+                    self._send_error(400, "model and file are required")
+                    return
+
+                retry_after = gateway.user_limits.allow(user)
+                if retry_after:
+                    with gateway._lock:
+                        gateway.counters["rate_limited"] += 1
+                    self._send_error(429, "user rate limit reached",
+                                     {"Retry-After": f"{retry_after:.1f}"})
+                    return
+
+                status, content_type, data = gateway.transcribe(user, fields, files)
+                self._send(status, content_type, data)
+
+            def _send_error(self, status, message, headers=None):
+                self._send(status, "application/json", json.dumps(
+                    {"error": {"message": message}}).encode(), headers)
+
+            def _send(self, status, content_type, data, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if self.close_connection:
+                    # Tell the client not to send another request on it
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,117 @@
+import re
+import secrets
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?')
+_DISPOSITION_PARAM = re.compile(rb'(name|filename)="([^"]*)"')
+_CONTENT_TYPE = re.compile(rb"content-type:\s*([^\r\n]+)", re.IGNORECASE)
+
+
+def parse_multipart(body, content_type):
+    """
+    Split a multipart/form-data body
+
+    Args:
+        body: Raw request body
+        content_type: Content-Type header carrying the boundary
+
+    Returns:
+        Tuple of (fields, files): fields maps a name to its text value and
+        files maps a name to (filename, content type, data)
+    """
+    match = _BOUNDARY.search(content_type or "")
+    if not match:
+        return {}, {}
+    delimiter = b"--" + match.group(1).encode()
+
+    fields = {}
+    files = {}
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, value = part.partition(b"\r\n\r\n")
+        if value.endswith(b"\r\n"):
+            value = value[:-2]
+
+        params = dict(_DISPOSITION_PARAM.findall(head))
+        name = params.get(b"name")
+        if name is None:
+            continue
+        if b"filename" in params:
+            part_type = _CONTENT_TYPE.search(head)
+            files[name.decode()] = (
+                params[b"filename"].decode(),
+                part_type.group(1).decode().strip() if part_type
+                else "application/octet-stream",
+                value
+            )
+        else:
+            fields[name.decode()] = value.decode()
+    return fields, files
+
+
+def build_multipart(fields, files):
+    """
+    Build a multipart/form-data body
+
+    Args:
+        fields: Name to text value
+        files: Name to (filename, content type, data)
+
+    Returns:
+        Tuple of (body, content type header)
+    """
+    boundary = "----tooLazyToType" + secrets.token_hex(12)
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+            f"\r\n\r\n{value}\r\n".encode())
+    for name, (filename, content_type, data) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+            f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode()
+            + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class RequestTooLarge(ValueError):
+    """A request body is larger than allowed"""
+
+
+def read_request_body(handler, max_size=None):
+    """
+    Read the body of a request with either a Content-Length or a chunked body
+
+    Args:
+        handler: A BaseHTTPRequestHandler
+        max_size: Optional limit of the body in bytes
+
+    Returns:
+        Tuple of (body, whether it was chunked)
+
+    Raises:
+        RequestTooLarge: When the body exceeds max_size, checked before it
+            is read into memory
+        ValueError: When the length or a chunk size is malformed
+    """
+    if "chunked" not in handler.headers.get("Transfer-Encoding", "").lower():
+        length = int(handler.headers.get("Content-Length", 0))
+        if max_size is not None and length > max_size:
+            raise RequestTooLarge(f"body of {length} bytes exceeds {max_size}")
+        return handler.rfile.read(length), False
+
+    parts = []
+    total = 0
+    while True:
+        size = int(handler.rfile.readline().split(b";")[0].strip(), 16)
+        total += size
+        if max_size is not None and total > max_size:
+            raise RequestTooLarge(f"chunked body exceeds {max_size} bytes")
+        if size == 0:
+            # The trailer section ends with an empty line
+            while handler.rfile.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(parts), True
+        parts.append(handler.rfile.read(size))
+        handler.rfile.readline()
@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "background": 1, "batch": 2}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """
+    Parse a rate limit reset duration such as '1s', '6m0s' or '20ms'
+
+    Returns:
+        Seconds as a float, or None if the value can't be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_SECONDS[unit] for number, unit in parts)
+
+
+class RateLimiter:
+    """Token bucket shared by all API traffic, with priority lanes"""
+
+    # How often an async waiter behind others re-checks its turn
+    ASYNC_POLL_INTERVAL = 0.05
+
+    def __init__(self, requests_per_minute=50):
+        """
+        Initialize the rate limiter
+
+        Args:
+            requests_per_minute: Starting request rate, replaced by the limit
+                reported in the API response headers once one is seen
+        """
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._set_rate(requests_per_minute)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    def acquire(self, priority="interactive"):
+        """
+        Block until a request may be sent
+
+        Waiting callers are served by priority lane first, then in arrival
+        order, so interactive dictation never queues behind batch jobs.
+
+        Args:
+            priority: 'interactive', 'background' or 'batch'
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        entry = (PRIORITIES.get(priority, 1), next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    taken, timeout = self._take_turn(entry)
+                    if taken:
+                        return time.monotonic() - start
+                    self._condition.wait(timeout)
+            except BaseException:
+                self._withdraw(entry)
+                raise
+
+    async def acquire_async(self, priority="interactive"):
+        """
+        Wait until a request may be sent, without blocking the event loop
+
+        Same lanes and order as acquire(). A caller that is not first in
+        line re-checks its turn every ASYNC_POLL_INTERVAL.
+
+        Args:
+            priority: 'interactive', 'background' or 'batch'
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        entry = (PRIORITIES.get(priority, 1), next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                with self._condition:
+                    taken, timeout = self._take_turn(entry)
+                if taken:
+                    return time.monotonic() - start
+                await asyncio.sleep(
+                    self.ASYNC_POLL_INTERVAL if timeout is None else timeout)
+        except BaseException:
+            with self._condition:
+                self._withdraw(entry)
+            raise
+
+    def _take_turn(self, entry):
+        """
+        Take a token if it is this waiter's turn (caller holds the lock)
+
+        Returns:
+            Tuple of (taken, seconds to wait or None until notified)
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        if self._waiters[0] is not entry:
+            return False, None
+        if now >= self._paused_until and self._tokens >= 1:
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            # Let the next waiter check its turn
+            self._condition.notify_all()
+            return True, 0.0
+        return False, max(
+            self._paused_until - now,
+            (1 - self._tokens) / self._rate,
+            0.001
+        )
+
+    def _withdraw(self, entry):
+        """Remove a waiter that gave up (caller holds the lock)"""
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers):
+        """
+        Adjust to the rate limit headers of an API response
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+        """
+        limit = headers.get("x-ratelimit-limit-requests")
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+
+        with self._condition:
+            if limit:
+                try:
+                    self._set_rate(int(limit))
+                except ValueError:
+                    pass
+            if remaining is not None and reset:
+                try:
+                    if int(remaining) <= 0:
+                        self._pause(reset)
+                except ValueError:
+                    pass
+
+    def on_rate_limited(self, headers):
+        """
+        Pause all lanes after a 429 response
+
+        Args:
+            headers: Response headers of the 429 response
+
+        Returns:
+            Seconds until requests resume
+        """
+        retry_after = parse_duration(headers.get("retry-after")) \
+            or parse_duration(headers.get("x-ratelimit-reset-requests")) \
+            or 1.0
+
+        with self._condition:
+            self._pause(retry_after)
+            self._tokens = 0.0
+        return retry_after
+
+    def _pause(self, seconds):
+        """Hold all requests for the given time (caller holds the lock)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._condition.notify_all()
+
+    def _set_rate(self, requests_per_minute):
+        """Set the refill rate and burst size (caller holds the lock)"""
+        requests_per_minute = max(1, requests_per_minute)
+        self._rate = requests_per_minute / 60
+        self._capacity = max(1.0, requests_per_minute / 10)
+
+    def _refill(self, now):
+        """Add the tokens earned since the last refill"""
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+# Shared by every service in the process, since they all use one API key
+SHARED_RATE_LIMITER = RateLimiter()
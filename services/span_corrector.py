@@ -0,0 +1,192 @@
+import difflib
+import os
+import re
+import tempfile
+
+from utils.audio_utils import read_wav, write_wav
+
+_WORD = re.compile(r"\S+")
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+def _normalize(word):
+    return _NORMALIZE.sub("", word.lower())
+
+
+class SpanCorrector:
+    """Re-transcribes the audio behind a selected part of a stored dictation"""
+
+    # Audio kept around the span, wider when its position is only estimated
+    TIMESTAMP_PADDING = 0.25
+    ESTIMATE_PADDING = 1.0
+
+    # Words of the preceding text sent as a prompt for continuity
+    PROMPT_WORDS = 30
+
+    # Neighbouring words checked when trimming the padding's extra words
+    CONTEXT_WORDS = 4
+
+    def __init__(self, transcription_service, store, text_processor=None):
+        """
+        Initialize the corrector
+
+        Args:
+            transcription_service: TranscriptionService used for the slice
+            store: DictationStore holding the audio and timestamps
+            text_processor: Optional TextProcessor applied to the new text
+        """
+        self.transcription_service = transcription_service
+        self.store = store
+        self.text_processor = text_processor
+
+    def correct(self, text, start, end, model=None):
+        """
+        Re-transcribe the characters text[start:end] from the stored audio
+
+        Args:
+            text: Transcript of a stored dictation
+            start: Offset of the first selected character
+            end: Offset after the last selected character
+            model: Speech-to-text model, defaults to the dictation's one
+
+        Returns:
+            The transcript with the span replaced
+
+        Raises:
+            ValueError: When the dictation has no stored audio or the
+                selection holds no words
+        """
+        entry = self.store.get(text)
+        if entry is None:
+            raise ValueError("The audio of this dictation is no longer stored")
+
+        # Whole words only, a half-selected word is re-transcribed entirely
+        tokens = [(match.start(), match.end()) for match in _WORD.finditer(text)]
+        selected = [index for index, (token_start, token_end) in enumerate(tokens)
+                    if token_start < end and token_end > start]
+        if not selected:
+            raise ValueError("Select the words to re-transcribe")
+        first, last = selected[0], selected[-1]
+        words = [text[token_start:token_end] for token_start, token_end in tokens]
+
+        span_start, span_end, padding = self._locate(
+            words, first, last, entry["words"], entry["duration"])
+        slice_start = max(0.0, span_start - padding)
+        slice_end = min(entry["duration"], span_end + padding)
+
+        model = model or entry.get("model") or "whisper-1"
+        prompt = " ".join(words[max(0, first - self.PROMPT_WORDS):first])
+        result = self._transcribe_slice(
+            entry["audio"], slice_start, slice_end, model, prompt)
+
+        new_words = _WORD.findall(result["text"])
+        new_words = self._trim_context(
+            new_words,
+            words[max(0, first - self.CONTEXT_WORDS):first],
+            words[last + 1:last + 1 + self.CONTEXT_WORDS])
+        replacement = " ".join(new_words)
+        if self.text_processor:
+            replacement = self.text_processor.process(replacement)
+
+        corrected = (text[:tokens[first][0]] + replacement
+                     + text[tokens[last][1]:])
+        self.store.replace(text, corrected, self._splice_timestamps(
+            entry["words"], result["words"], new_words, span_start, span_end,
+            slice_start))
+        return corrected
+
+    def _locate(self, words, first, last, timestamps, duration):
+        """
+        Find the audio time range of words[first:last + 1]
+
+        Returns:
+            Tuple of (start, end, padding) in seconds
+        """
+        if timestamps:
+            # The history text may differ from the raw transcript (cleanup,
+            # replacements), so align the two word sequences
+            matcher = difflib.SequenceMatcher(
+                None,
+                [_normalize(word) for word in words],
+                [_normalize(word) for word, _, _ in timestamps],
+                autojunk=False)
+            times = []
+            for block in matcher.get_matching_blocks():
+                for offset in range(block.size):
+                    if first <= block.a + offset <= last:
+                        _, word_start, word_end = timestamps[block.b + offset]
+                        times.append((word_start, word_end))
+            if times:
+                return (min(start for start, _ in times),
+                        max(end for _, end in times),
+                        self.TIMESTAMP_PADDING)
+
+        # No usable timestamps: assume speech is spread evenly over the text
+        total = sum(len(word) + 1 for word in words) or 1
+        before = sum(len(word) + 1 for word in words[:first])
+        span = sum(len(word) + 1 for word in words[first:last + 1])
+        return (duration * before / total,
+                duration * (before + span) / total,
+                self.ESTIMATE_PADDING)
+
+    def _transcribe_slice(self, audio_file, start, end, model, prompt):
+        """Cut [start, end) out of the stored audio and transcribe it"""
+        samples, rate = read_wav(audio_file)
+        audio_slice = samples[int(start * rate):int(end * rate)]
+
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            write_wav(path, audio_slice, rate)
+            print(f"Re-transcribing {end - start:.2f} seconds of audio")
+            return self.transcription_service.transcribe_detailed(
+                path, model, prompt=prompt)
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _trim_context(new_words, before, after):
+        """Drop words the padding picked up from around the span"""
+        normalized = [_normalize(word) for word in new_words]
+
+        # Longest tail of the preceding text the result starts with
+        for size in range(min(len(before), len(new_words) - 1), 0, -1):
+            if normalized[:size] == [_normalize(word) for word in before[-size:]]:
+                new_words, normalized = new_words[size:], normalized[size:]
+                break
+
+        # Longest head of the following text the result ends with
+        for size in range(min(len(after), len(new_words) - 1), 0, -1):
+            if normalized[-size:] == [_normalize(word) for word in after[:size]]:
+                new_words = new_words[:-size]
+                break
+        return new_words
+
+    @staticmethod
+    def _splice_timestamps(old, new, kept_words, span_start, span_end, offset):
+        """
+        Replace the span's timestamps with those of the kept slice words
+
+        Returns:
+            The updated list of (word, start, end), or None to leave the
+            stored timestamps unchanged
+        """
+        if not old or not new:
+            return None
+
+        matcher = difflib.SequenceMatcher(
+            None,
+            [_normalize(word) for word in kept_words],
+            [_normalize(word) for word, _, _ in new],
+            autojunk=False)
+        matched = [block.b + offset_in_block
+                   for block in matcher.get_matching_blocks()
+                   for offset_in_block in range(block.size)]
+        if not matched:
+            return None
+
+        inside = [(word, start + offset, end + offset)
+                  for word, start, end in new[min(matched):max(matched) + 1]]
+        kept_before = [word for word in old if word[2] <= span_start]
+        kept_after = [word for word in old if word[1] >= span_end]
+        return kept_before + inside + kept_after
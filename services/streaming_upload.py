@@ -0,0 +1,212 @@
+import http.client
+import json
+import queue
+import secrets
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class StreamingUploadError(Exception):
+    """The streamed request failed, the caller should upload the file instead"""
+
+    def __init__(self, message, status=None, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def wav_stream_header(rate, channels, sample_width):
+    """WAV header for a stream of unknown length (sizes set to the maximum)"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, rate,
+        rate * channels * sample_width, channels * sample_width,
+        sample_width * 8,
+        b"data", 0xFFFFFFFF
+    )
+
+
+class StreamingUpload:
+    """A transcription request whose multipart body is sent while recording"""
+
+    TIMEOUT = 60
+
+    def __init__(self, base_url, api_key, model, rate, channels, sample_width,
+                 before_connect=None, extra_fields=()):
+        """
+        Initialize the upload, nothing is sent before start()
+
+        Args:
+            base_url: API base URL, e.g. 'https://api.openai.com/v1'
+            api_key: API key sent as a bearer token
+            model: Speech-to-text model
+            rate: Sample rate of the PCM chunks
+            channels: Number of channels
+            sample_width: Bytes per sample
+            before_connect: Optional function called on the sender thread
+                before connecting, e.g. to wait for the rate limiter
+            extra_fields: Other form fields as (name, value) pairs, list
+                values are sent as 'name[]' fields
+        """
+        url = urlsplit(base_url.rstrip("/") + "/audio/transcriptions")
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.path = url.path
+        self.api_key = api_key
+        self.model = model
+        self.wav_header = wav_stream_header(rate, channels, sample_width)
+        self.before_connect = before_connect
+        self.extra_fields = extra_fields
+
+        self.boundary = "----tooLazyToType" + secrets.token_hex(12)
+        self.bytes_sent = 0
+        self.status = None
+        self.headers = {}
+        self.body = b""
+        self.error = None
+        # Time between finish() and the response
+        self.tail_time = 0.0
+
+        self._queue = queue.SimpleQueue()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Open the request in the background"""
+        self._thread.start()
+
+    def feed(self, data):
+        """Queue captured PCM data, safe to call from the capture thread"""
+        if not self._done.is_set():
+            self._queue.put(data)
+
+    def abort(self):
+        """Give up on the request"""
+        self.error = self.error or StreamingUploadError("aborted")
+        self._queue.put(None)
+
+    def finish(self, timeout=TIMEOUT):
+        """
+        Send the closing boundary and wait for the transcription
+
+        Returns:
+            The parsed JSON response, with at least 'text'
+
+        Raises:
+            StreamingUploadError: When the endpoint failed or refused the
+                streamed body
+        """
+        finish_start = time.perf_counter()
+        self._queue.put(None)
+        if not self._done.wait(timeout):
+            raise StreamingUploadError("timed out")
+        self.tail_time = time.perf_counter() - finish_start
+
+        if self.error:
+            raise StreamingUploadError(str(self.error))
+        if self.status != 200:
+            raise StreamingUploadError(
+                f"HTTP {self.status}: {self.body[:200]!r}",
+                self.status, self.headers)
+        try:
+            response = json.loads(self.body)
+            response["text"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise StreamingUploadError(f"unexpected response: {e}")
+        return response
+
+    def _run(self):
+        """Sender loop: headers, then one HTTP chunk per batch of audio"""
+        connection = None
+        try:
+            if self.before_connect:
+                self.before_connect()
+
+            connection_class = (http.client.HTTPSConnection if self.scheme == "https"
+                                else http.client.HTTPConnection)
+            connection = connection_class(self.host, self.port, timeout=self.TIMEOUT)
+            connection.putrequest("POST", self.path)
+            connection.putheader("Authorization", f"Bearer {self.api_key}")
+            connection.putheader(
+                "Content-Type", f"multipart/form-data; boundary={self.boundary}")
+            connection.putheader("Transfer-Encoding", "chunked")
+            connection.endheaders()
+
+            fields = [("model", self.model)]
+            for name, value in self.extra_fields:
+                if isinstance(value, (list, tuple)):
+                    fields.extend((f"{name}[]", item) for item in value)
+                else:
+                    fields.append((name, value))
+
+            self._send_chunk(connection, "".join(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+                for name, value in fields
+            ).encode() + (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="file"; filename="recording.wav"\r\n'
+                f"Content-Type: audio/wav\r\n\r\n"
+            ).encode() + self.wav_header)
+
+            finished = False
+            while not finished:
+                parts = [self._queue.get()]
+                # Send whatever else was captured meanwhile in the same chunk
+                while True:
+                    try:
+                        parts.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in parts:
+                    finished = True
+                    parts = parts[:parts.index(None)]
+                if self.error:
+                    return
+                if parts:
+                    self._send_chunk(connection, b"".join(parts))
+
+            self._send_chunk(connection, f"\r\n--{self.boundary}--\r\n".encode())
+            connection.send(b"0\r\n\r\n")
+
+            response = connection.getresponse()
+            self.status = response.status
+            self.headers = response.headers
+            self.body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            # An endpoint refusing the streamed body may answer and close
+            # the connection before reading it, keep its answer if it did
+            if connection is None or not self._read_early_response(connection):
+                self.error = e
+        finally:
+            if connection:
+                connection.close()
+            self._done.set()
+
+    def _read_early_response(self, connection):
+        """
+        Read a response sent before the request body was complete
+
+        Returns:
+            False if there is none
+        """
+        if connection.sock is None:
+            # Never connected
+            return False
+        try:
+            response = connection.getresponse()
+            self.body = response.read()
+        except (OSError, http.client.HTTPException):
+            return False
+        self.status = response.status
+        self.headers = response.headers
+        return True
+
+    def _send_chunk(self, connection, data):
+        connection.send(b"%x\r\n" % len(data) + data + b"\r\n")
+        self.bytes_sent += len(data)
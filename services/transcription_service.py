@@ -1,29 +1,291 @@
+import asyncio
+import getpass
+import os
 import time
-from openai import OpenAI
+import wave
+import openai
+
+from services.async_core import SHARED_ASYNC_CORE, TRANSIENT_ERRORS
+from services.rate_limiter import SHARED_RATE_LIMITER
+from services.streaming_upload import StreamingUpload, StreamingUploadError
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
 
 class TranscriptionService:
     """Handles audio transcription using OpenAI API"""
-    
-    def __init__(self, api_key):
+
+    # Attempts for one transcription when the API answers 429 or fails
+    # transiently, the latter waiting RETRY_BACKOFF seconds, then doubling
+    MAX_ATTEMPTS = 3
+    RETRY_BACKOFF = 0.5
+
+    # Models that return word timestamps (verbose_json)
+    TIMESTAMP_MODELS = ("whisper-1",)
+
+    def __init__(self, api_key, diagnostics=None, rate_limiter=None, usage_ledger=None,
+                 base_url=None, async_core=None):
         self.api_key = api_key
-        
+        self.diagnostics = diagnostics
+        self.rate_limiter = rate_limiter or SHARED_RATE_LIMITER
+        # Event loop the requests run on, shared with the other services
+        self.async_core = async_core or SHARED_ASYNC_CORE
+        self.usage_ledger = usage_ledger
+        self.base_url = base_url
+
+        # Shared gateway used instead of OpenAI when set
+        self.gateway_url = None
+        self.gateway_token = None
+
+        # Cleared when the endpoint refuses a streamed body
+        self.streaming_supported = True
+
     def set_api_key(self, api_key):
         """Update the API key"""
         self.api_key = api_key
-        
-    def transcribe(self, audio_file, model="gpt-4o-mini-transcribe"):
-        """Transcribe audio file using OpenAI API"""
-        if not self.api_key:
+
+    def set_base_url(self, base_url):
+        """Update the API base URL, None for the default endpoint"""
+        if base_url != self.base_url:
+            self.base_url = base_url
+            self.streaming_supported = True
+
+    def set_gateway(self, gateway_url, token=None):
+        """
+        Send transcriptions through a shared gateway instead of OpenAI
+
+        Args:
+            gateway_url: Gateway base URL, e.g. 'http://gateway:47950/v1',
+                None to talk to OpenAI directly
+            token: Client token, defaults to the user name for gateways that
+                accept any token
+        """
+        if gateway_url != self.gateway_url:
+            self.streaming_supported = True
+        self.gateway_url = gateway_url or None
+        self.gateway_token = (token or getpass.getuser()) if gateway_url else None
+
+    def _get_endpoint(self):
+        """Get the (api key, base url) requests are sent with"""
+        if self.gateway_url:
+            return self.gateway_token, self.gateway_url
+        return self.api_key, self.base_url
+
+    def start_streaming(self, model, rate, channels, sample_width, priority="interactive",
+                        timestamps=False):
+        """
+        Open a transcription request to stream audio into while recording
+
+        Args:
+            model: Speech-to-text model
+            rate: Sample rate of the audio
+            channels: Number of channels
+            sample_width: Bytes per sample
+            priority: Rate limiter lane
+            timestamps: Request word timestamps when the model supports them
+
+        Returns:
+            A started StreamingUpload to feed PCM chunks to, or None when
+            streaming is not possible and the file should be uploaded instead
+        """
+        api_key, base_url = self._get_endpoint()
+        if not api_key or not self.streaming_supported:
+            return None
+
+        upload = StreamingUpload(
+            base_url or os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL),
+            api_key, model, rate, channels, sample_width,
+            before_connect=lambda: self.rate_limiter.acquire(priority),
+            extra_fields=self._get_request_options(model, timestamps, None)
+        )
+        upload.start()
+        return upload
+
+    def transcribe(self, audio_file, model="gpt-4o-mini-transcribe", priority="interactive",
+                   streaming_upload=None):
+        """
+        Transcribe audio file using OpenAI API
+
+        Args:
+            audio_file: Path of the audio file
+            model: Speech-to-text model
+            priority: Rate limiter lane, 'interactive', 'background' or 'batch'
+            streaming_upload: Optional StreamingUpload of the same audio, the
+                file is only uploaded if it fails
+        """
+        return self.transcribe_detailed(
+            audio_file, model, priority, streaming_upload, timestamps=False)["text"]
+
+    def transcribe_detailed(self, audio_file, model="gpt-4o-mini-transcribe",
+                            priority="interactive", streaming_upload=None,
+                            timestamps=True, prompt=None):
+        """
+        Transcribe audio file, with word timestamps when the model has them
+
+        Args:
+            audio_file: Path of the audio file
+            model: Speech-to-text model
+            priority: Rate limiter lane, 'interactive', 'background' or 'batch'
+            streaming_upload: Optional StreamingUpload of the same audio
+            timestamps: Request word timestamps (see TIMESTAMP_MODELS)
+            prompt: Optional text preceding the audio, helps continuity
+
+        Returns:
+            Dictionary with 'text' and 'words', a list of (word, start, end)
+            in seconds or None when the model gives no timestamps
+        """
+        if streaming_upload is not None:
+            result = self._finish_streaming(streaming_upload, audio_file, model)
+            if result is not None:
+                return result
+
+        return self.submit_transcription(
+            audio_file, model, priority, timestamps, prompt).result()
+
+    def submit_transcription(self, audio_file, model="gpt-4o-mini-transcribe",
+                             priority="interactive", timestamps=True, prompt=None):
+        """
+        Start transcribing an audio file on the shared event loop
+
+        Safe to call from any thread. The file is read here, so it may be
+        deleted as soon as this returns.
+
+        Args:
+            audio_file: Path of the audio file
+            model: Speech-to-text model
+            priority: Rate limiter lane, 'interactive', 'background' or 'batch'
+            timestamps: Request word timestamps (see TIMESTAMP_MODELS)
+            prompt: Optional text preceding the audio, helps continuity
+
+        Returns:
+            A concurrent.futures.Future resolving to the dictionary returned
+            by transcribe_detailed()
+        """
+        api_key, base_url = self._get_endpoint()
+        if not api_key:
             raise ValueError("API key is not set")
-            
-        client = OpenAI(api_key=self.api_key)
-        
-        start_time = time.time()
+
         with open(audio_file, 'rb') as file:
-            response = client.audio.transcriptions.create(
-                model=model,
-                file=file
-            )
-        
+            data = file.read()
+        duration = self._get_audio_duration(audio_file)
+
+        return self.async_core.submit(self._transcribe_async(
+            api_key, base_url, (os.path.basename(audio_file), data), duration,
+            model, priority, dict(self._get_request_options(model, timestamps, prompt))
+        ))
+
+    async def _transcribe_async(self, api_key, base_url, file, duration, model,
+                                priority, options):
+        """Send one transcription request, retrying failures (runs on the loop)"""
+        client = self.async_core.get_client(api_key, base_url)
+
+        start_time = time.time()
+        queue_wait = 0.0
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            # 429s wait in the shared rate limiter, which pauses every caller
+            # instead of each one retrying on its own
+            queue_wait += await self.rate_limiter.acquire_async(priority)
+
+            api_start = time.perf_counter()
+            try:
+                raw_response = await client.audio.transcriptions.with_raw_response.create(
+                    model=model,
+                    file=file,
+                    **options
+                )
+            except openai.RateLimitError as e:
+                retry_after = self.rate_limiter.on_rate_limited(e.response.headers)
+                print(f"Rate limited, retrying in {retry_after:.1f} seconds")
+                if self.diagnostics:
+                    self.diagnostics.record_failure("transcription_api", "429 rate limited")
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                continue
+            except TRANSIENT_ERRORS as e:
+                if self.diagnostics:
+                    self.diagnostics.record_failure("transcription_api", e)
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                backoff = self.RETRY_BACKOFF * 2 ** (attempt - 1)
+                print(f"Transcription request failed ({e}), retrying in {backoff:.1f} seconds")
+                await asyncio.sleep(backoff)
+                continue
+
+            api_time = time.perf_counter() - api_start
+            self.rate_limiter.update_from_headers(raw_response.headers)
+            response = raw_response.parse()
+            break
+
+        if self.diagnostics:
+            self.diagnostics.record_timing("transcription_queue_wait", queue_wait)
+            self.diagnostics.record_timing("transcription_api", api_time)
+
+        if self.usage_ledger:
+            self.usage_ledger.record(model, duration, len(file[1]), api_time)
+
         print(f"Transcription completed in {time.time() - start_time:.2f} seconds")
-        return response.text
+        words = getattr(response, "words", None)
+        return {
+            "text": response.text,
+            "words": [(word.word, word.start, word.end) for word in words]
+            if words else None
+        }
+
+    def _get_request_options(self, model, timestamps, prompt):
+        """Get the optional request fields as (name, value) pairs"""
+        options = []
+        if timestamps and model in self.TIMESTAMP_MODELS:
+            options.append(("response_format", "verbose_json"))
+            options.append(("timestamp_granularities", ["word"]))
+        if prompt:
+            options.append(("prompt", prompt))
+        return options
+
+    def _finish_streaming(self, upload, audio_file, model):
+        """
+        Complete a streamed request
+
+        Returns:
+            Dictionary with 'text' and 'words', or None if the file has to
+            be uploaded instead
+        """
+        try:
+            response = upload.finish()
+        except StreamingUploadError as e:
+            if e.status == 429:
+                self.rate_limiter.on_rate_limited(e.headers)
+            elif e.status in (400, 411, 413, 415, 501, 505):
+                # The endpoint (or a proxy) does not take chunked bodies
+                self.streaming_supported = False
+            print(f"Streamed upload failed, uploading the file: {e}")
+            if self.diagnostics:
+                self.diagnostics.record_failure("transcription_stream", e)
+            return None
+
+        self.rate_limiter.update_from_headers(upload.headers)
+        if self.diagnostics:
+            self.diagnostics.record_timing("transcription_api", upload.tail_time)
+
+        if self.usage_ledger:
+            self.usage_ledger.record(
+                model,
+                self._get_audio_duration(audio_file),
+                upload.bytes_sent,
+                upload.tail_time
+            )
+
+        print(f"Streamed transcription completed {upload.tail_time:.2f} seconds after release")
+        words = response.get("words")
+        return {
+            "text": response["text"],
+            "words": [(word["word"], word["start"], word["end"]) for word in words]
+            if words else None
+        }
+
+    @staticmethod
+    def _get_audio_duration(audio_file):
+        """Get the duration of a WAV file from its header, 0 for other formats"""
+        try:
+            with wave.open(audio_file, 'rb') as wf:
+                return wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError, OSError):
+            return 0.0
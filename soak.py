@@ -0,0 +1,501 @@
+"""Soak test: replay dictations through MainApplication and watch for leaks
+
+PyAudio, keyboard, pynput, pyperclip and OpenAI are replaced by in-process
+stand-ins, so the whole app (Tk included) runs without a microphone, a
+keyboard hook or network access. Each dictation presses the hotkey, streams
+a fixture as microphone input, releases the hotkey and waits for the paste.
+RSS, Tk widget count, thread count and release-to-paste latency are sampled
+along the way, and the run fails if any of them grows past its threshold.
+
+Fixtures are a directory with a fixtures.json list such as
+[{"audio": "hello.wav", "hold_ms": 1800, "transcript": "Hello there."}].
+Without one, synthetic clips are used. Needs a display for Tk (use xvfb-run
+on a headless machine).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from utils.audio_utils import read_wav, resample, to_int16
+
+RATE = 44100
+HOTKEY = "ctrl+shift"
+SCAN_CODES = {"ctrl": (29, 97), "shift": (42, 54), "alt": (56, 100)}
+
+
+class Fixture:
+    """One dictation to replay"""
+
+    def __init__(self, name, samples, hold_ms, transcript):
+        """
+        Args:
+            name: Name shown in failures
+            samples: int16 mono samples at RATE
+            hold_ms: How long the hotkey is held
+            transcript: Text the OpenAI stand-in answers with
+        """
+        self.name = name
+        self.samples = samples
+        self.hold_ms = hold_ms
+        self.transcript = transcript
+
+
+def load_fixtures(directory):
+    """Load the fixtures listed in directory/fixtures.json"""
+    with open(os.path.join(directory, "fixtures.json"), "r") as file:
+        entries = json.load(file)
+
+    fixtures = []
+    for entry in entries:
+        samples, rate = read_wav(os.path.join(directory, entry["audio"]))
+        samples = to_int16(resample(samples, rate, RATE))
+        hold_ms = entry.get("hold_ms", len(samples) / RATE * 1000 + 200)
+        fixtures.append(Fixture(entry["audio"], samples, hold_ms,
+                                entry.get("transcript", "Soak test.")))
+    return fixtures
+
+
+def synthetic_fixtures():
+    """Noise bursts of a few lengths, standing in for speech"""
+    rng = np.random.default_rng(0)
+    fixtures = []
+    for seconds, text in ((0.8, "Short note."),
+                          (2.0, "A sentence of average length."),
+                          (6.0, "A longer dictation " * 8)):
+        envelope = np.abs(np.sin(np.linspace(0, seconds * 6, int(seconds * RATE))))
+        samples = (rng.normal(0, 3000, envelope.size) * envelope).astype(np.int16)
+        fixtures.append(Fixture(f"synthetic-{seconds}s", samples,
+                                seconds * 1000 + 200, text.strip()))
+    return fixtures
+
+
+class SoakState:
+    """State shared between the driver and the stand-in modules"""
+
+    def __init__(self, speed, api_latency):
+        self.speed = speed
+        self.api_latency = api_latency
+        self.fixture = None
+        self.hooks = []
+        self.clipboard = ""
+        self.pasted = threading.Event()
+        self.paste_time = 0.0
+        self.pasted_text = None
+
+    def on_paste(self, text):
+        self.pasted_text = text
+        self.paste_time = time.perf_counter()
+        self.pasted.set()
+
+
+def install_stand_ins(state):
+    """Register stand-in modules before any app module is imported"""
+    # PyAudio: a stream that plays the current fixture in real time / speed
+    pyaudio = types.ModuleType("pyaudio")
+    pyaudio.paInt16 = 8
+    pyaudio.get_sample_size = lambda sample_format: 2
+
+    class Stream:
+        def __init__(self, rate):
+            self.rate = rate
+            self.position = 0
+            self.next_time = time.perf_counter()
+            self.samples = state.fixture.samples
+
+        def read(self, chunk, exception_on_overflow=True):
+            self.next_time += chunk / self.rate / state.speed
+            delay = self.next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            data = self.samples[self.position:self.position + chunk]
+            self.position += chunk
+            if data.size < chunk:
+                data = np.concatenate([data, np.zeros(chunk - data.size, np.int16)])
+            return data.tobytes()
+
+        def stop_stream(self):
+            pass
+
+        def close(self):
+            pass
+
+    device = {"index": 0, "name": "Stand-in microphone", "hostApi": 0,
+              "maxInputChannels": 1, "defaultSampleRate": float(RATE)}
+
+    class PyAudio:
+        def open(self, rate=RATE, **kwargs):
+            return Stream(rate)
+
+        def get_default_host_api_info(self):
+            return {"index": 0}
+
+        def get_device_count(self):
+            return 1
+
+        def get_device_info_by_index(self, index):
+            return dict(device)
+
+        def get_default_input_device_info(self):
+            return dict(device)
+
+        def terminate(self):
+            pass
+
+    pyaudio.PyAudio = PyAudio
+
+    # keyboard: hooks are called by the driver with fake key events
+    keyboard = types.ModuleType("keyboard")
+    keyboard.KEY_DOWN = "down"
+    keyboard.KEY_UP = "up"
+    keyboard.parse_hotkey = lambda hotkey: (tuple(
+        SCAN_CODES.get(key, (ord(key[0]),)) for key in hotkey.split("+")),)
+    keyboard.hook = lambda callback: state.hooks.append(callback) or callback
+
+    # pyperclip: an in-memory clipboard
+    pyperclip = types.ModuleType("pyperclip")
+    pyperclip.PyperclipException = type("PyperclipException", (Exception,), {})
+    pyperclip.copy = lambda text: setattr(state, "clipboard", text)
+    pyperclip.paste = lambda: state.clipboard
+
+    # pynput: typing or ctrl+v completes the dictation
+    pynput = types.ModuleType("pynput")
+    pynput_keyboard = types.ModuleType("pynput.keyboard")
+    pynput_keyboard.Key = types.SimpleNamespace(ctrl="ctrl")
+
+    class Controller:
+        def __init__(self):
+            self.ctrl = False
+
+        def type(self, text):
+            state.on_paste(text)
+
+        def press(self, key):
+            if key == "v" and self.ctrl:
+                state.on_paste(state.clipboard)
+
+        def release(self, key):
+            pass
+
+        @contextlib.contextmanager
+        def pressed(self, *keys):
+            self.ctrl = True
+            try:
+                yield
+            finally:
+                self.ctrl = False
+
+    pynput_keyboard.Controller = Controller
+    pynput.keyboard = pynput_keyboard
+
+    # openai: answers with the fixture transcript after api_latency
+    openai = types.ModuleType("openai")
+
+    class RateLimitError(Exception):
+        def __init__(self, message="", response=None):
+            super().__init__(message)
+            self.response = response
+
+    class APIConnectionError(Exception):
+        pass
+
+    class APITimeoutError(APIConnectionError):
+        pass
+
+    class InternalServerError(Exception):
+        pass
+
+    class RawResponse:
+        headers = {"x-ratelimit-limit-requests": "100000",
+                   "x-ratelimit-remaining-requests": "100000"}
+
+        def __init__(self, result):
+            self.result = result
+
+        def parse(self):
+            return self.result
+
+    async def create_transcription(model=None, file=None, **kwargs):
+        await asyncio.sleep(state.api_latency)
+        return RawResponse(types.SimpleNamespace(text=state.fixture.transcript))
+
+    async def create_completion(messages=None, **kwargs):
+        await asyncio.sleep(state.api_latency)
+        delta = types.SimpleNamespace(content=messages[-1]["content"])
+
+        async def stream():
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+        return RawResponse(stream())
+
+    class AsyncOpenAI:
+        def __init__(self, **kwargs):
+            self.audio = types.SimpleNamespace(transcriptions=types.SimpleNamespace(
+                with_raw_response=types.SimpleNamespace(create=create_transcription)))
+            self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(
+                with_raw_response=types.SimpleNamespace(create=create_completion)))
+
+    openai.AsyncOpenAI = AsyncOpenAI
+    openai.RateLimitError = RateLimitError
+    openai.APIConnectionError = APIConnectionError
+    openai.APITimeoutError = APITimeoutError
+    openai.InternalServerError = InternalServerError
+
+    # httpx: the shared connection pool, unused by the stand-in clients
+    httpx = types.ModuleType("httpx")
+
+    class AsyncClient:
+        def __init__(self, **kwargs):
+            pass
+
+        async def aclose(self):
+            pass
+
+    httpx.AsyncClient = AsyncClient
+    httpx.Limits = lambda **kwargs: kwargs
+    httpx.Timeout = lambda timeout, **kwargs: dict(kwargs, timeout=timeout)
+
+    sys.modules.update({
+        "pyaudio": pyaudio,
+        "keyboard": keyboard,
+        "pyperclip": pyperclip,
+        "pynput": pynput,
+        "pynput.keyboard": pynput_keyboard,
+        "openai": openai,
+        "httpx": httpx
+    })
+
+
+def rss_bytes():
+    """Resident set size of this process, None if it can't be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+                process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def count_widgets(widget):
+    """Count a Tk widget and all of its descendants"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class SoakRunner:
+    """Drives dictations through the app from a background thread"""
+
+    def __init__(self, app, state, fixtures, args):
+        self.app = app
+        self.state = state
+        self.fixtures = fixtures
+        self.args = args
+        self.latencies = []
+        self.samples = []
+        self.failures = []
+
+    def start(self):
+        """Start driving once the Tk main loop runs"""
+        self.app.root.after(500, lambda: threading.Thread(
+            target=self._run, name="soak-driver", daemon=True).start())
+
+    def _run(self):
+        try:
+            for iteration in range(self.args.iterations):
+                fixture = self.fixtures[iteration % len(self.fixtures)]
+                latency = self._dictate(fixture)
+                if latency is None:
+                    self.failures.append(
+                        f"dictation {iteration} ({fixture.name}) was never pasted")
+                    break
+                self.latencies.append(latency)
+
+                if (iteration + 1) % self.args.sample_every == 0:
+                    self._sample(iteration + 1)
+        except Exception as e:
+            self.failures.append(f"driver error: {e!r}")
+        finally:
+            self.app.root.after(0, self.app._on_close)
+
+    def _dictate(self, fixture):
+        """Replay one dictation, returning the release-to-paste latency"""
+        self.state.fixture = fixture
+        self.state.pasted.clear()
+
+        self._send_keys("down")
+        time.sleep(fixture.hold_ms / 1000 / self.state.speed)
+        released = time.perf_counter()
+        self._send_keys("up")
+
+        if not self.state.pasted.wait(self.args.timeout):
+            return None
+        latency = self.state.paste_time - released
+
+        # Let the transcription thread finish before the next press
+        deadline = time.monotonic() + self.args.timeout
+        while self.app.transcribing and time.monotonic() < deadline:
+            time.sleep(0.005)
+        time.sleep(self.args.gap_ms / 1000)
+        return latency
+
+    def _send_keys(self, event_type):
+        keys = HOTKEY.split("+")
+        if event_type == "up":
+            keys.reverse()
+        for key in keys:
+            event = types.SimpleNamespace(
+                scan_code=SCAN_CODES[key][0], event_type=event_type)
+            for hook in self.state.hooks:
+                hook(event)
+
+    def _sample(self, iteration):
+        """Record resource usage, counting widgets on the Tk thread"""
+        result = {}
+        done = threading.Event()
+
+        def count():
+            result["widgets"] = count_widgets(self.app.root)
+            done.set()
+
+        self.app.root.after(0, count)
+        done.wait(self.args.timeout)
+
+        window = self.latencies[-self.args.sample_every:]
+        sample = {
+            "iteration": iteration,
+            "rss_mb": round((rss_bytes() or 0) / 2 ** 20, 1),
+            "widgets": result.get("widgets"),
+            "threads": threading.active_count(),
+            "latency_ms": round(statistics.median(window) * 1000, 1),
+            "history": len(self.app.history_manager.history)
+        }
+        self.samples.append(sample)
+        print(json.dumps(sample), flush=True)
+
+    def check(self):
+        """Compare the last sample with the first one after the warmup"""
+        failures = list(self.failures)
+        baseline = next((sample for sample in self.samples
+                         if sample["iteration"] > self.args.warmup), None)
+        if baseline is None or baseline is self.samples[-1]:
+            failures.append("not enough samples after the warmup to compare")
+            return failures
+
+        last = self.samples[-1]
+        if last["rss_mb"] - baseline["rss_mb"] > self.args.max_rss_growth_mb:
+            failures.append(f"RSS grew {baseline['rss_mb']} -> {last['rss_mb']} MB")
+        if (last["widgets"] or 0) - (baseline["widgets"] or 0) > self.args.max_widget_growth:
+            failures.append(f"widgets grew {baseline['widgets']} -> {last['widgets']}")
+        if last["threads"] - baseline["threads"] > self.args.max_thread_growth:
+            failures.append(f"threads grew {baseline['threads']} -> {last['threads']}")
+        if last["latency_ms"] > baseline["latency_ms"] * self.args.max_latency_drift:
+            failures.append(f"latency drifted {baseline['latency_ms']} -> "
+                            f"{last['latency_ms']} ms")
+        return failures
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Replay dictations through the app and check for leaks")
+    parser.add_argument("--fixtures", help="directory with fixtures.json")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--speed", type=float, default=10.0,
+                        help="replay audio this many times faster than real time")
+    parser.add_argument("--api-latency-ms", type=float, default=50.0,
+                        help="simulated OpenAI response time")
+    parser.add_argument("--gap-ms", type=float, default=20.0,
+                        help="pause between dictations")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for a paste")
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="dictations before the baseline sample")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0)
+    parser.add_argument("--max-widget-growth", type=int, default=20)
+    parser.add_argument("--max-thread-growth", type=int, default=5)
+    parser.add_argument("--max-latency-drift", type=float, default=1.5,
+                        help="allowed ratio of final to baseline median latency")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Soak test entry point, returns 1 when a threshold is exceeded"""
+    args = parse_args(argv)
+    fixtures = (load_fixtures(os.path.abspath(args.fixtures))
+                if args.fixtures else synthetic_fixtures())
+
+    state = SoakState(args.speed, args.api_latency_ms / 1000)
+    state.fixture = fixtures[0]
+    install_stand_ins(state)
+
+    # Config, history and usage files live in a throwaway directory
+    work_dir = tempfile.mkdtemp(prefix="soak-")
+    os.chdir(work_dir)
+    with open("config.json", "w") as file:
+        json.dump({
+            "api_key": "soak-test",
+            "record_hotkey": HOTKEY,
+            "record_mode": "hold",
+            "capture_mode": "thread",
+            "history": []
+        }, file)
+
+    from ui.main_window import MainApplication
+
+    app = MainApplication()
+    runner = SoakRunner(app, state, fixtures, args)
+    runner.start()
+    app.run()
+
+    failures = runner.check()
+    print(json.dumps({
+        "iterations": len(runner.latencies),
+        "work_dir": work_dir,
+        "passed": not failures,
+        "failures": failures
+    }, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Local stand-in for the OpenAI transcription endpoint, for testing
+
+Accepts multipart uploads with a Content-Length or a chunked body and answers
+with a transcript describing the received audio. Point the app at it with
+"api_base_url": "http://127.0.0.1:47900/v1" in config.json.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.multipart import parse_multipart, read_request_body
+
+
+def describe_audio(data):
+    """Transcript of a WAV upload: its duration, as the stand-in can't listen"""
+    if data[:4] == b"RIFF" and len(data) >= 44:
+        channels = int.from_bytes(data[22:24], "little")
+        rate = int.from_bytes(data[24:28], "little")
+        width = int.from_bytes(data[34:36], "little") // 8
+        if rate and channels and width:
+            seconds = (len(data) - 44) / (rate * channels * width)
+            return f"Stand-in transcript of {seconds:.2f} seconds of audio."
+    return f"Stand-in transcript of {len(data)} bytes of audio."
+
+
+class StandInServer:
+    """Serves /v1/audio/transcriptions in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=47900, latency=0.0,
+                 reject_chunked=False):
+        """
+        Initialize the server
+
+        Args:
+            host: Interface to bind
+            port: TCP port, 0 picks a free one
+            latency: Seconds added before each answer
+            reject_chunked: Answer 411 to chunked bodies, like endpoints that
+                need a Content-Length
+        """
+        self.latency = latency
+        self.reject_chunked = reject_chunked
+        self.requests = 0
+        self.chunked_requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.base_url = f"http://{host}:{self.port}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/audio/transcriptions":
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                try:
+                    body, chunked = read_request_body(self)
+                except ValueError:
+                    # Client gave up halfway through the body
+                    self.close_connection = True
+                    return
+                if chunked and stand_in.reject_chunked:
+                    self._send_json(411, {"error": {"message": "length required"}})
+                    return
+
+                _, files = parse_multipart(body, self.headers.get("Content-Type"))
+                if "file" not in files:
+                    self._send_json(400, {"error": {"message": "file is required"}})
+                    return
+
+                stand_in.requests += 1
+                stand_in.chunked_requests += chunked
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                self._send_json(200, {"text": describe_audio(files["file"][2])})
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("x-ratelimit-limit-requests", "10000")
+                self.send_header("x-ratelimit-remaining-requests", "10000")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    """Run the stand-in until interrupted"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=47900)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="delay added before each answer")
+    parser.add_argument("--reject-chunked", action="store_true",
+                        help="answer 411 to chunked uploads")
+    args = parser.parse_args(argv)
+
+    server = StandInServer(port=args.port, latency=args.latency_ms / 1000,
+                           reject_chunked=args.reject_chunked).start()
+    print(f"Stand-in API listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from utils.audio_utils import StreamResampler, resample, to_int16, to_mono
+
+
+def sine(rate, seconds, frequency=440, channels=1):
+    times = np.arange(int(rate * seconds)) / rate
+    samples = (np.sin(2 * np.pi * frequency * times) * 8000).astype(np.int16)
+    return np.repeat(samples, channels)
+
+
+def rms(samples):
+    return np.sqrt(np.mean(samples.astype(np.float64) ** 2))
+
+
+def stream(resampler, samples, chunk_frames):
+    step = chunk_frames * resampler.channels
+    output = b"".join(resampler.process(samples[i:i + step].tobytes())
+                      for i in range(0, len(samples), step))
+    return np.frombuffer(output, dtype=np.int16)
+
+
+@pytest.mark.parametrize("src_rate, dst_rate, chunk_frames", [
+    (48000, 44100, 1024),
+    (44100, 44100, 1024),
+    (16000, 44100, 160),
+    (96000, 44100, 4096),
+    (44100, 16000, 333),
+])
+def test_stream_output_length_follows_the_rate(src_rate, dst_rate, chunk_frames):
+    resampler = StreamResampler(src_rate, dst_rate)
+
+    output = stream(resampler, sine(src_rate, 2.0), chunk_frames)
+
+    # The last samples wait for the next chunk, but there is no drift
+    assert 0 <= 2.0 * dst_rate - len(output) <= 3
+
+
+@pytest.mark.parametrize("chunk_frames", [1, 7, 480, 4800])
+def test_chunk_size_does_not_change_the_output(chunk_frames):
+    samples = sine(48000, 0.5)
+
+    whole = stream(StreamResampler(48000, 44100), samples, len(samples))
+    chunked = stream(StreamResampler(48000, 44100), samples, chunk_frames)
+
+    assert len(chunked) == len(whole)
+    assert np.max(np.abs(chunked.astype(int) - whole)) <= 1
+
+
+def test_stream_keeps_the_level_of_resample():
+    samples = sine(48000, 1.0)
+
+    streamed = stream(StreamResampler(48000, 44100), samples, 480)
+    whole = to_int16(resample(samples, 48000, 44100))
+
+    # Same filter, only delayed since the streamed one can't look ahead
+    assert rms(streamed[200:-200]) == pytest.approx(rms(whole[200:-200]), rel=0.01)
+
+
+def test_stream_has_no_seams_between_chunks():
+    output = stream(StreamResampler(48000, 44100), sine(48000, 1.0, 100), 441)
+
+    # A 100 Hz tone changes by at most ~115 per sample at 44.1 kHz
+    assert np.max(np.abs(np.diff(output[100:].astype(int)))) < 130
+
+
+def test_stereo_capture_is_mixed_down():
+    resampler = StreamResampler(44100, 44100, channels=2)
+    left = np.full(100, 1000, np.int16)
+    right = np.full(100, 3000, np.int16)
+    interleaved = np.column_stack((left, right)).ravel()
+
+    output = np.frombuffer(resampler.process(interleaved.tobytes()), dtype=np.int16)
+
+    assert not resampler.passthrough
+    assert len(output) == 100
+    assert set(output) == {2000}
+
+
+def test_same_format_passes_through():
+    resampler = StreamResampler(16000, 16000)
+    data = sine(16000, 0.1).tobytes()
+
+    assert resampler.passthrough
+    assert resampler.process(data) == data
+
+
+def test_to_mono_drops_incomplete_frames():
+    assert list(to_mono(np.array([1, 3, 5, 7, 9]), 2)) == [2.0, 6.0]
+
+
+def test_to_int16_clips_and_rounds():
+    assert list(to_int16(np.array([40000.0, -40000.0, 1.6]))) == [32767, -32768, 2]
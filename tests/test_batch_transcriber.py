@@ -0,0 +1,132 @@
+import json
+import os
+import wave
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from services.batch_transcriber import BatchTranscriber, find_audio_files, prepare_audio
+from utils.audio_utils import write_wav
+
+
+class FakeService:
+    """Transcribes a clip to its name, failing some once"""
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.submitted = []
+
+    def submit_transcription(self, audio_file, model, priority="interactive",
+                             timestamps=True, prompt=None):
+        # Read at submit time, like the real service
+        with wave.open(audio_file, "rb") as wf:
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        level = int(samples[len(samples) // 2])
+        name = f"clip{level}"
+        self.submitted.append(name)
+
+        future = Future()
+        if name in self.fail_once:
+            self.fail_once.discard(name)
+            future.set_exception(RuntimeError("upstream failed"))
+        else:
+            future.set_result({"text": f"text of {name}", "words": None})
+        return future
+
+
+def make_clips(directory, count):
+    """WAV clips whose samples are their number"""
+    paths = []
+    for level in range(count):
+        path = str(directory / f"clip{level}.wav")
+        write_wav(path, np.full(4410, level, np.int16), 44100)
+        paths.append(path)
+    return paths
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line)["text"] for line in file]
+
+
+def test_interrupted_run_resumes_with_the_failed_files(tmp_path):
+    files = make_clips(tmp_path, 4)
+    output = str(tmp_path / "out.jsonl")
+
+    service = FakeService(fail_once=["clip2"])
+    stats = BatchTranscriber(service, decode_workers=1).run(files, output)
+    assert stats["files"] == 3 and stats["failed"] == 1
+
+    rerun = FakeService()
+    stats = BatchTranscriber(rerun, decode_workers=1).run(files, output)
+
+    assert rerun.submitted == ["clip2"]
+    assert stats["files"] == 1 and stats["failed"] == 0
+    assert sorted(read_results(output)) == [f"text of clip{i}" for i in range(4)]
+
+
+def test_changed_file_is_transcribed_again(tmp_path):
+    files = make_clips(tmp_path, 2)
+    output = str(tmp_path / "out.jsonl")
+    BatchTranscriber(FakeService(), decode_workers=1).run(files, output)
+
+    # Same name, different size
+    write_wav(files[1], np.full(8820, 1, np.int16), 44100)
+    rerun = FakeService()
+    BatchTranscriber(rerun, decode_workers=1).run(files, output)
+
+    assert rerun.submitted == ["clip1"]
+
+
+def test_restart_ignores_the_checkpoint(tmp_path):
+    files = make_clips(tmp_path, 2)
+    output = str(tmp_path / "out.jsonl")
+    BatchTranscriber(FakeService(), decode_workers=1).run(files, output)
+
+    rerun = FakeService()
+    BatchTranscriber(rerun, decode_workers=1).run(files, output, resume=False)
+
+    assert sorted(rerun.submitted) == ["clip0", "clip1"]
+    # The output starts over too
+    assert len(read_results(output)) == 2
+
+
+def test_cut_off_checkpoint_line_is_ignored(tmp_path):
+    files = make_clips(tmp_path, 2)
+    output = str(tmp_path / "out.jsonl")
+    BatchTranscriber(FakeService(), decode_workers=1).run(files, output)
+    with open(output + ".checkpoint", "a", encoding="utf-8") as checkpoint:
+        checkpoint.write('{"key": "cut')
+
+    rerun = FakeService()
+    BatchTranscriber(rerun, decode_workers=1).run(files, output)
+
+    assert rerun.submitted == []
+
+
+def test_prepare_audio_converts_to_16k_mono(tmp_path):
+    path = str(tmp_path / "stereo.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(44100)
+        wf.writeframes(np.zeros(2 * 44100, np.int16).tobytes())
+
+    prepared = prepare_audio(path, str(tmp_path))
+
+    assert prepared["duration"] == pytest.approx(1.0)
+    with wave.open(prepared["upload_path"], "rb") as wf:
+        assert (wf.getnchannels(), wf.getframerate(), wf.getnframes()) == (1, 16000, 16000)
+
+
+def test_find_audio_files_expands_directories(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.wav", "sub/b.MP3", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+
+    found = find_audio_files([str(tmp_path), str(tmp_path / "a.wav"),
+                              str(tmp_path / "missing.wav")])
+
+    assert [os.path.relpath(path, tmp_path) for path in found] == [
+        "a.wav", os.path.join("sub", "b.MP3")]
@@ -0,0 +1,63 @@
+import http.client
+import json
+
+import pytest
+
+from utils.control_server import ControlServer
+
+
+@pytest.fixture
+def server():
+    calls = []
+    control = ControlServer(
+        "secret",
+        on_start=lambda: calls.append("start"),
+        on_stop=lambda: calls.append("stop"),
+        on_toggle=lambda: calls.append("toggle"),
+        get_status=lambda: {"recording": False},
+        port=0)
+    control.start()
+    control.port = control._server.server_address[1]
+    control.calls = calls
+    yield control
+    control.stop()
+
+
+def request(connection, method, path, body=None, token="secret"):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_post_body_does_not_leak_into_the_next_request(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+    assert request(connection, "POST", "/start", body=b"{}")[0] == 202
+    assert request(connection, "GET", "/status") == (200, {"recording": False})
+    assert request(connection, "POST", "/nope", body=b'{"a": 1}')[0] == 404
+    assert request(connection, "POST", "/stop", body=b"{}")[0] == 202
+    assert server.calls == ["start", "stop"]
+
+
+def test_unauthorized_request_with_body_closes_the_connection(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+    connection.request("POST", "/start", body=b"{}",
+                       headers={"Authorization": "Bearer wrong"})
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 401
+    assert response.will_close
+    assert server.calls == []
+
+
+def test_oversized_body_is_rejected(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+    status, _ = request(connection, "POST", "/start",
+                        body=b"x" * (ControlServer.MAX_BODY_BYTES + 1))
+    assert status == 413
+    assert server.calls == []
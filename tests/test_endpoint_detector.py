@@ -0,0 +1,89 @@
+import numpy as np
+
+from utils.endpoint_detector import EndpointDetector
+
+RATE = 16000
+CHUNK = 320  # 20 ms
+
+
+def chunks(amplitude, ms, seed=0):
+    """Noise-like chunks with the given RMS amplitude"""
+    rng = np.random.default_rng(seed)
+    for _ in range(ms // 20):
+        samples = rng.standard_normal(CHUNK) * amplitude
+        yield np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def feed(detector, *parts):
+    """Feed the parts in order, returns the chunk indexes that triggered"""
+    triggered = []
+    index = 0
+    for amplitude, ms in parts:
+        for chunk in chunks(amplitude, ms, seed=index):
+            if detector.feed(chunk):
+                triggered.append(index)
+            index += 1
+    return triggered
+
+
+def test_trailing_silence_after_speech_triggers_once():
+    detector = EndpointDetector(RATE, trailing_silence_ms=500)
+
+    triggered = feed(detector, (100, 400), (8000, 1000), (100, 2000))
+
+    # 20 + 50 chunks of background and speech, then 25 chunks of silence
+    assert triggered == [20 + 50 + 25 - 1]
+    assert detector.triggered
+
+
+def test_silence_without_enough_speech_never_triggers():
+    detector = EndpointDetector(RATE, trailing_silence_ms=500, min_speech_ms=250)
+
+    assert feed(detector, (100, 2000)) == []
+    # A click is too short to count as speech
+    assert feed(detector, (8000, 100), (100, 2000)) == []
+
+
+def test_dips_between_the_margins_keep_speech_going():
+    detector = EndpointDetector(RATE, trailing_silence_ms=300,
+                                start_margin_db=12, stop_margin_db=6)
+
+    # About 9 dB over the background: not enough to start speech, but
+    # enough to keep it going. Longer than the trailing silence, short
+    # enough for the rising floor to stay below it.
+    dip = 100 * 10 ** (9 / 20)
+    assert feed(detector, (100, 400), (8000, 400), (dip, 500)) == []
+    assert detector.in_speech
+
+    detector.reset()
+    assert feed(detector, (100, 400), (dip, 500)) == []
+    assert not detector.in_speech
+
+
+def test_reset_allows_another_trigger():
+    detector = EndpointDetector(RATE, trailing_silence_ms=300)
+    assert feed(detector, (100, 200), (8000, 500), (100, 400))
+    assert not feed(detector, (100, 400))
+
+    detector.reset()
+
+    assert feed(detector, (100, 200), (8000, 500), (100, 400))
+
+
+def test_noise_floor_follows_louder_background_slowly():
+    detector = EndpointDetector(RATE, floor_rise_db=3.0)
+    feed(detector, (100, 400))
+    quiet_floor = detector.noise_floor_db
+
+    # One second of a 20 dB louder background raises the floor by ~3 dB
+    feed(detector, (1000, 1000))
+
+    assert 2.0 < detector.noise_floor_db - quiet_floor < 4.0
+
+
+def test_empty_and_silent_chunks():
+    detector = EndpointDetector(RATE)
+
+    assert detector.feed(b"") is False
+    assert detector.feed(bytes(CHUNK * 2)) is False
+    assert detector.noise_floor_db == -100.0
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+# The evaluator builds TranscriptionService instances
+pytest.importorskip("openai")
+
+from services.evaluator import (Backend, Evaluator, load_corpus,  # noqa: E402
+                                normalize_words, word_errors)
+from utils.audio_utils import write_wav  # noqa: E402
+
+
+class FakeService:
+    """Answers every clip at once with a fixed transcript"""
+
+    def __init__(self, transcripts):
+        self.transcripts = transcripts
+        self.submitted = []
+
+    def submit_transcription(self, audio_file, model, priority="interactive",
+                             timestamps=True, prompt=None):
+        self.submitted.append(audio_file)
+        future = Future()
+        future.set_result({"text": self.transcripts[len(self.submitted) - 1],
+                           "words": None})
+        return future
+
+
+class FakeBackend(Backend):
+
+    def __init__(self, service):
+        super().__init__("fake", "whisper-1")
+        self.service = service
+
+    def create_service(self):
+        return self.service
+
+
+def test_normalize_words_ignores_case_and_punctuation():
+    assert normalize_words("Hello, World! It's fine.") == ["hello", "world", "it's", "fine"]
+
+
+@pytest.mark.parametrize("reference, hypothesis, errors", [
+    ("the cat sat", "the cat sat", 0),
+    ("the cat sat", "The cat, sat.", 0),
+    ("the cat sat", "the bat sat", 1),
+    ("the cat sat", "the sat", 1),
+    ("the cat sat", "the black cat sat", 1),
+    ("the cat sat", "", 3),
+    ("", "noise", 1),
+])
+def test_word_errors(reference, hypothesis, errors):
+    assert word_errors(reference, hypothesis) == (errors, len(reference.split()))
+
+
+def make_corpus(directory):
+    for level, (name, text) in enumerate([("a", "one two three"), ("b", "four five")]):
+        write_wav(str(directory / f"{name}.wav"), np.full(4410, level, np.int16), 44100)
+        (directory / f"{name}.txt").write_text(text + "\n", encoding="utf-8")
+    # No transcript, so not part of the corpus
+    write_wav(str(directory / "c.wav"), np.zeros(10, np.int16), 44100)
+
+
+def test_load_corpus_pairs_clips_with_transcripts(tmp_path):
+    make_corpus(tmp_path)
+
+    clips = load_corpus(str(tmp_path))
+
+    assert [clip["reference"] for clip in clips] == ["one two three", "four five"]
+    assert clips[0]["duration"] == pytest.approx(0.1)
+    assert clips[0]["hash"] != clips[1]["hash"]
+
+
+def test_run_scores_and_caches(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    make_corpus(corpus)
+    clips = load_corpus(str(corpus))
+    cache_path = str(tmp_path / "cache.json")
+
+    service = FakeService(["one two three", "four six"])
+    results = Evaluator([FakeBackend(service)], ["wav16k"],
+                        cache_path=cache_path).run(clips)
+
+    result, = results
+    assert result["clips"] == 2
+    assert result["evaluated"] == 2
+    assert result["failed"] == 0
+    assert result["wer"] == pytest.approx(1 / 5)
+    # 0.1 seconds at 16 kHz plus the header, for each clip
+    assert result["bytes_uploaded"] == 2 * (1600 * 2 + 44)
+
+    # A second run sends nothing and scores the same
+    rerun = FakeService([])
+    result, = Evaluator([FakeBackend(rerun)], ["wav16k"],
+                        cache_path=cache_path).run(clips)
+    assert rerun.submitted == []
+    assert result["evaluated"] == 0
+    assert result["wer"] == pytest.approx(1 / 5)
@@ -0,0 +1,198 @@
+import http.client
+import io
+import threading
+import time
+
+import pytest
+
+from services.gateway import FairScheduler, TranscriptionGateway, UserRateLimits
+from services.multipart import (RequestTooLarge, build_multipart, parse_multipart,
+                                read_request_body)
+
+
+class FakeHandler:
+    """Just what read_request_body uses of a BaseHTTPRequestHandler"""
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.rfile = io.BytesIO(body)
+
+
+def test_multipart_round_trip():
+    audio = bytes(range(256)) * 4 + b"\r\n--not-a-boundary\r\n"
+    body, content_type = build_multipart(
+        {"model": "whisper-1", "prompt": "Hello, world"},
+        {"file": ("clip.wav", "audio/wav", audio)})
+
+    fields, files = parse_multipart(body, content_type)
+
+    assert fields == {"model": "whisper-1", "prompt": "Hello, world"}
+    assert files == {"file": ("clip.wav", "audio/wav", audio)}
+
+
+def test_multipart_without_boundary_is_empty():
+    assert parse_multipart(b"anything", "application/json") == ({}, {})
+
+
+def test_read_body_with_content_length():
+    handler = FakeHandler({"Content-Length": "5"}, b"helloEXTRA")
+
+    assert read_request_body(handler) == (b"hello", False)
+    # The next request on the connection is left unread
+    assert handler.rfile.read() == b"EXTRA"
+
+
+def test_read_chunked_body_with_trailers():
+    handler = FakeHandler(
+        {"Transfer-Encoding": "chunked"},
+        b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\nNEXT")
+
+    assert read_request_body(handler) == (b"hello world", True)
+    assert handler.rfile.read() == b"NEXT"
+
+
+def test_oversized_bodies_are_refused_before_reading():
+    handler = FakeHandler({"Content-Length": "100"}, b"x" * 100)
+    with pytest.raises(RequestTooLarge):
+        read_request_body(handler, max_size=10)
+    assert handler.rfile.tell() == 0
+
+    chunked = FakeHandler({"Transfer-Encoding": "chunked"},
+                          b"8\r\n12345678\r\n8\r\n12345678\r\n0\r\n\r\n")
+    with pytest.raises(RequestTooLarge):
+        read_request_body(chunked, max_size=10)
+
+
+def test_malformed_chunk_size_is_a_value_error():
+    handler = FakeHandler({"Transfer-Encoding": "chunked"}, b"zz\r\n")
+    with pytest.raises(ValueError):
+        read_request_body(handler)
+
+
+def test_scheduler_serves_users_in_turn():
+    scheduler = FairScheduler(max_concurrent=1)
+    scheduler.acquire("holder")
+
+    served = []
+
+    def request(user, name):
+        scheduler.acquire(user)
+        served.append(name)
+        scheduler.release()
+
+    threads = []
+    for user, name in [("alice", "alice-1"), ("alice", "alice-2"),
+                       ("alice", "alice-3"), ("bob", "bob-1")]:
+        thread = threading.Thread(target=request, args=(user, name))
+        thread.start()
+        threads.append(thread)
+        # Make the arrival order deterministic
+        time.sleep(0.02)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # Bob does not wait behind every request alice queued before him
+    assert served == ["alice-1", "bob-1", "alice-2", "alice-3"]
+
+
+def test_scheduler_limits_concurrency():
+    scheduler = FairScheduler(max_concurrent=2)
+    scheduler.acquire("alice")
+    scheduler.acquire("bob")
+
+    third = threading.Thread(target=scheduler.acquire, args=("carol",), daemon=True)
+    third.start()
+    third.join(timeout=0.1)
+    assert third.is_alive()
+
+    scheduler.release()
+    third.join(timeout=5)
+    assert not third.is_alive()
+
+
+def test_user_rate_limits_are_separate():
+    limits = UserRateLimits(requests_per_minute=60)
+    burst = int(limits.capacity)
+
+    assert all(limits.allow("alice") == 0 for _ in range(burst))
+    retry_after = limits.allow("alice")
+    assert 0 < retry_after <= 1.0
+    assert limits.allow("bob") == 0
+
+
+def test_gateway_refuses_open_host_without_users():
+    with pytest.raises(ValueError):
+        TranscriptionGateway(["sk-test"], host="0.0.0.0")
+    with pytest.raises(ValueError):
+        TranscriptionGateway([])
+
+    TranscriptionGateway(["sk-test"], host="0.0.0.0", users={"token": "alice"})
+    TranscriptionGateway(["sk-test"], host="::1")
+
+
+def test_identical_requests_are_forwarded_once(monkeypatch):
+    gateway = TranscriptionGateway(["sk-test"])
+    release = threading.Event()
+    forwarded = []
+
+    def forward(user, fields, files):
+        forwarded.append(user)
+        release.wait(5)
+        return 200, "application/json", b'{"text": "hi"}'
+    monkeypatch.setattr(gateway, "_forward", forward)
+
+    fields = {"model": "whisper-1"}
+    files = {"file": ("a.wav", "audio/wav", b"audio")}
+    results = []
+    threads = [threading.Thread(
+        target=lambda user=user: results.append(gateway.transcribe(user, fields, files)))
+        for user in ("alice", "bob")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # A later request is answered from the cache
+    results.append(gateway.transcribe("carol", fields, files))
+
+    assert forwarded == ["alice"]
+    assert {result[2] for result in results} == {b'{"text": "hi"}'}
+    counters = gateway.get_metrics()["counters"]
+    assert counters["deduplicated"] == 1
+    assert counters["cache_hits"] == 1
+
+    # Other options are a different request
+    gateway.transcribe("alice", {"model": "gpt-4o-transcribe"}, files)
+    assert len(forwarded) == 2
+
+
+def test_requests_are_authenticated_and_capped_before_reading():
+    gateway = TranscriptionGateway(["sk-test"], users={"token": "alice"}, port=0)
+    gateway.MAX_BODY_BYTES = 1024
+    gateway.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", gateway.port, timeout=5)
+        connection.request("POST", "/v1/audio/transcriptions", body=b"x" * 10,
+                           headers={"Authorization": "Bearer wrong"})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 401
+        assert response.will_close
+        connection.close()
+
+        body, content_type = build_multipart(
+            {"model": "whisper-1"}, {"file": ("a.wav", "audio/wav", b"x" * 2048)})
+        connection = http.client.HTTPConnection("127.0.0.1", gateway.port, timeout=5)
+        connection.request("POST", "/v1/audio/transcriptions", body=body,
+                           headers={"Authorization": "Bearer token",
+                                    "Content-Type": content_type})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 413
+        connection.close()
+    finally:
+        gateway.stop()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.rate_limiter import RateLimiter, parse_duration
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("20ms", 0.02),
+    ("1h2m3.5s", 3723.5),
+    ("2.5", 2.5),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", [None, "soon", ""])
+def test_parse_duration_rejects_unknown_values(value):
+    assert parse_duration(value) is None
+
+
+def test_burst_is_served_without_waiting():
+    limiter = RateLimiter(requests_per_minute=600)
+
+    waited = [limiter.acquire() for _ in range(10)]
+
+    assert max(waited) < 0.05
+
+
+def test_rate_limited_pauses_every_lane():
+    limiter = RateLimiter(requests_per_minute=600)
+
+    assert limiter.on_rate_limited({"retry-after": "0.2"}) == pytest.approx(0.2)
+
+    assert limiter.acquire("batch") >= 0.15
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.on_rate_limited({"retry-after": "0.2"})
+
+    served = []
+    lock = threading.Lock()
+
+    def acquire(name, priority):
+        limiter.acquire(priority)
+        with lock:
+            served.append(name)
+
+    threads = []
+    for name, priority in [("batch", "batch"), ("background", "background"),
+                           ("first", "interactive"), ("second", "interactive")]:
+        thread = threading.Thread(target=acquire, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        # Make the arrival order deterministic
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert served == ["first", "second", "background", "batch"]
+
+
+def test_exhausted_quota_in_headers_pauses_until_reset():
+    limiter = RateLimiter(requests_per_minute=600)
+
+    limiter.update_from_headers({
+        "x-ratelimit-limit-requests": "600",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "200ms",
+    })
+
+    assert limiter.acquire() >= 0.15
+
+
+def test_async_and_blocking_callers_share_the_queue():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.on_rate_limited({"retry-after": "0.1"})
+
+    served = []
+    blocking = threading.Thread(
+        target=lambda: served.append(("thread", limiter.acquire("batch"))))
+    blocking.start()
+    time.sleep(0.02)
+
+    async def acquire():
+        served.append(("task", await limiter.acquire_async("interactive")))
+    asyncio.run(acquire())
+    blocking.join(timeout=5)
+
+    assert [name for name, _ in served] == ["task", "thread"]
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.on_rate_limited({"retry-after": "0.2"})
+
+    async def give_up():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire_async("interactive"), 0.05)
+    asyncio.run(give_up())
+
+    # A waiter stuck at the head of the queue would block this forever
+    assert limiter.acquire("batch") < 1.0
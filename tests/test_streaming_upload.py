@@ -0,0 +1,87 @@
+import struct
+
+import pytest
+
+from services.streaming_upload import (StreamingUpload, StreamingUploadError,
+                                       wav_stream_header)
+from stand_in_api import StandInServer
+
+
+@pytest.fixture
+def stand_in():
+    server = StandInServer(port=0).start()
+    yield server
+    server.stop()
+
+
+def test_stream_header_describes_the_format():
+    header = wav_stream_header(16000, 2, 2)
+
+    assert len(header) == 44
+    fields = struct.unpack("<4sI4s4sIHHIIHH4sI", header)
+    assert fields[0] == b"RIFF" and fields[2] == b"WAVE" and fields[11] == b"data"
+    # channels, rate, byte rate, block align, bits per sample
+    assert fields[6:11] == (2, 16000, 64000, 4, 16)
+
+
+def test_audio_fed_while_recording_is_transcribed(stand_in):
+    upload = StreamingUpload(stand_in.base_url, "sk-test", "whisper-1", 16000, 1, 2,
+                             extra_fields=[("timestamp_granularities", ["word"])])
+    upload.start()
+    # One second of audio in 50 chunks
+    for _ in range(50):
+        upload.feed(bytes(640))
+
+    response = upload.finish(timeout=5)
+
+    assert response["text"] == "Stand-in transcript of 1.00 seconds of audio."
+    assert stand_in.chunked_requests == 1
+    assert upload.bytes_sent > 32000
+    assert upload.tail_time < 5
+
+
+def test_before_connect_runs_on_the_sender(stand_in):
+    calls = []
+    upload = StreamingUpload(stand_in.base_url, "sk-test", "whisper-1", 16000, 1, 2,
+                             before_connect=lambda: calls.append("wait"))
+    upload.start()
+    upload.finish(timeout=5)
+
+    assert calls == ["wait"]
+
+
+def test_refused_chunked_body_reports_the_status():
+    server = StandInServer(port=0, reject_chunked=True).start()
+    try:
+        upload = StreamingUpload(server.base_url, "sk-test", "whisper-1", 16000, 1, 2)
+        upload.start()
+        upload.feed(bytes(640))
+
+        with pytest.raises(StreamingUploadError) as error:
+            upload.finish(timeout=5)
+    finally:
+        server.stop()
+
+    assert error.value.status == 411
+
+
+def test_unreachable_endpoint_fails_without_status():
+    upload = StreamingUpload("http://127.0.0.1:1/v1", "sk-test", "whisper-1",
+                             16000, 1, 2)
+    upload.start()
+
+    with pytest.raises(StreamingUploadError) as error:
+        upload.finish(timeout=5)
+
+    assert error.value.status is None
+
+
+def test_aborted_upload_fails(stand_in):
+    upload = StreamingUpload(stand_in.base_url, "sk-test", "whisper-1", 16000, 1, 2)
+    upload.start()
+    upload.feed(bytes(640))
+    upload.abort()
+
+    with pytest.raises(StreamingUploadError, match="aborted"):
+        upload.finish(timeout=5)
+    assert stand_in.requests == 0
@@ -0,0 +1,56 @@
+import re
+
+from utils.text_processor import TextProcessor
+
+
+def test_replacements_match_whole_words_case_insensitively():
+    processor = TextProcessor({"open ai": "OpenAI", "tltt": "Too Lazy to Type"})
+
+    assert processor.process("I use Open AI and TLTT") == "I use OpenAI and Too Lazy to Type"
+    assert processor.process("tltts stay") == "tltts stay"
+
+
+def test_voice_commands_swallow_surrounding_punctuation():
+    processor = TextProcessor({}, {"new line": "\n", "comma": ","})
+
+    assert processor.process("first, New line. second comma third") == "first\nsecond, third"
+
+
+def test_longest_overlapping_key_wins():
+    processor = TextProcessor({"new": "NEW", "new york": "NYC"})
+
+    assert processor.process("new york is new") == "NYC is NEW"
+
+
+def test_character_matching_a_key_only_under_ignorecase_is_tolerated():
+    # 'ſ' matches 's' under IGNORECASE but lowercases to itself
+    processor = TextProcessor({"st": "street"}, {"cmd": "!"})
+
+    assert processor.process("ſt and ST") == "street and street"
+
+
+def test_trie_regex_matches_exactly_its_words():
+    words = ["a", "ab", "abc", "b", "bcd", "x y"]
+    pattern = re.compile(f"(?:{TextProcessor._trie_regex(words)})$")
+
+    for word in words:
+        assert pattern.match(word)
+    for other in ["", "abcd", "bc", "x"]:
+        assert not pattern.match(other)
+
+
+def test_long_keys_do_not_hit_the_recursion_limit():
+    processor = TextProcessor({"x" * 2000: "long"})
+
+    assert processor.process("a " + "x" * 2000 + " b") == "a long b"
+
+
+def test_unchanged_rules_are_not_recompiled():
+    processor = TextProcessor({"a": "b"})
+    pattern = processor._pattern
+
+    processor.set_rules({"a": "b"}, {})
+    assert processor._pattern is pattern
+
+    processor.set_rules({"a": "c"}, {})
+    assert processor.process("a") == "c"
@@ -0,0 +1,53 @@
+import csv
+import json
+import threading
+
+from utils.usage_ledger import UsageLedger, estimate_cost
+
+
+def test_record_updates_totals_and_writes_in_the_background(tmp_path):
+    ledger = UsageLedger(str(tmp_path / "ledger.csv"), str(tmp_path / "rollups.json"))
+
+    ledger.record("whisper-1", 60.0, 1000, 0.5)
+    ledger.record("gpt-4o-mini-transcribe", 30.0, 500, 0.25)
+
+    # Totals are current before anything reaches the disk
+    summary = ledger.get_summary()
+    assert summary["total"]["count"] == 2
+    assert summary["total"]["bytes_uploaded"] == 1500
+    assert summary["models"]["whisper-1"]["cost"] == estimate_cost("whisper-1", 60.0)
+
+    ledger.close()
+    with open(tmp_path / "ledger.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["model"] for row in rows] == ["whisper-1", "gpt-4o-mini-transcribe"]
+    with open(tmp_path / "rollups.json") as file:
+        assert json.load(file)["total"]["count"] == 2
+
+
+def test_rollups_are_rebuilt_from_the_ledger(tmp_path):
+    ledger = UsageLedger(str(tmp_path / "ledger.csv"), str(tmp_path / "rollups.json"))
+    for _ in range(3):
+        ledger.record("whisper-1", 10.0, 100, 0.1)
+    ledger.close()
+    (tmp_path / "rollups.json").unlink()
+
+    rebuilt = UsageLedger(str(tmp_path / "ledger.csv"), str(tmp_path / "rollups.json"))
+    assert rebuilt.get_summary()["total"]["count"] == 3
+
+
+def test_concurrent_records_are_all_kept(tmp_path):
+    ledger = UsageLedger(str(tmp_path / "ledger.csv"), str(tmp_path / "rollups.json"))
+
+    threads = [threading.Thread(target=lambda: [
+        ledger.record("whisper-1", 1.0, 10, 0.01) for _ in range(50)])
+        for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ledger.close()
+
+    with open(tmp_path / "ledger.csv", newline="") as file:
+        assert len(list(csv.DictReader(file))) == 200
+    assert ledger.get_summary()["total"]["count"] == 200
@@ -0,0 +1,69 @@
+import os
+import threading
+import wave
+
+import numpy as np
+
+from utils.wav_encoder import WavEncoder
+
+
+def test_header_is_finalized_with_every_chunk(tmp_path):
+    path = str(tmp_path / "rec.wav")
+    encoder = WavEncoder(path, channels=2, sample_width=2, rate=44100)
+    chunks = [np.full(2048, i, np.int16).tobytes() for i in range(10)]
+    for chunk in chunks:
+        encoder.feed(chunk)
+
+    assert encoder.finish() == path
+
+    with wave.open(path, "rb") as wf:
+        assert wf.getnchannels() == 2
+        assert wf.getsampwidth() == 2
+        assert wf.getframerate() == 44100
+        assert wf.getnframes() == 10 * 1024
+        assert wf.readframes(wf.getnframes()) == b"".join(chunks)
+
+
+def test_empty_recording_is_a_valid_file(tmp_path):
+    path = str(tmp_path / "rec.wav")
+
+    assert WavEncoder(path, 1, 2, 16000).finish() == path
+
+    with wave.open(path, "rb") as wf:
+        assert wf.getnframes() == 0
+
+
+def test_write_error_is_reported(tmp_path):
+    path = str(tmp_path / "rec.wav")
+    encoder = WavEncoder(path, 1, 2, 16000)
+
+    def fail(data):
+        raise OSError("disk full")
+    encoder._wave.writeframesraw = fail
+    encoder.feed(b"\0\0")
+
+    assert encoder.finish() is None
+    assert isinstance(encoder.error, OSError)
+
+
+def test_timed_out_writer_deletes_the_file(tmp_path):
+    path = str(tmp_path / "rec.wav")
+    encoder = WavEncoder(path, 1, 2, 16000)
+
+    # A disk that stalls longer than finish() waits
+    stalled = threading.Event()
+    write = encoder._wave.writeframesraw
+
+    def slow_write(data):
+        stalled.wait(5)
+        write(data)
+    encoder._wave.writeframesraw = slow_write
+    encoder.feed(b"\0\0")
+
+    assert encoder.finish(timeout=0.05) is None
+    assert encoder.abandoned
+    assert os.path.exists(path)
+
+    stalled.set()
+    encoder._thread.join(5)
+    assert not os.path.exists(path)
@@ -2,12 +2,14 @@ import customtkinter as ctk
 import webbrowser
 
 from ui.ui_helper import UIHelper
+from utils.audio_devices import DEFAULT_DEVICE_LABEL, list_input_devices
 
 
 class ConfigurationWindow:
     """Configuration window for the application"""
 
-    def __init__(self, master, config_manager, hotkey_manager, on_config_save=None):
+    def __init__(self, master, config_manager, hotkey_manager, on_config_save=None,
+                 diagnostics=None, usage_ledger=None, on_capture_profile=None):
         """
         Initialize the configuration window
 
@@ -16,11 +18,18 @@ class ConfigurationWindow:
             config_manager: The configuration manager instance
             hotkey_manager: The hotkey manager instance
             on_config_save: Callback function when configuration is saved
+            diagnostics: Optional Diagnostics instance shown in the window
+            usage_ledger: Optional UsageLedger shown in the usage window
+            on_capture_profile: Optional function starting a profile, called
+                with dictations or seconds
         """
         self.master = master
         self.config_manager = config_manager
         self.hotkey_manager = hotkey_manager
         self.on_config_save_callback = on_config_save
+        self.diagnostics = diagnostics
+        self.usage_ledger = usage_ledger
+        self.on_capture_profile = on_capture_profile
 
         # Load current configuration
         self.config = self.config_manager.load_config()
@@ -31,12 +40,26 @@ class ConfigurationWindow:
         self.record_hotkey = ctk.StringVar()
         self.record_mode = ctk.StringVar()
         self.start_minimized = ctk.BooleanVar()
+        self.cleanup_enabled = ctk.BooleanVar()
+        self.cleanup_budget_ms = ctk.StringVar()
+        self.auto_stop_enabled = ctk.BooleanVar()
+        self.auto_stop_silence_ms = ctk.StringVar()
+        self.input_device = ctk.StringVar()
+        self.profile_length = ctk.StringVar(value="5 dictations")
 
         # Set default values
         self.api_key.set(self.config.get("api_key", ""))
         self.record_hotkey.set(self.config.get("record_hotkey", "ctrl+shift"))
         self.record_mode.set(self.config.get("record_mode", "hold"))
         self.start_minimized.set(self.config.get("start_minimized", False))
+        self.cleanup_enabled.set(self.config.get("cleanup_enabled", False))
+        self.cleanup_budget_ms.set(
+            str(self.config.get("cleanup_budget_ms", 1500)))
+        self.auto_stop_enabled.set(self.config.get("auto_stop_enabled", False))
+        self.auto_stop_silence_ms.set(
+            str(self.config.get("auto_stop_silence_ms", 1500)))
+        self.input_device.set(
+            self.config.get("input_device") or DEFAULT_DEVICE_LABEL)
 
     def show(self):
         """Show the configuration window"""
@@ -88,12 +111,18 @@ class ConfigurationWindow:
         # Recording configuration
         self._setup_recording_section(settings_frame)
 
+        # Transcript cleanup configuration
+        self._setup_cleanup_section(settings_frame)
+
         # Startup configuration
         self._setup_startup_section(settings_frame)
 
         # Advanced options
         # self._setup_advanced_section(settings_frame)
 
+        # Diagnostics
+        self._setup_diagnostics_section(settings_frame)
+
         # Buttons frame
         buttons_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         buttons_frame.pack(fill=ctk.X, pady=(20, 0))
@@ -168,8 +197,8 @@ class ConfigurationWindow:
 
         check_balance_btn = ctk.CTkButton(
             link_frame,
-            text="Check Balance",
-            command=self._check_balance,
+            text="Usage & Cost",
+            command=self._show_usage,
             width=150,
             fg_color="#6c757d",
             hover_color="#495057"
@@ -181,13 +210,44 @@ class ConfigurationWindow:
         section_frame = self._create_section_frame(
             parent, "Recording Configuration")
 
+        # Input device
+        ctk.CTkLabel(
+            section_frame,
+            text="Input Device:",
+            anchor="w",
+            font=("Roboto", 14)
+        ).pack(pady=(10, 5), padx=10, anchor="w")
+
+        devices = self._get_device_names()
+        if self.input_device.get() not in devices:
+            # Keep a configured device that is unplugged right now
+            devices.append(self.input_device.get())
+
+        ctk.CTkOptionMenu(
+            section_frame,
+            values=devices,
+            variable=self.input_device,
+            width=400,
+            height=35,
+            corner_radius=8,
+            dynamic_resizing=False
+        ).pack(pady=5, padx=10, anchor="w")
+
+        ctk.CTkLabel(
+            section_frame,
+            text="Audio is captured at the device's own sample rate and converted\nin the app. An unplugged device is used again once it is back.",
+            justify="left",
+            font=("Roboto", 12),
+            text_color="#6c757d"
+        ).pack(pady=(0, 15), padx=10, anchor="w")
+
         # Hotkey configuration
         ctk.CTkLabel(
             section_frame,
             text="Record Hotkey:",
             anchor="w",
             font=("Roboto", 14)
-        ).pack(pady=(10, 5), padx=10, anchor="w")
+        ).pack(pady=(5, 5), padx=10, anchor="w")
 
         hotkey_entry = ctk.CTkEntry(
             section_frame,
@@ -237,6 +297,79 @@ class ConfigurationWindow:
             text_color="#6c757d"
         ).pack(pady=(0, 10), padx=10, anchor="w")
 
+        # Automatic stop at the end of speech (toggle mode)
+        auto_stop_checkbox = ctk.CTkCheckBox(
+            section_frame,
+            text="Toggle mode: stop automatically when I stop speaking",
+            variable=self.auto_stop_enabled,
+            onvalue=True,
+            offvalue=False,
+            corner_radius=6,
+            height=30,
+            font=("Roboto", 13)
+        )
+        auto_stop_checkbox.pack(pady=(5, 5), padx=10, anchor="w")
+
+        ctk.CTkLabel(
+            section_frame,
+            text="Trailing Silence (ms):",
+            anchor="w",
+            font=("Roboto", 14)
+        ).pack(pady=(5, 5), padx=10, anchor="w")
+
+        silence_menu = ctk.CTkOptionMenu(
+            section_frame,
+            values=["1000", "1500", "2000", "3000"],
+            variable=self.auto_stop_silence_ms,
+            width=150,
+            height=35,
+            corner_radius=8
+        )
+        silence_menu.pack(pady=(5, 10), padx=10, anchor="w")
+
+    def _setup_cleanup_section(self, parent):
+        """Set up the transcript cleanup section"""
+        section_frame = self._create_section_frame(
+            parent, "Transcript Cleanup")
+
+        cleanup_checkbox = ctk.CTkCheckBox(
+            section_frame,
+            text="Clean up transcripts with an AI model",
+            variable=self.cleanup_enabled,
+            onvalue=True,
+            offvalue=False,
+            corner_radius=6,
+            height=30,
+            font=("Roboto", 13)
+        )
+        cleanup_checkbox.pack(pady=(10, 5), padx=10, anchor="w")
+
+        # Latency budget
+        ctk.CTkLabel(
+            section_frame,
+            text="Latency Budget (ms):",
+            anchor="w",
+            font=("Roboto", 14)
+        ).pack(pady=(5, 5), padx=10, anchor="w")
+
+        budget_menu = ctk.CTkOptionMenu(
+            section_frame,
+            values=["500", "1000", "1500", "3000"],
+            variable=self.cleanup_budget_ms,
+            width=150,
+            height=35,
+            corner_radius=8
+        )
+        budget_menu.pack(pady=5, padx=10, anchor="w")
+
+        ctk.CTkLabel(
+            section_frame,
+            text="Fixes punctuation and removes filler words. If the cleanup takes\nlonger than the budget, the raw text is pasted and the cleaned\ntext replaces it in history.",
+            justify="left",
+            font=("Roboto", 12),
+            text_color="#6c757d"
+        ).pack(pady=(0, 10), padx=10, anchor="w")
+
     def _setup_startup_section(self, parent):
         """Set up the startup configuration section"""
         section_frame = self._create_section_frame(
@@ -270,6 +403,81 @@ class ConfigurationWindow:
             text_color="#6c757d"
         ).pack(pady=(0, 10), padx=10, anchor="w")
 
+    def _setup_diagnostics_section(self, parent):
+        """Set up the diagnostics section"""
+        section_frame = self._create_section_frame(parent, "Diagnostics")
+
+        lines = []
+        if self.diagnostics:
+            lines.extend(self.diagnostics.summary())
+
+        hotkey_stats = self.hotkey_manager.get_latency_stats()
+        if hotkey_stats["count"]:
+            lines.append(
+                f"hotkey hook: {hotkey_stats['count']} events, "
+                f"mean {hotkey_stats['mean_us']:.0f} µs, "
+                f"max {hotkey_stats['max_us']:.0f} µs")
+
+        ctk.CTkLabel(
+            section_frame,
+            text="\n".join(lines) if lines else "No data recorded yet.",
+            justify="left",
+            wraplength=400,
+            font=("Roboto", 12),
+            text_color="#6c757d"
+        ).pack(pady=(0, 10), padx=10, anchor="w")
+
+        if not self.on_capture_profile:
+            return
+
+        # On-demand CPU and memory profile
+        profile_frame = ctk.CTkFrame(section_frame, fg_color="transparent")
+        profile_frame.pack(fill=ctk.X, padx=10, pady=(0, 10))
+
+        ctk.CTkOptionMenu(
+            profile_frame,
+            values=["5 dictations", "20 dictations", "60 seconds", "300 seconds"],
+            variable=self.profile_length,
+            width=150,
+            height=35,
+            corner_radius=8
+        ).pack(side=ctk.LEFT)
+
+        ctk.CTkButton(
+            profile_frame,
+            text="Capture Profile",
+            command=self._capture_profile,
+            width=140,
+            height=35,
+            corner_radius=8
+        ).pack(side=ctk.LEFT, padx=(10, 0))
+
+    def _capture_profile(self):
+        """Start profiling for the selected number of dictations or seconds"""
+        amount, unit = self.profile_length.get().split()
+        if unit == "dictations":
+            started = self.on_capture_profile(dictations=int(amount))
+        else:
+            started = self.on_capture_profile(seconds=int(amount))
+
+        if started:
+            UIHelper.show_notification(
+                self.window, f"Profiling the next {amount} {unit}...", duration=2000)
+        else:
+            UIHelper.show_notification(
+                self.window, "A profile is already being captured", duration=2000)
+
+    def _get_device_names(self):
+        """Names offered in the input device menu, the default first"""
+        names = [DEFAULT_DEVICE_LABEL]
+        try:
+            for device in list_input_devices():
+                if device["name"] not in names:
+                    names.append(device["name"])
+        except Exception as e:
+            print(f"Could not list input devices: {e}")
+        return names
+
     def _create_section_frame(self, parent, title):
         """Create a framed section with title"""
         frame = ctk.CTkFrame(parent)
@@ -299,6 +507,12 @@ class ConfigurationWindow:
         self.config["record_hotkey"] = self.record_hotkey.get()
         self.config["record_mode"] = self.record_mode.get()
         self.config["start_minimized"] = self.start_minimized.get()
+        self.config["cleanup_enabled"] = self.cleanup_enabled.get()
+        self.config["cleanup_budget_ms"] = int(self.cleanup_budget_ms.get())
+        self.config["auto_stop_enabled"] = self.auto_stop_enabled.get()
+        self.config["auto_stop_silence_ms"] = int(self.auto_stop_silence_ms.get())
+        device = self.input_device.get()
+        self.config["input_device"] = None if device == DEFAULT_DEVICE_LABEL else device
 
         # Save to file
         self.config_manager.save_config(self.config)
@@ -313,25 +527,57 @@ class ConfigurationWindow:
         # Close the window
         self.window.destroy()
 
-    def _check_balance(self):
-        """Show OpenAI balance information"""
+    def _show_usage(self):
+        """Show local usage and estimated cost"""
         info_window = UIHelper.create_modal_window(
-            self.window, "Balance Information", "400x200")
+            self.window, "Usage and Cost", "420x440")
 
         ctk.CTkLabel(
             info_window,
-            text="The OpenAI balance information can only be accessed through a browser.",
-            wraplength=350
-        ).pack(pady=10)
+            text="Usage recorded on this computer",
+            font=("Roboto", 16, "bold")
+        ).pack(pady=(15, 5))
+
+        if self.usage_ledger:
+            summary = self.usage_ledger.get_summary()
+            lines = [
+                self._format_usage("Today", summary["today"]),
+                self._format_usage("This month", summary["month"]),
+                self._format_usage("All time", summary["total"]),
+                ""
+            ]
+            for model, totals in sorted(summary["models"].items()):
+                lines.append(self._format_usage(model, totals))
+
+            total = summary["total"]
+            if total["count"]:
+                lines.append("")
+                lines.append(
+                    f"Average per dictation: ${total['cost'] / total['count']:.4f}, "
+                    f"{total['latency_ms'] / total['count']:.0f} ms")
+            text = "\n".join(lines)
+        else:
+            text = "Usage tracking is not available."
+
+        ctk.CTkLabel(
+            info_window,
+            text=text,
+            justify="left",
+            wraplength=380,
+            font=("Roboto", 12)
+        ).pack(padx=20, pady=10, anchor="w")
 
         ctk.CTkLabel(
             info_window,
-            text="Please visit the OpenAI dashboard to check your current balance."
+            text="Costs are estimates. Your actual balance is on the OpenAI dashboard.",
+            wraplength=380,
+            font=("Roboto", 12),
+            text_color="#6c757d"
         ).pack(pady=5)
 
         def open_dashboard():
             webbrowser.open("https://platform.openai.com/account/usage")
-            info_window.destroy()
+            UIHelper.close_window(info_window)
 
         ctk.CTkButton(
             info_window,
@@ -342,5 +588,13 @@ class ConfigurationWindow:
         ctk.CTkButton(
             info_window,
             text="Close",
-            command=info_window.destroy
+            command=lambda: UIHelper.close_window(info_window)
         ).pack(pady=5)
+
+    @staticmethod
+    def _format_usage(label, totals):
+        """Format one usage rollup as a line of text"""
+        return (f"{label}: {totals['count']} calls, "
+                f"{totals['audio_seconds'] / 60:.1f} min audio, "
+                f"{totals['bytes_uploaded'] / 1e6:.1f} MB, "
+                f"${totals['cost']:.4f}")
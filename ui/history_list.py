@@ -0,0 +1,204 @@
+import customtkinter as ctk
+
+
+class VirtualHistoryList:
+    """Scrollable history list that only creates widgets for the visible rows"""
+
+    ROW_HEIGHT = 39  # Row frame (35) plus its vertical padding (2 * 2)
+    MAX_DISPLAY_CHARS = 30
+
+    def __init__(self, master, on_copy, on_select, height=200, width=220,
+                 empty_text="No transcriptions yet."):
+        """
+        Initialize the history list
+
+        Args:
+            master: The parent widget
+            on_copy: Callback receiving the entry text when "Copy" is clicked
+            on_select: Callback receiving the entry text when a row is clicked
+            height: Initial height of the visible area
+            width: Initial width of the visible area
+            empty_text: Text shown when there are no entries
+        """
+        self.on_copy_callback = on_copy
+        self.on_select_callback = on_select
+
+        self.items = []
+        self.first_index = 0
+        self.visible_count = max(1, height // self.ROW_HEIGHT)
+
+        # Pool of reusable row widgets, never destroyed
+        self.rows = []
+
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+
+        # Rows frame does not grow with its children, so the pool size
+        # only depends on the space the parent gives us
+        self.rows_frame = ctk.CTkFrame(
+            self.frame, fg_color="transparent", height=height, width=width)
+        self.rows_frame.grid(row=0, column=0, sticky="nsew")
+        self.rows_frame.grid_propagate(False)
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+
+        self.scrollbar = ctk.CTkScrollbar(
+            self.frame, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.empty_label = ctk.CTkLabel(self.rows_frame, text=empty_text)
+
+        self.rows_frame.bind("<Configure>", self._on_resize)
+        self._bind_scroll(self.rows_frame)
+
+        self._ensure_rows(self.visible_count)
+        self._render()
+
+    def set_items(self, items):
+        """
+        Replace the displayed entries
+
+        Args:
+            items: List of entry texts, newest first
+        """
+        self.items = items
+        self.first_index = 0
+        self._render()
+
+    def refresh(self):
+        """Redraw the visible rows after entries changed in place"""
+        self._render()
+
+    def insert_item(self, index):
+        """
+        Notify the list that an entry was inserted into the items list
+
+        Only the visible rows are rebound, the rest of the list is untouched.
+
+        Args:
+            index: Position the new entry was inserted at
+        """
+        # Keep the current view stable when scrolled past the new entry
+        if self.first_index > 0 and index <= self.first_index:
+            self.first_index += 1
+        self._render()
+
+    def _ensure_rows(self, count):
+        """Grow the row pool so that at least count rows exist"""
+        while len(self.rows) < count:
+            self.rows.append(self._create_row(len(self.rows)))
+
+    def _create_row(self, position):
+        """Create one reusable row (frame, copy button and text label)"""
+        row = {"entry": None}
+
+        item_frame = ctk.CTkFrame(self.rows_frame)
+        item_frame.grid(row=position, column=0, sticky="ew", padx=5, pady=2)
+
+        # Callbacks read the entry bound to the row at click time, so they
+        # never need to be rebound while scrolling
+        copy_btn = ctk.CTkButton(
+            item_frame,
+            text="Copy",
+            width=60,
+            height=25,
+            command=lambda: self.on_copy_callback(row["entry"])
+        )
+        copy_btn.pack(side=ctk.RIGHT, padx=5, pady=5)
+
+        text_label = ctk.CTkLabel(
+            item_frame,
+            text="",
+            anchor="w",
+            justify="left",
+            cursor="hand2"  # Hand cursor to indicate clickable
+        )
+        text_label.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=5, pady=5)
+        text_label.bind(
+            "<Button-1>", lambda e: self.on_select_callback(row["entry"]))
+
+        for widget in (item_frame, copy_btn, text_label):
+            self._bind_scroll(widget)
+
+        item_frame.grid_remove()
+
+        row["frame"] = item_frame
+        row["label"] = text_label
+        return row
+
+    def _bind_scroll(self, widget):
+        """Route mouse wheel events on a widget to the list"""
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", self._on_mousewheel)
+        widget.bind("<Button-5>", self._on_mousewheel)
+
+    def _render(self):
+        """Bind the visible slice of items to the row pool"""
+        total = len(self.items)
+
+        if not total:
+            for row in self.rows:
+                row["frame"].grid_remove()
+            self.empty_label.grid(row=0, column=0, pady=10)
+            self.scrollbar.set(0, 1)
+            return
+
+        self.empty_label.grid_remove()
+
+        for offset, row in enumerate(self.rows):
+            index = self.first_index + offset
+            if offset < self.visible_count and index < total:
+                self._bind_row(row, self.items[index])
+                row["frame"].grid()
+            else:
+                row["frame"].grid_remove()
+
+        self.scrollbar.set(
+            self.first_index / total,
+            min(1.0, (self.first_index + self.visible_count) / total)
+        )
+
+    def _bind_row(self, row, entry):
+        """Show an entry in a row, skipping the redraw if nothing changed"""
+        if row["entry"] == entry:
+            return
+        row["entry"] = entry
+
+        # Format the display text (truncate if needed)
+        display_text = entry[:self.MAX_DISPLAY_CHARS] + \
+            "..." if len(entry) > self.MAX_DISPLAY_CHARS else entry
+        row["label"].configure(text=display_text)
+
+    def _scroll_to(self, index):
+        """Scroll so that the item at index is the first visible row"""
+        max_first = max(0, len(self.items) - self.visible_count)
+        index = min(max(0, index), max_first)
+        if index != self.first_index:
+            self.first_index = index
+            self._render()
+
+    def _on_scrollbar(self, *args):
+        """Handle scrollbar drag and click commands"""
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            step = self.visible_count if args[2] == "pages" else 1
+            self._scroll_to(self.first_index + int(float(args[1])) * step)
+
+    def _on_mousewheel(self, event):
+        """Scroll one row per wheel notch"""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.first_index - 1)
+        else:
+            self._scroll_to(self.first_index + 1)
+
+    def _on_resize(self, event):
+        """Resize the row pool to fit the visible area"""
+        row_height = self.ROW_HEIGHT * \
+            ctk.ScalingTracker.get_widget_scaling(self.rows_frame)
+        visible_count = max(1, int(event.height // row_height))
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self._ensure_rows(visible_count)
+            self._scroll_to(self.first_index)
+            self._render()
@@ -0,0 +1,31 @@
+class LazyWindow:
+    """Proxy that builds a window object the first time it is used"""
+
+    def __init__(self, factory, skip_until_built=()):
+        """
+        Initialize the proxy
+
+        Args:
+            factory: Function that builds and returns the window object
+            skip_until_built: Method names that do nothing while the window
+                has not been built yet (e.g. status updates for a hidden window)
+        """
+        self._factory = factory
+        self._skip_until_built = set(skip_until_built)
+        self._instance = None
+
+    @property
+    def is_built(self):
+        """Whether the window has been built"""
+        return self._instance is not None
+
+    def build(self):
+        """Build the window if needed and return it"""
+        if self._instance is None:
+            self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        if self._instance is None and name in self._skip_until_built:
+            return lambda *args, **kwargs: None
+        return getattr(self.build(), name)
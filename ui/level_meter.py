@@ -0,0 +1,98 @@
+import math
+import tkinter
+
+import customtkinter as ctk
+
+
+class LevelMeter:
+    """Mini waveform of recent input levels drawn on a canvas"""
+
+    MIN_DB = -60.0
+
+    def __init__(self, master, bars=32, width=180, height=28,
+                 color="#4CAF50", clip_color="#d32f2f"):
+        """
+        Initialize the level meter
+
+        Args:
+            master: The parent widget
+            bars: Number of level bars kept on screen
+            width: Width of the meter in pixels
+            height: Height of the meter in pixels
+            color: Bar color for normal levels
+            clip_color: Bar color when the input is clipping
+        """
+        self.bars = bars
+        self.width = width
+        self.height = height
+        self.color = color
+        self.clip_color = clip_color
+        self.levels = [(0.0, False)] * bars
+
+        self.canvas = ctk.CTkCanvas(
+            master,
+            width=width,
+            height=height,
+            highlightthickness=0,
+            bg=self._resolve_background(master)
+        )
+
+        # Bars are created once and only moved afterwards
+        self.bar_width = width / bars
+        self.items = [
+            self.canvas.create_rectangle(
+                0, 0, 0, 0, fill=color, outline="")
+            for _ in range(bars)
+        ]
+        self._redraw()
+
+    def push(self, level):
+        """
+        Append a level to the waveform and redraw
+
+        Args:
+            level: Tuple of (rms, peak) normalized to 0..1
+        """
+        rms, peak = level
+        self.levels = self.levels[1:] + [(self._to_height(rms), peak >= 0.99)]
+        self._redraw()
+
+    def reset(self):
+        """Clear the waveform"""
+        self.levels = [(0.0, False)] * self.bars
+        self._redraw()
+
+    def _to_height(self, rms):
+        """Map an RMS level to a bar height fraction on a dB scale"""
+        if rms <= 0:
+            return 0.0
+        db = 20 * math.log10(rms)
+        return min(1.0, max(0.0, (db - self.MIN_DB) / -self.MIN_DB))
+
+    def _redraw(self):
+        """Move the bars to match the current levels"""
+        middle = self.height / 2
+        for i, (fraction, clipping) in enumerate(self.levels):
+            half = max(1.0, fraction * middle)
+            x0 = i * self.bar_width + 1
+            self.canvas.coords(
+                self.items[i], x0, middle - half,
+                x0 + self.bar_width - 2, middle + half)
+            self.canvas.itemconfigure(
+                self.items[i],
+                fill=self.clip_color if clipping else self.color)
+
+    @staticmethod
+    def _resolve_background(widget):
+        """Find the color the canvas sits on, following transparent parents"""
+        while widget is not None:
+            try:
+                color = widget.cget("fg_color")
+            except (ValueError, AttributeError, tkinter.TclError):
+                color = None
+            if color and color != "transparent":
+                if isinstance(color, (tuple, list)):
+                    color = color[0 if ctk.get_appearance_mode() == "Light" else 1]
+                return color
+            widget = widget.master
+        return "gray17"
@@ -1,8 +1,10 @@
+import tkinter as tk
 import customtkinter as ctk
-from pynput.keyboard import Controller
 import pyperclip
 import webbrowser
 import threading
+import concurrent.futures
+import secrets
 
 from ui.ui_helper import UIHelper
 from ui.configuration_window import ConfigurationWindow
@@ -10,14 +12,28 @@ from utils.config_manager import ConfigManager
 from utils.history_manager import HistoryManager
 from utils.audio_recorder import AudioRecorder
 from services.transcription_service import TranscriptionService
+from services.cleanup_service import CleanupService
+from services.span_corrector import SpanCorrector
 from utils.hotkey_manager import HotkeyManager
 from utils.paste_text_manager import PasteTextManager
+from utils.event_bus import EventBus
+from utils.diagnostics import Diagnostics
+from utils.usage_ledger import UsageLedger
+from utils.dictation_store import DictationStore
+from utils.control_server import ControlServer
+from utils.text_processor import TextProcessor
+from utils.profiler import ProfileSession
 from ui.minimized_main_window import MinimizedMainWindow
+from ui.history_list import VirtualHistoryList
+from ui.level_meter import LevelMeter
+from ui.lazy_window import LazyWindow
 
 
 class MainApplication:
     """Main application class"""
 
+    LEVEL_METER_FPS = 15
+
     def __init__(self):
         # Initialize appearance
         ctk.set_appearance_mode("System")
@@ -30,42 +46,93 @@ class MainApplication:
 
         # Initialize managers and services
         self.config_manager = ConfigManager()
-        self.history_manager = HistoryManager(self.config_manager)
-        self.audio_recorder = AudioRecorder()
-        self.transcription_service = TranscriptionService("")
-        self.hotkey_manager = HotkeyManager()
-        self.keyboard = Controller()
-        self.paste_text_manager = PasteTextManager()
 
         # Load configuration
         self.config = self.config_manager.load_config()
 
+        self.history_manager = HistoryManager(self.config_manager)
+        self.dictation_store = DictationStore(
+            max_entries=self.config.get("keep_audio_entries", 20))
+        self.diagnostics = Diagnostics()
+        self.audio_recorder = AudioRecorder(
+            self.config.get("capture_mode", "thread"), self.diagnostics,
+            self.config.get("input_device"))
+        self.hotkey_manager = HotkeyManager()
+        self.usage_ledger = UsageLedger()
+        self.transcription_service = TranscriptionService(
+            "", self.diagnostics, usage_ledger=self.usage_ledger,
+            base_url=self.config.get("api_base_url"))
+        self.transcription_service.set_gateway(
+            self.config.get("gateway_url"), self.config.get("gateway_token"))
+        self.cleanup_service = CleanupService("", self.diagnostics)
+        self.paste_text_manager = PasteTextManager(
+            self.config_manager, self.diagnostics,
+            on_profiles_changed=self._on_paste_profiles_changed)
+        self.event_bus = EventBus()
+
+        # Transcript post-processing rules, compiled once
+        self.text_processor = TextProcessor(
+            self.config.get("text_replacements", {}),
+            self.config.get("voice_commands", {})
+        )
+        self.span_corrector = SpanCorrector(
+            self.transcription_service, self.dictation_store, self.text_processor)
+
         # Initialize tracking variables
         self.recording = False
         self.transcribing = False
         self.recording_thread = None
-        self.history_items = []
+        self.recording_model = None
+        self.recording_generation = 0
+        self.streaming_upload = None
+        self.profile_session = None
+        self.level_meter_job = None
+
+        # Transcript shown in the details window, for span corrections
+        self.details_text = None
+        self.details_text_box = None
+        self.details_retranscribe_btn = None
+
+        # Arm the hotkey before building any UI, so it works as soon as
+        # possible on slow machines. Events posted before the UI exists
+        # wait in the event bus until its first frame.
+        self._update_hotkey_binding()
 
-        # Create the configuration window (not shown yet)
-        self.config_window = ConfigurationWindow(
-            self.root,
-            self.config_manager,
-            self.hotkey_manager,
-            on_config_save=self._on_config_saved
+        # Secondary windows are built on first use
+        self.config_window = LazyWindow(
+            lambda: ConfigurationWindow(
+                self.root,
+                self.config_manager,
+                self.hotkey_manager,
+                on_config_save=self._on_config_saved,
+                diagnostics=self.diagnostics,
+                usage_ledger=self.usage_ledger,
+                on_capture_profile=self.start_profile
+            )
         )
-
-        # Create the minimized window (initially hidden)
-        self.minimized_window = MinimizedMainWindow(
-            self.root,
-            on_open_main=self._show_window,
-            on_close=self._on_minimized_window_close
+        self.minimized_window = LazyWindow(
+            self._build_minimized_window,
+            # The window gets the current status when it is built
+            skip_until_built=(
+                "hide",
+                "update_recording_status",
+                "update_transcription_status",
+                "update_level",
+                "reset_level"
+            )
         )
 
         # Setup UI components
         self._setup_ui()
 
-        # Set up the hotkey based on current mode
-        self._update_hotkey_binding()
+        # Deliver background thread events to the UI from the main loop
+        self._subscribe_events()
+        self.event_bus.start(self.root)
+
+        # Optional local control API
+        self.control_server = None
+        if self.config.get("control_server_enabled", False):
+            self._start_control_server()
 
         # Set up window close handler
         self.root.protocol("WM_DELETE_WINDOW", self._minimize_to_small_window)
@@ -73,6 +140,24 @@ class MainApplication:
         # Determine which window to show at startup
         self.root.after(100, self._handle_startup_window)
 
+        # Build the minimized window once the app has settled
+        self.root.after(
+            2000, lambda: self.root.after_idle(self.minimized_window.build))
+
+    def _build_minimized_window(self):
+        """Build the minimized window showing the current status"""
+        window = MinimizedMainWindow(
+            self.root,
+            on_open_main=self._show_window,
+            on_close=self._on_minimized_window_close
+        )
+        window.update_recording_status(self.recording)
+        window.update_transcription_status(
+            self.transcribing,
+            "Transcribing... Please wait" if self.transcribing else ""
+        )
+        return window
+
     def _handle_startup_window(self):
         """Determine which window to show at startup based on configuration"""
         if self.config.get("start_minimized", False):
@@ -84,6 +169,27 @@ class MainApplication:
         """Run the application"""
         self.root.mainloop()
 
+    def start_profile(self, dictations=None, seconds=None):
+        """
+        Profile CPU and memory for the next dictations or seconds
+
+        Args:
+            dictations: Number of dictations to profile
+            seconds: Number of seconds to profile
+
+        Returns:
+            False if a profile is already being captured
+        """
+        if self.profile_session and self.profile_session.active:
+            return False
+
+        self.profile_session = ProfileSession(
+            dictations, seconds, self.diagnostics,
+            on_finished=lambda path: self.event_bus.post(
+                "profile_saved", path, coalesce=False))
+        self.profile_session.start()
+        return True
+
     def _setup_ui(self):
         """Set up the user interface"""
         # Main layout frames
@@ -131,10 +237,7 @@ class MainApplication:
         api_status_frame = ctk.CTkFrame(status_frame, fg_color="transparent")
         api_status_frame.pack(pady=10, fill=ctk.X)
 
-        api_status_text = "API Key: " + \
-            ("Configured ✓" if self.config.get("api_key") else "Not configured ✗")
-        api_status_color = "#4CAF50" if self.config.get(
-            "api_key") else "#FF5252"
+        api_status_text, api_status_color = self._get_api_status()
 
         self.api_status_label = ctk.CTkLabel(
             api_status_frame,
@@ -173,6 +276,10 @@ class MainApplication:
         )
         self.status_indicator.pack(pady=5)
 
+        # Input level meter, fed while recording
+        self.level_meter = LevelMeter(status_frame)
+        self.level_meter.canvas.pack(pady=(0, 5))
+
         # Hotkey reminder
         self.hotkey_reminder = ctk.CTkLabel(
             status_frame,
@@ -277,11 +384,16 @@ class MainApplication:
         self.history_container = ctk.CTkFrame(history_parent_frame)
         self.history_container.pack(padx=0, pady=3, fill=ctk.BOTH, expand=True)
 
-        # Create a scrollable frame with FIXED HEIGHT for history items
-        # Add mousewheel configuration for smoother scrolling
-        self.history_scroll = ctk.CTkScrollableFrame(
-            self.history_container, height=200, width=220)
-        self.history_scroll.pack(fill=ctk.BOTH, expand=True)
+        # Virtualized list: only the visible rows have widgets, which are
+        # reused while scrolling
+        self.history_list = VirtualHistoryList(
+            self.history_container,
+            on_copy=self._copy_to_clipboard,
+            on_select=self._show_full_text,
+            height=200,
+            width=220
+        )
+        self.history_list.frame.pack(fill=ctk.BOTH, expand=True)
 
         # History controls
         history_ctrl_frame = ctk.CTkFrame(
@@ -331,8 +443,20 @@ class MainApplication:
         # Reload configuration
         self.config = self.config_manager.load_config()
 
-        # Update API key in transcription service
+        # Update API key and endpoint in transcription service
         self.transcription_service.set_api_key(self.config.get("api_key", ""))
+        self.transcription_service.set_base_url(self.config.get("api_base_url"))
+        self.transcription_service.set_gateway(
+            self.config.get("gateway_url"), self.config.get("gateway_token"))
+
+        # Takes effect from the next recording
+        self.audio_recorder.set_input_device(self.config.get("input_device"))
+
+        # Recompile post-processing rules if they changed
+        self.text_processor.set_rules(
+            self.config.get("text_replacements", {}),
+            self.config.get("voice_commands", {})
+        )
 
         # Update hotkey binding
         self._update_hotkey_binding()
@@ -340,13 +464,18 @@ class MainApplication:
         # Update UI elements that display configuration values
         self._update_config_display()
 
+    def _get_api_status(self):
+        """Get the text and color describing how transcriptions are sent"""
+        if self.config.get("gateway_url"):
+            return "API: Shared gateway ✓", "#4CAF50"
+        if self.config.get("api_key"):
+            return "API Key: Configured ✓", "#4CAF50"
+        return "API Key: Not configured ✗", "#FF5252"
+
     def _update_config_display(self):
         """Update UI elements that display configuration values"""
         # Update API status in the main window
-        api_status_text = "API Key: " + \
-            ("Configured ✓" if self.config.get("api_key") else "Not configured ✗")
-        api_status_color = "#4CAF50" if self.config.get(
-            "api_key") else "#FF5252"
+        api_status_text, api_status_color = self._get_api_status()
 
         # Use direct references to UI elements
         if hasattr(self, 'api_status_label'):
@@ -358,57 +487,105 @@ class MainApplication:
                 text=f"Current hotkey: {self.config.get('record_hotkey', 'ctrl+shift')}")
 
     def _update_hotkey_binding(self):
-        """Update hotkey binding based on current settings"""
+        """Update hotkey bindings based on current settings"""
+        mode = self.config.get("record_mode", "hold")
+        release_callback = self._on_hotkey_release if mode == "hold" else None
+
         self.hotkey_manager.set_hotkey(
             self.config.get("record_hotkey", "ctrl+shift"),
-            self.config.get("record_mode", "hold"),
+            mode,
             self._on_hotkey_press,
-            self._on_hotkey_release if self.config.get(
-                "record_mode", "hold") == "hold" else None
+            release_callback
         )
 
-    def _on_hotkey_press(self):
-        """Handle hotkey press event - no event parameter needed"""
+        # Extra hotkeys, each recording with its own speech-to-text model
+        for extra in self.config.get("extra_hotkeys", []):
+            self.hotkey_manager.add_binding(
+                extra["hotkey"],
+                mode,
+                lambda model=extra.get("stt_model"): self._on_hotkey_press(model),
+                release_callback
+            )
+
+    def _on_hotkey_press(self, model=None):
+        """Handle hotkey press event (called from the hotkey worker thread)"""
         if self.config.get("record_mode", "hold") == "hold":
-            self._start_recording()
+            self._start_recording(model)
         else:
-            self._toggle_recording()
+            self._toggle_recording(model)
 
     def _on_hotkey_release(self):
-        """Handle hotkey release event - no event parameter needed"""
+        """Handle hotkey release event (called from the hotkey worker thread)"""
         if self.config.get("record_mode", "hold") == "hold" and self.recording:
             self._stop_recording()
 
-    def _toggle_recording(self):
+    def _toggle_recording(self, model=None):
         """Toggle recording state"""
         if not self.recording:
-            self._start_recording()
+            self._start_recording(model)
         else:
             self._stop_recording()
 
-    def _start_recording(self):
-        """Start recording audio"""
+    def _start_recording(self, model=None):
+        """
+        Start recording audio (called from the hotkey worker thread)
+
+        Args:
+            model: Speech-to-text model for this recording, defaults to the
+                configured one
+        """
         if not self.recording:
             self.recording = True
-            # Update main window status
-            self.record_label.configure(text="Recording in progress...")
-            self.status_indicator.configure(text="🔴", text_color="#d32f2f")
-
-            # Update minimized window status
-            self.minimized_window.update_recording_status(True)
-
-            self.recording_thread = self.audio_recorder.start_recording()
+            self.recording_model = model or self.config.get(
+                "stt_model", "whisper-1")
+            self.event_bus.post("recording", True)
+
+            # Identifies this recording to a late automatic stop
+            self.recording_generation += 1
+
+            on_end_of_speech = None
+            if (self.config.get("record_mode", "hold") == "toggle"
+                    and self.config.get("auto_stop_enabled", False)):
+                generation = self.recording_generation
+                on_end_of_speech = lambda: self.hotkey_manager.run_on_worker(
+                    lambda: self._auto_stop_recording(generation))
+
+            # Optionally upload the audio while it is being recorded
+            self.streaming_upload = None
+            if self.config.get("stream_upload", False):
+                self.transcription_service.set_api_key(
+                    self.config.get("api_key", ""))
+                self.streaming_upload = self.transcription_service.start_streaming(
+                    self.recording_model, AudioRecorder.RATE,
+                    AudioRecorder.CHANNELS, 2, timestamps=True)
+
+            try:
+                self.recording_thread = self.audio_recorder.start_recording(
+                    on_end_of_speech=on_end_of_speech,
+                    trailing_silence_ms=self.config.get("auto_stop_silence_ms", 1500),
+                    on_chunk=self.streaming_upload.feed if self.streaming_upload else None)
+            except OSError as e:
+                # Nothing is recording, so the next press starts afresh
+                self.recording = False
+                self.recording_thread = None
+                if self.streaming_upload:
+                    self.streaming_upload.abort()
+                    self.streaming_upload = None
+                self.event_bus.post("recording", False)
+                self.event_bus.post(
+                    "error", f"Could not start recording: {e}", coalesce=False)
+
+    def _auto_stop_recording(self, generation):
+        """Stop the recording once the speaker has finished (toggle mode)"""
+        if self.recording and generation == self.recording_generation:
+            print("End of speech detected, stopping the recording")
+            self._stop_recording()
 
     def _stop_recording(self):
-        """Stop recording audio"""
+        """Stop recording audio (called from the hotkey worker thread)"""
         if self.recording:
             self.recording = False
-            # Update main window status
-            self.record_label.configure(text="Press hotkey to start recording")
-            self.status_indicator.configure(text="⚫", text_color="gray")
-
-            # Update minimized window status
-            self.minimized_window.update_recording_status(False)
+            self.event_bus.post("recording", False)
 
             # Stop recording and process the audio
             self.audio_recorder.stop_recording()
@@ -417,128 +594,243 @@ class MainApplication:
 
             # Save and transcribe the audio
             filename = self.audio_recorder.save_audio()
+            streaming_upload, self.streaming_upload = self.streaming_upload, None
             if filename:
                 # Show transcribing status
                 self.transcribing = True
-                self.transcription_status.configure(
-                    text="Transcribing... Please wait")
-
-                # Update minimized window status
-                self.minimized_window.update_transcription_status(True)
+                self.event_bus.post("transcribing", True)
 
                 # Start transcription in a separate thread
                 threading.Thread(target=self._transcribe_audio_thread, args=(
-                    filename,), daemon=True).start()
+                    filename, self.recording_model, streaming_upload),
+                    daemon=True).start()
+            elif streaming_upload:
+                streaming_upload.abort()
 
-    def _transcribe_audio_thread(self, filename):
+    def _transcribe_audio_thread(self, filename, selected_model, streaming_upload=None):
         """Transcribe audio in a separate thread to keep UI responsive"""
         try:
-            # Get the selected model from config
-            selected_model = self.config.get("stt_model", "whisper-1")
-
             # Set the API key and transcribe
             self.transcription_service.set_api_key(
                 self.config.get("api_key", ""))
-            transcription_text = self.transcription_service.transcribe(
-                filename, selected_model)
-
-            # Use after() to update UI from the main thread
-            self.root.after(
-                0, lambda: self._handle_transcription_result(transcription_text))
+            result = self.transcription_service.transcribe_detailed(
+                filename, selected_model, streaming_upload=streaming_upload)
+            transcription_text = result["text"]
+
+            # Apply user replacements and voice commands
+            transcription_text = self.text_processor.process(
+                transcription_text)
+
+            # Optional AI cleanup, only waited for within the budget
+            cleanup_future = None
+            if self.config.get("cleanup_enabled", False):
+                cleanup_future = self._start_cleanup(transcription_text)
+                try:
+                    transcription_text = cleanup_future.result(
+                        timeout=self.config.get("cleanup_budget_ms", 1500) / 1000)
+                    cleanup_future = None
+                except concurrent.futures.TimeoutError:
+                    # Paste the raw text now, the cleaned one goes to history
+                    pass
+                except Exception as e:
+                    print(f"Cleanup failed, using raw text: {e}")
+                    cleanup_future = None
+
+            # Every result must be handled, so it is never coalesced
+            self.event_bus.post("transcription_result",
+                                transcription_text, coalesce=False)
+
+            # Keep the audio so part of it can be re-transcribed later. The
+            # recording file is unique to this dictation and is only deleted
+            # below, so copying it after the paste costs no latency.
+            try:
+                self.dictation_store.add(transcription_text, filename,
+                                         result["words"], selected_model)
+            except Exception as e:
+                print(f"Could not store the dictation audio: {e}")
+
+            # Attached after posting the result, so the history entry
+            # exists by the time the late cleanup result is handled
+            if cleanup_future is not None:
+                raw_text = transcription_text
+                cleanup_future.add_done_callback(
+                    lambda future: self._on_late_cleanup(raw_text, future))
 
         except Exception as api_error:
             error_str = str(api_error)
-            # Use after() to show error from the main thread
             if "401" in error_str and "invalid_api_key" in error_str:
-                self.root.after(0, lambda: self._show_api_key_error(
-                    "Your OpenAI API key appears to be invalid. Please check your API key."))
+                self.event_bus.post(
+                    "api_key_error",
+                    "Your OpenAI API key appears to be invalid. Please check your API key.",
+                    coalesce=False)
             else:
-                self.root.after(0, lambda: self._show_error_window(
-                    f"API Error: {error_str}"))
+                self.event_bus.post(
+                    "error", f"API Error: {error_str}", coalesce=False)
+
+        finally:
+            # The recording is unique to this dictation, nothing reads it now
+            self.audio_recorder.delete_recording(filename)
 
             # Clear transcribing status
-            self.root.after(0, self._clear_transcription_status)
+            self.transcribing = False
+            self.event_bus.post("transcribing", False)
+
+            profile_session = self.profile_session
+            if profile_session:
+                profile_session.dictation_finished()
+
+    def _on_paste_profiles_changed(self, profiles):
+        """Save learned paste delays through the app's own configuration"""
+        self.config["paste_profiles"] = profiles
+        self.config_manager.save_config(self.config)
+
+    def _start_cleanup(self, text):
+        """Start the AI cleanup of a transcript and return its future"""
+        self.cleanup_service.set_api_key(self.config.get("api_key", ""))
+        return self.cleanup_service.start_cleanup(
+            text, self.config.get("cleanup_model", "gpt-4o-mini"))
+
+    def _on_late_cleanup(self, raw_text, future):
+        """Forward a cleanup that missed the budget to the history"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        cleaned_text = future.result()
+        if cleaned_text != raw_text:
+            self.event_bus.post(
+                "cleanup_result", (raw_text, cleaned_text), coalesce=False)
+
+    def _start_control_server(self):
+        """Start the local control API and stream events to its clients"""
+        token = self.config.get("control_token")
+        if not token:
+            token = secrets.token_urlsafe(24)
+            self.config["control_token"] = token
+            self.config_manager.save_config(self.config)
+
+        # Actions run on the hotkey worker, serialized with the hotkeys
+        run = self.hotkey_manager.run_on_worker
+        self.control_server = ControlServer(
+            token,
+            on_start=lambda: run(self._start_recording),
+            on_stop=lambda: run(self._stop_recording),
+            on_toggle=lambda: run(self._toggle_recording),
+            get_status=lambda: {
+                "recording": self.recording,
+                "transcribing": self.transcribing
+            },
+            port=self.config.get("control_server_port", 47821)
+        )
+        try:
+            self.control_server.start()
+        except OSError as e:
+            print(f"Could not start control server: {e}")
+            self.control_server = None
+            return
+
+        # Push events as soon as they are posted, not on the next UI frame
+        self.event_bus.add_listener(self.control_server.publish)
+
+    def _subscribe_events(self):
+        """Route events from background threads to the UI handlers"""
+        self.event_bus.subscribe("recording", self._on_recording_changed)
+        self.event_bus.subscribe("transcribing", self._on_transcribing_changed)
+        self.event_bus.subscribe(
+            "transcription_result", self._handle_transcription_result)
+        self.event_bus.subscribe(
+            "cleanup_result", self._handle_cleanup_result)
+        self.event_bus.subscribe(
+            "span_retranscribed", self._handle_span_retranscribed)
+        self.event_bus.subscribe(
+            "retranscribe_error", self._on_retranscribe_failed)
+        self.event_bus.subscribe("api_key_error", self._show_api_key_error)
+        self.event_bus.subscribe("error", self._show_error_window)
+        self.event_bus.subscribe("profile_saved", self._on_profile_saved)
+
+    def _on_recording_changed(self, is_recording):
+        """Update both windows when recording starts or stops"""
+        if is_recording:
+            self.record_label.configure(text="Recording in progress...")
+            self.status_indicator.configure(text="🔴", text_color="#d32f2f")
+        else:
+            self.record_label.configure(text="Press hotkey to start recording")
+            self.status_indicator.configure(text="⚫", text_color="gray")
+
+        # Update minimized window status
+        self.minimized_window.update_recording_status(is_recording)
+
+        if is_recording:
+            if self.level_meter_job is None:
+                self._update_level_meters()
+        else:
+            if self.level_meter_job is not None:
+                self.root.after_cancel(self.level_meter_job)
+                self.level_meter_job = None
+            self.level_meter.reset()
+            self.minimized_window.reset_level()
+
+    def _update_level_meters(self):
+        """Redraw the level meters at a fixed frame rate while recording"""
+        level = self.audio_recorder.get_level()
+        self.level_meter.push(level)
+        self.minimized_window.update_level(level)
+
+        self.level_meter_job = self.root.after(
+            1000 // self.LEVEL_METER_FPS, self._update_level_meters)
+
+    def _on_transcribing_changed(self, is_transcribing):
+        """Update both windows when transcription starts or finishes"""
+        self.transcription_status.configure(
+            text="Transcribing... Please wait" if is_transcribing else "")
+
+        # Update minimized window status
+        self.minimized_window.update_transcription_status(is_transcribing)
 
     def _handle_transcription_result(self, transcription_text):
         """Handle successful transcription result"""
         # Add to history and update display
         self.history_manager.add_entry(transcription_text)
-        self._update_history_display()
+        self.history_list.insert_item(0)
 
         # Paste the text into the active application
         self._paste_text(transcription_text)
 
-        # Clear transcribing status
-        self._clear_transcription_status()
-
-    def _clear_transcription_status(self):
-        """Clear the transcription status message"""
-        self.transcribing = False
-        self.transcription_status.configure(text="")
-
-        # Update minimized window status
-        self.minimized_window.update_transcription_status(False)
-
     def _paste_text(self, text):
         self.paste_text_manager.paste_text(text)
 
     def _update_history_display(self):
         """Update the history display"""
-        # Clear existing history items
-        for item in self.history_items:
-            item.destroy()
-        self.history_items = []
-
-        if not self.history_manager.history:
-            no_history_label = ctk.CTkLabel(
-                self.history_scroll, text="No transcriptions yet.")
-            no_history_label.pack(pady=10)
-            self.history_items.append(no_history_label)
-            return
-
-        # Add each history item with its own frame and copy button
-        for i, entry in enumerate(self.history_manager.history):
-            # Create a frame for this history item
-            item_frame = ctk.CTkFrame(self.history_scroll)
-            item_frame.pack(fill=ctk.X, padx=5, pady=2, expand=True)
-            self.history_items.append(item_frame)
-
-            # Format the display text (truncate if needed)
-            max_display_chars = 30
-            display_text = entry[:max_display_chars] + \
-                "..." if len(entry) > max_display_chars else entry
-
-            # Capture the current entry for the lambda
-            current_entry = entry
-
-            # Add copy button first (on the right)
-            copy_btn = ctk.CTkButton(
-                item_frame,
-                text="Copy",
-                width=60,
-                height=25,
-                command=lambda text=current_entry: self._copy_to_clipboard(
-                    text)
-            )
-            # Pack button to the right
-            copy_btn.pack(side=ctk.RIGHT, padx=5, pady=5)
-            self.history_items.append(copy_btn)
-
-            # Add the text label
-            text_label = ctk.CTkLabel(
-                item_frame,
-                text=display_text,
-                anchor="w",
-                justify="left",
-                cursor="hand2"  # Hand cursor to indicate clickable
-            )
-            text_label.pack(side=ctk.LEFT, fill=ctk.X,
-                            expand=True, padx=5, pady=5)
-            self.history_items.append(text_label)
-
-            # Bind click event to the text label
-            text_label.bind("<Button-1>", lambda e,
-                            text=current_entry: self._show_full_text(text))
+        self.history_list.set_items(self.history_manager.history)
+
+    def _handle_cleanup_result(self, result):
+        """Replace a pasted raw transcript in history with its cleaned text"""
+        raw_text, cleaned_text = result
+        self.dictation_store.replace(raw_text, cleaned_text)
+        if self.history_manager.replace_entry(raw_text, cleaned_text):
+            self.history_list.refresh()
+
+    def _handle_span_retranscribed(self, result):
+        """Put a corrected transcript in history and the details window"""
+        old_text, new_text = result
+        if self.history_manager.replace_entry(old_text, new_text):
+            self.history_list.refresh()
+
+        if self.details_text == old_text and self.details_text_box.winfo_exists():
+            self.details_text = new_text
+            self.details_text_box.configure(state="normal")
+            self.details_text_box.delete("1.0", "end")
+            self.details_text_box.insert("1.0", new_text)
+            self.details_text_box.configure(state="disabled")
+        self._reset_retranscribe_button()
+
+    def _on_retranscribe_failed(self, message):
+        """Re-enable the details window after a failed span correction"""
+        self._reset_retranscribe_button()
+        self._show_error_window(message)
+
+    def _reset_retranscribe_button(self):
+        button = self.details_retranscribe_btn
+        if button is not None and button.winfo_exists():
+            button.configure(text="Re-transcribe Selection", state="normal")
 
     def _clear_history(self):
         """Clear all history items"""
@@ -547,12 +839,15 @@ class MainApplication:
             "Are you sure you want to clear all history?",
             on_confirm=lambda: (
                 self.history_manager.clear_history(),
+                self.dictation_store.clear(),
                 self._update_history_display()
             )
         )
 
     def _copy_to_clipboard(self, text):
         """Copy text to clipboard"""
+        # Copying the text that was just pasted hints the paste failed
+        self.paste_text_manager.report_repaste(text)
         pyperclip.copy(text)
         UIHelper.show_notification(self.root, "Copied to clipboard!")
 
@@ -566,25 +861,66 @@ class MainApplication:
         text_box.pack(padx=10, pady=10, fill=ctk.BOTH, expand=True)
         text_box.insert("0.0", text)
         text_box.configure(state="disabled")  # Make it read-only
+        self.details_text = text
+        self.details_text_box = text_box
+        self.details_retranscribe_btn = None
 
         # Button frame
         btn_frame = ctk.CTkFrame(details_window, fg_color="transparent")
         btn_frame.pack(pady=10, padx=10, fill=ctk.X)
 
-        # Copy button
+        # Copy button, the text may have been corrected since opening
         ctk.CTkButton(
             btn_frame,
             text="Copy Text",
-            command=lambda: self._copy_to_clipboard(text)
+            command=lambda: self._copy_to_clipboard(self.details_text)
         ).pack(side=ctk.LEFT, padx=5)
 
+        # Only dictations whose audio is still stored can be corrected
+        if self.dictation_store.has_audio(text):
+            self.details_retranscribe_btn = ctk.CTkButton(
+                btn_frame,
+                text="Re-transcribe Selection",
+                command=self._retranscribe_selection
+            )
+            self.details_retranscribe_btn.pack(side=ctk.LEFT, padx=5)
+
         # Close button
         ctk.CTkButton(
             btn_frame,
             text="Close",
-            command=details_window.destroy
+            command=lambda: UIHelper.close_window(details_window)
         ).pack(side=ctk.RIGHT, padx=5)
 
+    def _retranscribe_selection(self):
+        """Re-transcribe the words selected in the details window"""
+        text_box = self.details_text_box
+        try:
+            start = len(text_box.get("1.0", "sel.first"))
+            end = len(text_box.get("1.0", "sel.last"))
+        except tk.TclError:
+            UIHelper.show_notification(
+                self.root, "Select the words to re-transcribe first")
+            return
+
+        self.details_retranscribe_btn.configure(
+            text="Re-transcribing...", state="disabled")
+        threading.Thread(target=self._retranscribe_thread, args=(
+            self.details_text, start, end), daemon=True).start()
+
+    def _retranscribe_thread(self, text, start, end):
+        """Correct a span off the UI thread"""
+        try:
+            self.transcription_service.set_api_key(
+                self.config.get("api_key", ""))
+            corrected = self.span_corrector.correct(text, start, end)
+            self.event_bus.post(
+                "span_retranscribed", (text, corrected), coalesce=False)
+        except Exception as e:
+            self.event_bus.post(
+                "retranscribe_error", f"Re-transcription failed: {e}",
+                coalesce=False)
+
     def _show_about(self):
         """Show about dialog"""
         about_window = UIHelper.create_modal_window(
@@ -636,9 +972,17 @@ class MainApplication:
         ctk.CTkButton(
             about_window,
             text="Close",
-            command=about_window.destroy
+            command=lambda: UIHelper.close_window(about_window)
         ).pack(pady=5)
 
+    def _on_profile_saved(self, path):
+        """Tell the user where the captured profile was written"""
+        if path:
+            UIHelper.show_notification(
+                self.root, f"Profile saved to {path}", duration=4000)
+        else:
+            UIHelper.show_error(self.root, "The profile could not be saved.")
+
     def _show_error_window(self, message):
         """Show error message"""
         UIHelper.show_error(self.root, message)
@@ -706,7 +1050,7 @@ class MainApplication:
         open_config_button = ctk.CTkButton(
             btn_frame,
             text="Open Settings",
-            command=lambda: (error_window.destroy(),
+            command=lambda: (UIHelper.close_window(error_window),
                              self._open_config_window()),
             width=120
         )
@@ -715,7 +1059,7 @@ class MainApplication:
         ok_button = ctk.CTkButton(
             btn_frame,
             text="OK",
-            command=error_window.destroy,
+            command=lambda: UIHelper.close_window(error_window),
             width=80
         )
         ok_button.pack(side=ctk.RIGHT, padx=20)
@@ -762,5 +1106,10 @@ class MainApplication:
 
     def _on_close(self):
         """Handle window close event - fully exit the application"""
+        if self.control_server:
+            self.control_server.stop()
+        self.audio_recorder.close()
+        self.transcription_service.async_core.close()
+        self.usage_ledger.close()
         self.config_manager.save_config(self.config)
         self.root.quit()
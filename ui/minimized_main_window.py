@@ -1,5 +1,7 @@
 import customtkinter as ctk
 
+from ui.level_meter import LevelMeter
+
 
 class MinimizedMainWindow:
     """Minimized window that shows recording status"""
@@ -20,7 +22,7 @@ class MinimizedMainWindow:
         # Create the window
         self.window = ctk.CTkToplevel(master)
         self.window.title("Too Lazy to Type - Status")
-        self.window.geometry("300x180")
+        self.window.geometry("300x215")
         self.window.resizable(False, False)
         self.window.withdraw()  # Hide initially
 
@@ -69,6 +71,10 @@ class MinimizedMainWindow:
         )
         self.status_text.pack(side=ctk.LEFT)
 
+        # Input level meter
+        self.level_meter = LevelMeter(self.main_frame, width=220, height=24)
+        self.level_meter.canvas.pack(pady=(0, 5))
+
         # Transcription status
         self.transcription_status = ctk.CTkLabel(
             self.main_frame,
@@ -114,6 +120,22 @@ class MinimizedMainWindow:
             self.status_indicator.configure(text="⚫", text_color="gray")
             self.status_text.configure(text="Not Recording")
 
+    def update_level(self, level):
+        """
+        Push the latest input level to the meter
+
+        Args:
+            level: Tuple of (rms, peak) normalized to 0..1
+        """
+        # Skip drawing while the window is hidden
+        if self.window.state() == "withdrawn":
+            return
+        self.level_meter.push(level)
+
+    def reset_level(self):
+        """Clear the input level meter"""
+        self.level_meter.reset()
+
     def update_transcription_status(self, is_transcribing, message=""):
         """
         Update the transcription status display
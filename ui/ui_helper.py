@@ -1,124 +1,228 @@
+from collections import deque
+
 import customtkinter as ctk
 
 
 class UIHelper:
     """Helper class for common UI operations"""
 
+    # Maximum number of hidden windows kept per parent and dialog kind
+    POOL_SIZE = 2
+
+    _window_pool = {}
+    _toasts = {}
+    _geometry_cache = {}
+
     @staticmethod
     def create_modal_window(parent, title, size="400x200"):
-        """Create a modal window"""
-        window = ctk.CTkToplevel(parent)
+        """Create a modal window, reusing a pooled one when available"""
+        window, is_new = UIHelper._acquire_window(parent, title, size)
+
+        # Swap out the content left over from the previous use
+        if not is_new:
+            for child in window.winfo_children():
+                child.destroy()
+
+        return window
+
+    @staticmethod
+    def close_window(window):
+        """Hide a modal window and return it to the pool for reuse"""
+        window.grab_release()
+        window.withdraw()
+
+        pool = UIHelper._window_pool.setdefault(window.pool_key, [])
+        if window in pool:
+            return
+        if len(pool) < UIHelper.POOL_SIZE:
+            pool.append(window)
+        else:
+            window.destroy()
+
+    @staticmethod
+    def _acquire_window(parent, title, size, kind=None):
+        """
+        Get a hidden window from the pool or create a new one
+
+        Returns:
+            Tuple of (window, is_new)
+        """
+        # Key by widget path so the pool never keeps a parent alive
+        pool_key = (str(parent), kind)
+        pool = UIHelper._window_pool.setdefault(pool_key, [])
+
+        window = None
+        while pool and window is None:
+            candidate = pool.pop()
+            # Pooled windows die with their parent
+            if candidate.winfo_exists():
+                window = candidate
+
+        is_new = window is None
+        if is_new:
+            window = ctk.CTkToplevel(parent)
+            window.pool_key = pool_key
+            window.protocol("WM_DELETE_WINDOW",
+                            lambda: UIHelper.close_window(window))
+        else:
+            window.deiconify()
+
         window.title(title)
-        window.geometry(size)
+        window.geometry(UIHelper._center_geometry(window, size))
         window.grab_set()  # Make the window modal
 
-        # Center the window
-        window.update_idletasks()
-        width, height = map(int, size.split('x'))
-        x = (window.winfo_screenwidth() // 2) - (width // 2)
-        y = (window.winfo_screenheight() // 2) - (height // 2)
-        window.geometry(f"{width}x{height}+{x}+{y}")
+        return window, is_new
 
-        return window
+    @staticmethod
+    def _center_geometry(window, size):
+        """Get the geometry string that centers a window of the given size"""
+        geometry = UIHelper._geometry_cache.get(size)
+        if geometry is None:
+            width, height = map(int, size.split('x'))
+            x = (window.winfo_screenwidth() // 2) - (width // 2)
+            y = (window.winfo_screenheight() // 2) - (height // 2)
+            geometry = f"{width}x{height}+{x}+{y}"
+            UIHelper._geometry_cache[size] = geometry
+        return geometry
 
     @staticmethod
     def show_notification(parent, message, duration=1000):
-        """Show a temporary notification"""
-        notification = ctk.CTkToplevel(parent)
-        notification.geometry("200x50")
-        notification.overrideredirect(True)  # Remove window decorations
-        notification.attributes("-topmost", True)
-
-        # Center the notification
-        notification.update_idletasks()
-        width = notification.winfo_width()
-        height = notification.winfo_height()
-        x = (notification.winfo_screenwidth() // 2) - (width // 2)
-        y = (notification.winfo_screenheight() // 2) - (height // 2)
-        notification.geometry(f"{width}x{height}+{x}+{y}")
-
-        # Add notification text
-        ctk.CTkLabel(notification, text=message).pack(
-            expand=True, fill=ctk.BOTH)
-
-        # Auto close after specified duration
-        notification.after(duration, notification.destroy)
+        """Queue a temporary notification, shown one after another"""
+        toast = UIHelper._toasts.get(str(parent))
+
+        if toast is None or not toast["window"].winfo_exists():
+            window = ctk.CTkToplevel(parent)
+            window.overrideredirect(True)  # Remove window decorations
+            window.attributes("-topmost", True)
+            window.withdraw()
+
+            label = ctk.CTkLabel(window, text="")
+            label.pack(expand=True, fill=ctk.BOTH)
+
+            toast = {
+                "window": window,
+                "label": label,
+                "queue": deque(),
+                "active": False
+            }
+            UIHelper._toasts[str(parent)] = toast
+
+        toast["queue"].append((message, duration))
+        if not toast["active"]:
+            UIHelper._show_next_toast(toast)
+
+    @staticmethod
+    def _show_next_toast(toast):
+        """Show the next queued notification or hide the toast window"""
+        window = toast["window"]
+        if not window.winfo_exists():
+            return
+
+        if not toast["queue"]:
+            toast["active"] = False
+            window.withdraw()
+            return
+
+        message, duration = toast["queue"].popleft()
+        toast["active"] = True
+        toast["label"].configure(text=message)
+        window.geometry(UIHelper._center_geometry(window, "200x50"))
+        window.deiconify()
+        window.lift()
+
+        # Auto advance after specified duration
+        window.after(duration, lambda: UIHelper._show_next_toast(toast))
 
     @staticmethod
     def show_confirmation(parent, message, on_confirm, on_cancel=None, title="Confirm"):
         """Show a confirmation dialog"""
-        confirm = UIHelper.create_modal_window(parent, title, "350x150")
-
-        # Add confirmation message
-        ctk.CTkLabel(
-            confirm,
-            text=message,
-            font=("Roboto", 14)
-        ).pack(pady=20)
-
-        # Button frame
-        btn_frame = ctk.CTkFrame(confirm, fg_color="transparent")
-        btn_frame.pack(pady=10, fill=ctk.X)
-
-        # Yes button
-        def confirm_action():
-            if on_confirm:
-                on_confirm()
-            confirm.destroy()
-
-        ctk.CTkButton(
-            btn_frame,
-            text="Yes",
-            command=confirm_action,
-            fg_color="#d32f2f",
-            hover_color="#b71c1c"
-        ).pack(side=ctk.LEFT, padx=20, pady=5, expand=True)
-
-        # No button
-        def cancel_action():
-            if on_cancel:
-                on_cancel()
-            confirm.destroy()
-
-        ctk.CTkButton(
-            btn_frame,
-            text="No",
-            command=cancel_action
-        ).pack(side=ctk.RIGHT, padx=20, pady=5, expand=True)
+        confirm, is_new = UIHelper._acquire_window(
+            parent, title, "350x150", kind="confirm")
+
+        # Callbacks are read from the window when clicked, so a reused
+        # dialog only needs its message and callbacks swapped
+        confirm.on_confirm = on_confirm
+        confirm.on_cancel = on_cancel
+
+        if is_new:
+            # Add confirmation message
+            confirm.message_label = ctk.CTkLabel(
+                confirm,
+                text="",
+                font=("Roboto", 14)
+            )
+            confirm.message_label.pack(pady=20)
+
+            # Button frame
+            btn_frame = ctk.CTkFrame(confirm, fg_color="transparent")
+            btn_frame.pack(pady=10, fill=ctk.X)
+
+            # Yes button
+            def confirm_action():
+                if confirm.on_confirm:
+                    confirm.on_confirm()
+                UIHelper.close_window(confirm)
+
+            ctk.CTkButton(
+                btn_frame,
+                text="Yes",
+                command=confirm_action,
+                fg_color="#d32f2f",
+                hover_color="#b71c1c"
+            ).pack(side=ctk.LEFT, padx=20, pady=5, expand=True)
+
+            # No button
+            def cancel_action():
+                if confirm.on_cancel:
+                    confirm.on_cancel()
+                UIHelper.close_window(confirm)
+
+            ctk.CTkButton(
+                btn_frame,
+                text="No",
+                command=cancel_action
+            ).pack(side=ctk.RIGHT, padx=20, pady=5, expand=True)
+
+        confirm.message_label.configure(text=message)
 
     @staticmethod
     def show_error(parent, message, title="Error"):
         """Show an error dialog"""
-        error_window = UIHelper.create_modal_window(parent, title, "400x180")
-
-        # Error icon frame
-        icon_frame = ctk.CTkFrame(error_window, fg_color="transparent")
-        icon_frame.pack(pady=(15, 5))
-
-        # Error symbol
-        error_symbol = ctk.CTkLabel(
-            icon_frame,
-            text="⚠️",
-            font=("Arial", 24)
-        )
-        error_symbol.pack()
-
-        # Error message with wrapping
-        ctk.CTkLabel(
-            error_window,
-            text=message,
-            wraplength=350,
-            font=("Arial", 12)
-        ).pack(padx=20, pady=10)
-
-        # Buttons frame
-        btn_frame = ctk.CTkFrame(error_window, fg_color="transparent")
-        btn_frame.pack(pady=10, fill=ctk.X)
-
-        # OK button
-        ctk.CTkButton(
-            btn_frame,
-            text="OK",
-            command=error_window.destroy,
-            width=100
-        ).pack(pady=5)
+        error_window, is_new = UIHelper._acquire_window(
+            parent, title, "400x180", kind="error")
+
+        if is_new:
+            # Error icon frame
+            icon_frame = ctk.CTkFrame(error_window, fg_color="transparent")
+            icon_frame.pack(pady=(15, 5))
+
+            # Error symbol
+            error_symbol = ctk.CTkLabel(
+                icon_frame,
+                text="⚠️",
+                font=("Arial", 24)
+            )
+            error_symbol.pack()
+
+            # Error message with wrapping
+            error_window.message_label = ctk.CTkLabel(
+                error_window,
+                text="",
+                wraplength=350,
+                font=("Arial", 12)
+            )
+            error_window.message_label.pack(padx=20, pady=10)
+
+            # Buttons frame
+            btn_frame = ctk.CTkFrame(error_window, fg_color="transparent")
+            btn_frame.pack(pady=10, fill=ctk.X)
+
+            # OK button
+            ctk.CTkButton(
+                btn_frame,
+                text="OK",
+                command=lambda: UIHelper.close_window(error_window),
+                width=100
+            ).pack(pady=5)
+
+        error_window.message_label.configure(text=message)
@@ -0,0 +1,124 @@
+import pyaudio
+
+# Label of the system default device in the settings
+DEFAULT_DEVICE_LABEL = "System default"
+
+
+def _input_devices(p):
+    """Input devices of the default host API (others list the same hardware)"""
+    host_api = p.get_default_host_api_info()["index"]
+    for index in range(p.get_device_count()):
+        info = p.get_device_info_by_index(index)
+        if info["maxInputChannels"] > 0 and info["hostApi"] == host_api:
+            yield info
+
+
+def list_input_devices():
+    """
+    Enumerate the input devices
+
+    Returns:
+        List of dictionaries with 'name', 'rate' and 'channels'
+    """
+    p = pyaudio.PyAudio()
+    try:
+        return [{"name": info["name"],
+                 "rate": int(info["defaultSampleRate"]),
+                 "channels": info["maxInputChannels"]}
+                for info in _input_devices(p)]
+    finally:
+        p.terminate()
+
+
+class InputDevice:
+    """Opens the configured input device at its native rate and channels
+
+    The device is looked up by name once and cached with its PyAudio
+    instance, so later recordings open it without enumerating again. When
+    it cannot be opened (unplugged, or its index changed after a hot-plug)
+    PortAudio is re-initialized to see the current devices and the open
+    is retried.
+    """
+
+    # Captured channels are mixed down in the app, more are never needed
+    MAX_CHANNELS = 2
+
+    def __init__(self, name=None):
+        """
+        Initialize the device
+
+        Args:
+            name: Device name as listed by list_input_devices, None for the
+                system default
+        """
+        self.name = name
+        self._pyaudio = None
+        self._info = None
+        # Set while the default device stands in for a missing one
+        self._substituted = False
+
+    def open(self, chunk_seconds):
+        """
+        Open an input stream in the device's native format
+
+        Args:
+            chunk_seconds: Duration of one stream read
+
+        Returns:
+            Tuple of (stream, rate, channels, frames per read)
+
+        Raises:
+            OSError: When no input device can be opened
+        """
+        # A device missing last time may be back
+        if self._substituted:
+            self.rescan()
+
+        for attempt in range(2):
+            try:
+                info = self._resolve()
+                rate = int(info["defaultSampleRate"])
+                channels = min(self.MAX_CHANNELS, info["maxInputChannels"])
+                frames = max(1, int(rate * chunk_seconds))
+                stream = self._pyaudio.open(format=pyaudio.paInt16,
+                                            channels=channels,
+                                            rate=rate,
+                                            frames_per_buffer=frames,
+                                            input=True,
+                                            input_device_index=info["index"])
+                return stream, rate, channels, frames
+            except (OSError, ValueError) as e:
+                if attempt:
+                    raise OSError(f"No usable input device: {e}") from e
+                print(f"Could not open input device, rescanning devices: {e}")
+                self.rescan()
+
+    def rescan(self):
+        """Forget the cached device and re-initialize PortAudio"""
+        self._info = None
+        self._substituted = False
+        if self._pyaudio:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+    def close(self):
+        """Release PortAudio"""
+        self.rescan()
+
+    def _resolve(self):
+        """Get the cached device info, looking it up if needed"""
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        if self._info is None:
+            self._info = self._find()
+        return self._info
+
+    def _find(self):
+        """Find the configured device, or the default one"""
+        if self.name:
+            for info in _input_devices(self._pyaudio):
+                if info["name"] == self.name:
+                    return info
+            print(f"Input device '{self.name}' not found, using the default device")
+            self._substituted = True
+        return self._pyaudio.get_default_input_device_info()
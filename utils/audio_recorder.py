@@ -1,21 +1,155 @@
-import customtkinter as ctk
+import numpy as np
+import os
 import pyaudio
+import tempfile
+import time
 import wave
 import threading
 
+from utils.audio_devices import InputDevice
+from utils.audio_utils import StreamResampler
+from utils.capture_process import CaptureProcess
+from utils.endpoint_detector import EndpointDetector
+from utils.wav_encoder import WavEncoder
+
 
 class AudioRecorder:
     """Handles audio recording functionality"""
 
-    def __init__(self):
+    # Format of the recorded file and of every consumer of the chunks. The
+    # device is captured in its own format and converted to this one.
+    CHUNK = 1024
+    CHANNELS = 1
+    RATE = 44100
+
+    # How often captured audio is collected from the capture process
+    DRAIN_INTERVAL = 0.02
+
+    def __init__(self, capture_mode="thread", diagnostics=None, input_device=None):
+        """
+        Initialize the recorder
+
+        Args:
+            capture_mode: 'thread' reads the stream in a thread of this
+                process, 'process' reads it in a child process so capture
+                timing does not depend on the GIL
+            diagnostics: Optional Diagnostics recording the post-stop
+                encode time
+            input_device: Input device name, None for the system default
+        """
         self.recording = False
         self.frames = []
+        self.diagnostics = diagnostics
+
+        # Encodes the recording to disk while it is being captured
+        self._encoder = None
+
+        # File of the current recording, unique so a previous dictation
+        # still reading its own file is never overwritten
+        self._filename = None
+
+        # Optional end-of-speech detection and its callback
+        self._endpoint_detector = None
+        self._on_end_of_speech = None
+
+        # Optional consumer of the raw chunks, e.g. a streamed upload
+        self._on_chunk = None
+
+        self.capture_mode = capture_mode
+        self.device_name = input_device
+        self.input_device = InputDevice(input_device)
+        self.capture_process = None
+        self._start_capture_process()
+
+        # Highest levels seen since the UI last read them
+        self._level_rms = 0.0
+        self._level_peak = 0.0
+
+    def set_input_device(self, name):
+        """
+        Use another input device from the next recording on
+
+        Args:
+            name: Device name, None for the system default
+        """
+        self.device_name = name
+        if not self.recording:
+            self._apply_input_device()
+
+    def _apply_input_device(self):
+        """Switch to the configured device if it changed (not while recording)"""
+        if self.device_name == self.input_device.name:
+            return
+        self.input_device.close()
+        self.input_device = InputDevice(self.device_name)
+        if self.capture_process:
+            self.capture_process.close()
+            self.capture_process = None
+            self._start_capture_process()
+
+    def _start_capture_process(self):
+        """Start the child process of the 'process' capture mode"""
+        if self.capture_mode != "process":
+            return
+        try:
+            self.capture_process = CaptureProcess(
+                self.RATE, self.CHANNELS, self.CHUNK,
+                device_name=self.input_device.name)
+        except Exception as e:
+            print(f"Capture process unavailable, using a thread: {e}")
+
+    def start_recording(self, filename=None, on_end_of_speech=None,
+                        trailing_silence_ms=1500, on_chunk=None):
+        """
+        Start recording audio
+
+        Args:
+            filename: WAV file the audio is encoded to while recording,
+                defaults to a new temporary file. The caller deletes it with
+                delete_recording once the dictation is finished.
+            on_end_of_speech: Optional function called once, from the capture
+                thread, when speech is followed by trailing_silence_ms of
+                silence. It must not wait for the recording to stop.
+            trailing_silence_ms: Silence that ends the speech
+            on_chunk: Optional function called with each captured PCM chunk,
+                from the capture thread. It must return immediately.
+
+        Returns:
+            The capture thread
+
+        Raises:
+            OSError: When no input device can be opened, nothing is recorded
+        """
+        self._apply_input_device()
+
+        # The device is opened here, so a failure reaches the caller
+        capture = self.capture_process
+        if capture and capture.is_alive():
+            capture.start()
+            target, args = self._record_from_process, (capture,)
+        else:
+            target, args = self._record_audio, self.input_device.open(
+                self.CHUNK / self.RATE)
 
-    def start_recording(self):
-        """Start recording audio"""
         self.recording = True
         self.frames = []
-        thread = threading.Thread(target=self._record_audio)
+        self._level_rms = 0.0
+        self._level_peak = 0.0
+        self._on_end_of_speech = on_end_of_speech
+        self._on_chunk = on_chunk
+        self._endpoint_detector = EndpointDetector(
+            self.RATE, trailing_silence_ms) if on_end_of_speech else None
+        filename = filename or self._create_file()
+        self._filename = filename
+        try:
+            self._encoder = WavEncoder(
+                filename, self.CHANNELS,
+                pyaudio.get_sample_size(pyaudio.paInt16), self.RATE)
+        except OSError as e:
+            # save_audio writes the whole file after the recording instead
+            print(f"Could not open {filename} for encoding: {e}")
+            self._encoder = None
+        thread = threading.Thread(target=target, args=args)
         thread.start()
         return thread
 
@@ -23,43 +157,152 @@ class AudioRecorder:
         """Stop recording audio"""
         self.recording = False
 
-    def _record_audio(self):
-        """Internal method to record audio"""
-        chunk = 1024
-        sample_format = pyaudio.paInt16
-        channels = 1
-        fs = 44100
+    def close(self):
+        """Release the capture process, if any, and the input device"""
+        if self.capture_process:
+            self.capture_process.close()
+            self.capture_process = None
+        self.input_device.close()
+
+    def _record_audio(self, stream, rate, channels, frames):
+        """Read the opened input stream until recording stops"""
+        device = self.input_device
+        resampler = StreamResampler(rate, self.RATE, channels)
 
-        p = pyaudio.PyAudio()
-        stream = p.open(format=sample_format,
-                        channels=channels,
-                        rate=fs,
-                        frames_per_buffer=chunk,
-                        input=True)
+        lost = False
+        try:
+            while self.recording:
+                data = resampler.process(
+                    stream.read(frames, exception_on_overflow=False))
+                self._add_chunk(data)
+                self._update_level(data)
+        except OSError as e:
+            print(f"Input device lost: {e}")
+            lost = True
 
+        try:
+            stream.stop_stream()
+            stream.close()
+        except OSError:
+            pass
+        if lost:
+            # Looked up again when the next recording starts
+            device.rescan()
+
+    def _record_from_process(self, capture):
+        """Collect audio from the started capture process until recording stops"""
         while self.recording:
-            data = stream.read(chunk)
-            self.frames.append(data)
+            time.sleep(self.DRAIN_INTERVAL)
+            self._collect(capture)
+
+        if not capture.stop():
+            print("Capture process did not stop in time")
+        self._collect(capture)
+
+    def _collect(self, capture):
+        """Append the audio available in the capture ring to the frames"""
+        for view in capture.read_available():
+            # Levels are computed on the shared memory itself. The chunk is
+            # then copied once, since the ring slot is reused: that copy is
+            # what the frames, the encoder and the chunk consumer share.
+            self._update_level(view)
+            self._add_chunk(bytes(view))
+            view.release()
+
+    def _add_chunk(self, data):
+        """Keep a captured chunk and hand it to the encoder"""
+        self.frames.append(data)
+        if self._encoder:
+            self._encoder.feed(data)
+        if self._on_chunk:
+            self._on_chunk(data)
+        if self._endpoint_detector and self._endpoint_detector.feed(data):
+            self._on_end_of_speech()
+
+    def _update_level(self, data):
+        """Keep the highest RMS and peak level of the captured chunks"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        if not samples.size:
+            return
+
+        peak = max(int(samples.max()), -int(samples.min())) / 32768
+        rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float32)))) / 32768
+
+        # Plain attribute writes, the capture thread never waits on the UI
+        if rms > self._level_rms:
+            self._level_rms = rms
+        if peak > self._level_peak:
+            self._level_peak = peak
+
+    def get_level(self):
+        """
+        Get the input level since the last call and reset it
+
+        Returns:
+            Tuple of (rms, peak) normalized to 0..1
+        """
+        level = (self._level_rms, self._level_peak)
+        self._level_rms = 0.0
+        self._level_peak = 0.0
+        return level
+
+    def save_audio(self, filename=None):
+        """
+        Finish the recorded audio file
 
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        The file is normally already encoded during the recording, so this
+        only writes the last chunks and the final header.
 
-    def save_audio(self, filename="recording.wav"):
-        """Save recorded audio to file"""
+        Args:
+            filename: Path of the WAV file, defaults to the one given to
+                start_recording
+
+        Returns:
+            The filename, or None if nothing was recorded
+        """
+        start_time = time.perf_counter()
+        encoder, self._encoder = self._encoder, None
+        recorded_file, self._filename = self._filename, None
+        encoded_file = encoder.finish() if encoder else None
+
+        # An abandoned file is still being written and deleted by its encoder
+        abandoned = encoder is not None and encoder.abandoned
         if not self.frames:
+            if recorded_file and not abandoned:
+                self.delete_recording(recorded_file)
             return None
 
-        chunk = 1024
-        sample_format = pyaudio.paInt16
-        channels = 1
-        fs = 44100
+        filename = filename or recorded_file or self._create_file()
+        if encoded_file != filename:
+            if abandoned and filename == encoder.filename:
+                filename = self._create_file()
+            self._write_wav(filename)
+
+        if self.diagnostics:
+            self.diagnostics.record_timing(
+                "audio_encode", time.perf_counter() - start_time)
+        return filename
+
+    @staticmethod
+    def delete_recording(filename):
+        """Delete a recording file once its dictation is finished"""
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
 
+    @staticmethod
+    def _create_file():
+        """Create an empty, uniquely named WAV file for a recording"""
+        handle, filename = tempfile.mkstemp(prefix="tltt_rec_", suffix=".wav")
+        os.close(handle)
+        return filename
+
+    def _write_wav(self, filename):
+        """Write all recorded frames to a WAV file at once"""
         wf = wave.open(filename, 'wb')
-        wf.setnchannels(channels)
-        wf.setsampwidth(pyaudio.get_sample_size(sample_format))
-        wf.setframerate(fs)
+        wf.setnchannels(self.CHANNELS)
+        wf.setsampwidth(pyaudio.get_sample_size(pyaudio.paInt16))
+        wf.setframerate(self.RATE)
         wf.writeframes(b''.join(self.frames))
         wf.close()
-
-        return filename
@@ -0,0 +1,182 @@
+import wave
+
+import numpy as np
+
+
+def to_mono(samples, channels):
+    """
+    Mix interleaved samples down to one channel
+
+    Args:
+        samples: 1-D array of interleaved samples
+        channels: Number of interleaved channels
+
+    Returns:
+        1-D float32 array
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if channels <= 1:
+        return samples
+    usable = len(samples) - len(samples) % channels
+    return samples[:usable].reshape(-1, channels).mean(axis=1)
+
+
+def _lowpass_kernel(cutoff, taps=63):
+    """Windowed-sinc low-pass kernel, cutoff as a fraction of the sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def resample(samples, src_rate, dst_rate):
+    """
+    Resample a mono signal
+
+    Downsampling first applies a low-pass filter to avoid aliasing, then
+    the signal is linearly interpolated onto the new time grid. Both steps
+    run as single numpy operations over the whole buffer.
+
+    Args:
+        samples: 1-D array of samples
+        src_rate: Sample rate of the input
+        dst_rate: Wanted sample rate
+
+    Returns:
+        1-D float32 array at dst_rate
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if src_rate == dst_rate or not len(samples):
+        return samples
+
+    if dst_rate < src_rate:
+        kernel = _lowpass_kernel(0.5 * dst_rate / src_rate)
+        samples = np.convolve(samples, kernel, mode="same")
+
+    duration = len(samples) / src_rate
+    dst_length = max(1, int(round(duration * dst_rate)))
+    src_times = np.arange(len(samples), dtype=np.float64) / src_rate
+    dst_times = np.arange(dst_length, dtype=np.float64) / dst_rate
+    return np.interp(dst_times, src_times, samples).astype(np.float32)
+
+
+class StreamResampler:
+    """
+    Converts captured chunks to mono at another rate, chunk by chunk
+
+    Same filter and interpolation as resample(), with the filter history and
+    the interpolation position carried from one chunk to the next so the
+    output has no seams. Each chunk is processed with whole-array numpy
+    operations.
+    """
+
+    def __init__(self, src_rate, dst_rate, channels=1, taps=63):
+        """
+        Initialize the resampler
+
+        Args:
+            src_rate: Sample rate of the captured audio
+            dst_rate: Wanted sample rate
+            channels: Number of interleaved channels in the captured audio
+            taps: Length of the anti-aliasing filter
+        """
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.channels = channels
+        self.passthrough = src_rate == dst_rate and channels == 1
+        self._step = src_rate / dst_rate
+
+        self._kernel = None
+        self._history = np.zeros(0, dtype=np.float32)
+        if dst_rate < src_rate:
+            self._kernel = _lowpass_kernel(0.5 * dst_rate / src_rate, taps)
+            self._history = np.zeros(taps - 1, dtype=np.float32)
+
+        # Filtered samples not consumed yet, and the position of the next
+        # output sample within them
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._position = 0.0
+
+    def process(self, data):
+        """
+        Convert one chunk
+
+        Args:
+            data: Interleaved 16-bit PCM bytes
+
+        Returns:
+            Mono 16-bit PCM bytes at dst_rate
+        """
+        if self.passthrough:
+            return bytes(data)
+
+        samples = to_mono(np.frombuffer(data, dtype=np.int16), self.channels)
+        if self._kernel is not None:
+            padded = np.concatenate((self._history, samples))
+            samples = np.convolve(padded, self._kernel, mode="valid")
+            self._history = padded[len(padded) - len(self._history):]
+
+        buffer = np.concatenate((self._pending, samples))
+        last = len(buffer) - 1
+        if last < self._position:
+            self._pending = buffer
+            return b""
+
+        count = int((last - self._position) // self._step) + 1
+        times = self._position + np.arange(count, dtype=np.float64) * self._step
+        output = np.interp(times, np.arange(len(buffer), dtype=np.float64), buffer)
+
+        # Keep the samples the next output still interpolates from
+        next_position = self._position + count * self._step
+        consumed = min(int(next_position), len(buffer))
+        self._pending = buffer[consumed:]
+        self._position = next_position - consumed
+        return to_int16(output).tobytes()
+
+
+def to_int16(samples):
+    """Convert float samples in int16 scale to clipped int16"""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+def read_wav(path):
+    """
+    Read a PCM WAV file
+
+    Returns:
+        Tuple of (mono float32 samples in int16 scale, sample rate)
+    """
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        rate = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype=np.int16)
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype=np.int32).astype(np.float32) / 65536
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    return to_mono(samples, channels), rate
+
+
+def write_wav(path, samples, rate):
+    """
+    Write mono 16-bit PCM samples to a WAV file
+
+    Args:
+        path: Output file path
+        samples: int16 array (or float array in int16 scale)
+        rate: Sample rate
+    """
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(to_int16(samples).tobytes())
@@ -0,0 +1,205 @@
+import atexit
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# The ring starts with the total number of bytes ever written (uint64)
+HEADER_SIZE = 8
+
+
+def _capture_main(shm_name, capacity, rate, channels, chunk, device_name,
+                  record_event, idle_event, exit_event, opened_event, failed_event):
+    """
+    Child process loop, opens the stream while record_event is set
+
+    The device is opened at its native format and converted to rate and
+    channels here, so the ring always holds the upload format. Whether it
+    could be opened is reported through opened_event or failed_event.
+    The stream and its PortAudio instance live only in the child, the main
+    process still imports PyAudio (device list, thread mode fallback).
+    """
+    from utils.audio_devices import InputDevice
+    from utils.audio_utils import StreamResampler
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    write_pos = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf[:HEADER_SIZE])
+    ring = shm.buf[HEADER_SIZE:HEADER_SIZE + capacity]
+
+    device = InputDevice(device_name)
+    try:
+        while not exit_event.is_set():
+            if not record_event.wait(0.5):
+                continue
+
+            try:
+                stream, device_rate, device_channels, frames = device.open(
+                    chunk / rate)
+            except OSError as e:
+                print(f"Could not open the input device: {e}")
+                record_event.clear()
+                failed_event.set()
+                idle_event.set()
+                continue
+            opened_event.set()
+            resampler = StreamResampler(device_rate, rate, device_channels)
+            lost = False
+            try:
+                while record_event.is_set():
+                    data = memoryview(resampler.process(stream.read(
+                        frames, exception_on_overflow=False)))
+                    size = len(data)
+                    start = int(write_pos[0]) % capacity
+                    first = min(size, capacity - start)
+                    ring[start:start + first] = data[:first]
+                    if first < size:
+                        ring[:size - first] = data[first:]
+                    # Publish the chunk only once it is fully written
+                    write_pos[0] += size
+            except OSError as e:
+                print(f"Input device lost: {e}")
+                lost = True
+            finally:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                except OSError:
+                    pass
+                idle_event.set()
+            if lost:
+                # Looked up again when the next recording starts
+                device.rescan()
+    finally:
+        device.close()
+        del write_pos
+        ring.release()
+        shm.close()
+
+
+class CaptureProcess:
+    """Runs the PyAudio input stream in a child process
+
+    Stream reads then never wait for the main process's GIL. The audio
+    crosses over through a shared-memory ring, which the main process reads
+    as memoryviews. The recorder copies each chunk once into its frames.
+    """
+
+    def __init__(self, rate=44100, channels=1, chunk=1024, buffer_seconds=30,
+                 device_name=None):
+        """
+        Start the capture process, it stays idle until start() is called
+
+        Args:
+            rate: Sample rate in Hz
+            channels: Number of channels in the ring (captured audio is
+                mixed down to mono)
+            chunk: Frames per stream read
+            buffer_seconds: Audio the ring holds before unread data is lost
+            device_name: Input device name, None for the system default
+        """
+        # Whole samples only, so a wrap never splits one
+        self.capacity = rate * channels * 2 * buffer_seconds
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=HEADER_SIZE + self.capacity)
+        self._write_pos = np.ndarray(
+            (1,), dtype=np.uint64, buffer=self._shm.buf[:HEADER_SIZE])
+        self._write_pos[0] = 0
+        self._ring = self._shm.buf[HEADER_SIZE:HEADER_SIZE + self.capacity]
+        self._read_pos = 0
+
+        self._record_event = multiprocessing.Event()
+        self._idle_event = multiprocessing.Event()
+        self._idle_event.set()
+        self._exit_event = multiprocessing.Event()
+        self._opened_event = multiprocessing.Event()
+        self._failed_event = multiprocessing.Event()
+
+        self._process = multiprocessing.Process(
+            target=_capture_main,
+            args=(self._shm.name, self.capacity, rate, channels, chunk,
+                  device_name, self._record_event, self._idle_event, self._exit_event,
+                  self._opened_event, self._failed_event),
+            daemon=True
+        )
+        self._process.start()
+        atexit.register(self.close)
+
+    def start(self, timeout=2.0):
+        """
+        Open the stream in the child and skip any audio left in the ring
+
+        Raises:
+            OSError: When the child could not open the input device
+        """
+        self._read_pos = int(self._write_pos[0])
+        self._opened_event.clear()
+        self._failed_event.clear()
+        self._idle_event.clear()
+        self._record_event.set()
+
+        # Wait for the child to report the outcome of opening the device
+        deadline = time.monotonic() + timeout
+        while not self._opened_event.wait(0.01):
+            if self._failed_event.is_set():
+                raise OSError("No usable input device")
+            if time.monotonic() >= deadline or not self.is_alive():
+                self.stop()
+                raise OSError("The capture process did not open the input device")
+
+    def stop(self, timeout=2.0):
+        """
+        Close the stream in the child
+
+        Returns:
+            True once the child has written its last chunk
+        """
+        self._record_event.clear()
+        return self._idle_event.wait(timeout)
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def read_available(self):
+        """
+        Get the audio written since the last call as views into the ring
+
+        The views point into the ring and are only valid until the child
+        wraps around to them, consume them right away.
+
+        Returns:
+            List of one or two memoryviews (two when the data wraps)
+        """
+        written = int(self._write_pos[0])
+        available = written - self._read_pos
+        if available > self.capacity:
+            print(f"Capture ring overrun, "
+                  f"{available - self.capacity} bytes of audio lost")
+            self._read_pos = written - self.capacity
+            available = self.capacity
+        if available <= 0:
+            return []
+
+        start = self._read_pos % self.capacity
+        end = start + available
+        self._read_pos = written
+        if end <= self.capacity:
+            return [self._ring[start:end]]
+        return [self._ring[start:], self._ring[:end - self.capacity]]
+
+    def close(self):
+        """Stop the child process and free the shared memory"""
+        if self._shm is None:
+            return
+
+        self._exit_event.set()
+        self._record_event.clear()
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+
+        del self._write_pos
+        self._ring.release()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
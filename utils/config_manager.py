@@ -14,7 +14,9 @@ class ConfigManager:
             "record_hotkey": "ctrl+shift",
             "record_mode": "hold",
             "history": [],
-            "stt_model": "gpt-4o-mini-transcribe"
+            "stt_model": "gpt-4o-mini-transcribe",
+            "text_replacements": {},
+            "voice_commands": {}
         }
 
     def load_config(self):
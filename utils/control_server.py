@@ -0,0 +1,178 @@
+import hmac
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.multipart import RequestTooLarge, read_request_body
+
+
+class ControlServer:
+    """Localhost HTTP API to control recording and stream results (SSE)"""
+
+    KEEPALIVE_SECONDS = 15
+    SUBSCRIBER_QUEUE_SIZE = 256
+
+    # Requests carry no data, a body is read and discarded up to this size
+    MAX_BODY_BYTES = 4096
+
+    def __init__(self, token, on_start, on_stop, on_toggle, get_status,
+                 host="127.0.0.1", port=47821):
+        """
+        Initialize the control server
+
+        Args:
+            token: Secret clients must send as 'Authorization: Bearer <token>'
+            on_start: Callback starting a recording, must return immediately
+            on_stop: Callback stopping a recording, must return immediately
+            on_toggle: Callback toggling recording, must return immediately
+            get_status: Function returning a JSON-serializable status dict
+            host: Interface to bind, localhost only by default
+            port: TCP port
+        """
+        self.token = token
+        self.actions = {"/start": on_start, "/stop": on_stop, "/toggle": on_toggle}
+        self.get_status = get_status
+        self.host = host
+        self.port = port
+
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._server = ThreadingHTTPServer(
+            (self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Control server listening on http://{self.host}:{self.port}")
+
+    def stop(self):
+        """Stop serving"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def publish(self, event, payload=None):
+        """
+        Push an event to every connected stream, safe to call from any thread
+
+        Args:
+            event: Event name
+            payload: JSON-serializable event data
+        """
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        message = f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode()
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # A client that stopped reading must not grow memory
+                pass
+
+    def _make_handler(self):
+        """Build the request handler class bound to this server"""
+        control = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send small responses right away
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self._has_body():
+                    self.close_connection = True
+                if self.path == "/status":
+                    self._send_json(200, control.get_status())
+                elif self.path == "/events":
+                    self._stream_events()
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                # Left on the kept-alive socket, it would be read as the
+                # next request
+                try:
+                    read_request_body(self, control.MAX_BODY_BYTES)
+                except RequestTooLarge:
+                    self.close_connection = True
+                    self._send_json(413, {"error": "body too large"})
+                    return
+                except ValueError:
+                    self.close_connection = True
+                    self._send_json(400, {"error": "malformed body"})
+                    return
+                action = control.actions.get(self.path)
+                if action is None:
+                    self._send_json(404, {"error": "not found"})
+                    return
+                action()
+                self._send_json(202, {"accepted": self.path[1:]})
+
+            def _authorized(self):
+                header = self.headers.get("Authorization", "")
+                if control.token and hmac.compare_digest(
+                        header, f"Bearer {control.token}"):
+                    return True
+                # The body of a rejected request is not read, the connection
+                # is closed instead
+                if self._has_body():
+                    self.close_connection = True
+                self._send_json(401, {"error": "unauthorized"})
+                return False
+
+            def _has_body(self):
+                return (self.headers.get("Content-Length", "0") != "0"
+                        or "Transfer-Encoding" in self.headers)
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if self.close_connection:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream_events(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                subscriber = queue.Queue(maxsize=control.SUBSCRIBER_QUEUE_SIZE)
+                with control._subscribers_lock:
+                    control._subscribers.add(subscriber)
+                try:
+                    while True:
+                        try:
+                            message = subscriber.get(
+                                timeout=control.KEEPALIVE_SECONDS)
+                        except queue.Empty:
+                            message = b": keepalive\n\n"
+                        self.wfile.write(message)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    with control._subscribers_lock:
+                        control._subscribers.discard(subscriber)
+
+            def log_message(self, format, *args):
+                # Keep the console quiet, every request would be printed
+                pass
+
+        return Handler
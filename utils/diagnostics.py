@@ -0,0 +1,103 @@
+import threading
+from collections import deque
+
+
+class Diagnostics:
+    """Collects timings and failure counts for the app's hot paths"""
+
+    def __init__(self, max_samples=200):
+        """
+        Initialize the diagnostics collector
+
+        Args:
+            max_samples: Number of recent timings kept per metric
+        """
+        self.max_samples = max_samples
+        self._timings = {}
+        self._failures = {}
+        self._last_errors = {}
+        self._lock = threading.Lock()
+
+    def record_timing(self, name, seconds):
+        """
+        Record the duration of one operation
+
+        Args:
+            name: Metric name, e.g. 'paste'
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+    def record_failure(self, name, error=None):
+        """
+        Record a failed operation
+
+        Args:
+            name: Metric name, e.g. 'paste'
+            error: Optional error or message describing the failure
+        """
+        with self._lock:
+            self._failures[name] = self._failures.get(name, 0) + 1
+            if error is not None:
+                self._last_errors[name] = str(error)
+
+    def get_stats(self, name):
+        """
+        Get statistics for a metric
+
+        Returns:
+            Dictionary with count, mean/p50/p95/p99/max in milliseconds,
+            failures and the last error
+        """
+        with self._lock:
+            samples = sorted(self._timings.get(name, ()))
+            failures = self._failures.get(name, 0)
+            last_error = self._last_errors.get(name)
+
+        if not samples:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0,
+                    "p99_ms": 0.0, "max_ms": 0.0,
+                    "failures": failures, "last_error": last_error}
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+        return {
+            "count": len(samples),
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": samples[-1] * 1000,
+            "failures": failures,
+            "last_error": last_error
+        }
+
+    def get_metric_names(self):
+        """Get the names of all metrics recorded so far"""
+        with self._lock:
+            return sorted(set(self._timings) | set(self._failures))
+
+    def summary(self):
+        """
+        Get a human readable summary of all metrics
+
+        Returns:
+            List of lines, one per metric
+        """
+        lines = []
+        for name in self.get_metric_names():
+            stats = self.get_stats(name)
+            line = (f"{name}: {stats['count']} samples, "
+                    f"mean {stats['mean_ms']:.1f} ms, "
+                    f"p95 {stats['p95_ms']:.1f} ms, "
+                    f"max {stats['max_ms']:.1f} ms, "
+                    f"{stats['failures']} failures")
+            if stats["last_error"]:
+                line += f" (last: {stats['last_error']})"
+            lines.append(line)
+        return lines
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from utils.audio_utils import read_wav, resample, write_wav
+
+DICTATIONS_DIR = os.path.join(os.getcwd(), "dictations")
+
+# Stored copies are 16 kHz mono, enough for speech and a third of the size
+STORE_RATE = 16000
+
+
+class DictationStore:
+    """Keeps the audio and word timestamps of recent dictations"""
+
+    def __init__(self, directory=DICTATIONS_DIR, max_entries=20):
+        """
+        Initialize the store
+
+        Args:
+            directory: Folder holding index.json and the audio copies
+            max_entries: Number of dictations kept, older ones are deleted
+        """
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries = self._load_index()
+
+    def add(self, text, audio_file, words=None, model=None):
+        """
+        Keep a copy of a dictation's audio
+
+        Args:
+            text: Transcript as it appears in the history
+            audio_file: Recorded WAV file
+            words: Optional list of (word, start, end) timestamps
+            model: Speech-to-text model that produced the transcript
+        """
+        if self.max_entries <= 0 or not text:
+            return
+
+        samples, rate = read_wav(audio_file)
+        entry = {
+            "id": uuid.uuid4().hex,
+            "text": text,
+            "words": [list(word) for word in words] if words else None,
+            "model": model,
+            "duration": len(samples) / rate if rate else 0.0,
+            "created": round(time.time(), 3)
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        write_wav(self._audio_path(entry), resample(samples, rate, STORE_RATE),
+                  STORE_RATE)
+
+        with self._lock:
+            self.entries.insert(0, entry)
+            removed = self.entries[self.max_entries:]
+            del self.entries[self.max_entries:]
+            self._save_index()
+
+        for old in removed:
+            self._delete_audio(old)
+
+    def get(self, text):
+        """
+        Get the most recent dictation with this transcript
+
+        Returns:
+            Copy of the entry with 'text', 'words', 'model', 'duration' and
+            'audio' (path of the stored WAV), or None
+        """
+        with self._lock:
+            for entry in self.entries:
+                if entry["text"] == text:
+                    path = self._audio_path(entry)
+                    if not os.path.exists(path):
+                        return None
+                    return dict(entry, audio=path)
+        return None
+
+    def has_audio(self, text):
+        """Check whether a transcript can be partially re-transcribed"""
+        return self.get(text) is not None
+
+    def replace(self, old_text, new_text, words=None):
+        """
+        Update the transcript (and optionally the timestamps) of a dictation
+
+        Returns:
+            True if a dictation was updated
+        """
+        with self._lock:
+            for entry in self.entries:
+                if entry["text"] == old_text:
+                    entry["text"] = new_text
+                    if words is not None:
+                        entry["words"] = [list(word) for word in words]
+                    self._save_index()
+                    return True
+        return False
+
+    def clear(self):
+        """Delete every stored dictation"""
+        with self._lock:
+            removed, self.entries = self.entries, []
+            self._save_index()
+        for entry in removed:
+            self._delete_audio(entry)
+
+    def _audio_path(self, entry):
+        return os.path.join(self.directory, f"{entry['id']}.wav")
+
+    def _delete_audio(self, entry):
+        try:
+            os.remove(self._audio_path(entry))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """Load the index, starting empty if it is missing or damaged"""
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            with open(self.index_file, "r") as file:
+                return json.load(file)
+        except (ValueError, OSError) as e:
+            print(f"Could not load the dictation store: {e}")
+            return []
+
+    def _save_index(self):
+        """Write the index to disk (caller holds the lock)"""
+        if not self.entries and not os.path.isdir(self.directory):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_file, "w") as file:
+            json.dump(self.entries, file)
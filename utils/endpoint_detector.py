@@ -0,0 +1,86 @@
+import numpy as np
+
+# Level of digital silence, keeps log10 away from zero
+MIN_DB = -100.0
+
+
+class EndpointDetector:
+    """Detects the end of speech from the energy of captured chunks"""
+
+    def __init__(self, rate, trailing_silence_ms=1500, start_margin_db=12.0,
+                 stop_margin_db=6.0, min_speech_ms=250, floor_rise_db=3.0):
+        """
+        Initialize the detector
+
+        Speech starts when a chunk is start_margin_db above the noise floor
+        and only ends when the level falls below stop_margin_db. Levels in
+        between keep the current state, so short dips inside a word or a
+        breath do not count as silence.
+
+        Args:
+            rate: Sample rate of the chunks in Hz
+            trailing_silence_ms: Silence after speech that ends the recording
+            start_margin_db: Level above the noise floor that starts speech
+            stop_margin_db: Level above the noise floor that keeps speech going
+            min_speech_ms: Speech needed before silence can end the recording
+            floor_rise_db: How fast (dB per second) the noise floor follows
+                a louder background
+        """
+        self.rate = rate
+        self.trailing_silence = trailing_silence_ms / 1000
+        self.start_margin_db = start_margin_db
+        self.stop_margin_db = stop_margin_db
+        self.min_speech = min_speech_ms / 1000
+        self.floor_rise_db = floor_rise_db
+        self.reset()
+
+    def reset(self):
+        """Forget everything heard so far"""
+        self.noise_floor_db = None
+        self.in_speech = False
+        self.speech_time = 0.0
+        self.silence_time = 0.0
+        self.triggered = False
+
+    def feed(self, data):
+        """
+        Process a chunk of int16 PCM data
+
+        Args:
+            data: Bytes-like chunk of mono int16 samples
+
+        Returns:
+            True once, for the chunk that completes the trailing silence
+        """
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self.triggered or not samples.size:
+            return False
+
+        duration = samples.size / self.rate
+        energy = float(np.mean(np.square(samples, dtype=np.float32)))
+        level_db = max(MIN_DB, 10 * np.log10(energy / 32768 ** 2 + 1e-12))
+
+        # The floor drops right away to quieter levels and rises slowly,
+        # so speech itself barely moves it
+        if self.noise_floor_db is None or level_db < self.noise_floor_db:
+            self.noise_floor_db = level_db
+        else:
+            self.noise_floor_db = min(
+                level_db, self.noise_floor_db + self.floor_rise_db * duration)
+
+        if level_db >= self.noise_floor_db + self.start_margin_db:
+            self.in_speech = True
+        elif level_db < self.noise_floor_db + self.stop_margin_db:
+            self.in_speech = False
+
+        if self.in_speech:
+            self.speech_time += duration
+            self.silence_time = 0.0
+            return False
+
+        self.silence_time += duration
+        if (self.speech_time >= self.min_speech
+                and self.silence_time >= self.trailing_silence):
+            self.triggered = True
+            return True
+        return False
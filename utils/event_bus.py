@@ -0,0 +1,100 @@
+import threading
+
+
+class EventBus:
+    """Delivers events posted from any thread to handlers on the Tk main thread"""
+
+    def __init__(self, max_fps=30):
+        """
+        Initialize the event bus
+
+        Args:
+            max_fps: Maximum number of times per second pending events are
+                delivered to the UI
+        """
+        self.interval_ms = max(1, int(1000 / max_fps))
+        self._handlers = {}
+        self._listeners = []
+        self._pending = {}
+        self._last_delivered = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._root = None
+
+    def subscribe(self, event, handler):
+        """
+        Register a handler for an event
+
+        Args:
+            event: Name of the event
+            handler: Function called on the main thread with the event payload
+        """
+        self._handlers.setdefault(event, []).append(handler)
+
+    def add_listener(self, listener):
+        """
+        Register a listener called right away, on the posting thread
+
+        Listeners see every event before any coalescing and must not touch
+        Tk widgets or block.
+
+        Args:
+            listener: Function called with (event, payload)
+        """
+        self._listeners.append(listener)
+
+    def post(self, event, payload=None, coalesce=True):
+        """
+        Post an event, safe to call from any thread
+
+        Args:
+            event: Name of the event
+            payload: Value passed to the handlers
+            coalesce: When True only the latest payload posted before the next
+                frame is delivered, and it is skipped if it equals the last
+                delivered one. Use False for events that must each be handled.
+        """
+        with self._lock:
+            if coalesce:
+                key = event
+                # Re-insert so the event keeps its place in posting order
+                self._pending.pop(key, None)
+            else:
+                self._sequence += 1
+                key = (event, self._sequence)
+            self._pending[key] = (event, payload, coalesce)
+
+        for listener in self._listeners:
+            try:
+                listener(event, payload)
+            except Exception as e:
+                print(f"Error in event listener: {e}")
+
+    def start(self, root):
+        """
+        Start delivering events from the Tk main loop
+
+        Args:
+            root: The Tk root window whose main loop drains the queue
+        """
+        self._root = root
+        self._root.after(self.interval_ms, self._drain)
+
+    def _drain(self):
+        """Deliver all pending events, then schedule the next frame"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for event, payload, coalesce in pending.values():
+            if coalesce:
+                if self._last_delivered.get(event, object()) == payload:
+                    continue
+                self._last_delivered[event] = payload
+
+            for handler in self._handlers.get(event, []):
+                try:
+                    handler(payload)
+                except Exception as e:
+                    print(f"Error handling event '{event}': {e}")
+
+        self._root.after(self.interval_ms, self._drain)
@@ -16,6 +16,21 @@ class HistoryManager:
         self.history.insert(0, text)  # Add at beginning
         self._save_history()
 
+    def replace_entry(self, old_text, new_text):
+        """
+        Replace the most recent entry matching old_text
+
+        Returns:
+            True if an entry was replaced
+        """
+        try:
+            index = self.history.index(old_text)
+        except ValueError:
+            return False
+        self.history[index] = new_text
+        self._save_history()
+        return True
+
     def clear_history(self):
         """Clear all history"""
         self.history = []
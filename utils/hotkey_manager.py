@@ -1,59 +1,181 @@
+import queue
+import threading
+import time
+
 import keyboard
 
 
+class HotkeyBinding:
+    """A hotkey with its recording mode and callbacks"""
+
+    def __init__(self, hotkey, mode, press_callback, release_callback=None):
+        """
+        Initialize the binding
+
+        Args:
+            hotkey: Key combination such as 'ctrl+shift' or 'alt+r'
+            mode: 'hold' or 'toggle'
+            press_callback: Function called when the combination is pressed
+            release_callback: Function called when it is released (hold mode)
+        """
+        steps = keyboard.parse_hotkey(hotkey)
+        if len(steps) != 1:
+            raise ValueError(f"Multi-step hotkeys are not supported: {hotkey}")
+
+        self.hotkey = hotkey
+        self.mode = mode
+        self.press_callback = press_callback
+        self.release_callback = release_callback if mode == "hold" else None
+
+        # One set of scan codes per key, e.g. left and right ctrl
+        self.keys = [frozenset(scan_codes) for scan_codes in steps[0]]
+        self.scan_codes = frozenset().union(*self.keys)
+        self.active = False
+
+    def is_pressed(self, pressed):
+        """Check whether every key of the combination is held down"""
+        return all(any(code in pressed for code in key) for key in self.keys)
+
+
 class HotkeyManager:
-    """Manages keyboard hotkeys"""
+    """Manages keyboard hotkeys through a single global keyboard hook"""
+
+    # A held key repeats its down event well within this time (the longest
+    # autorepeat delay is 1 s). A down for a key seen longer ago is a new
+    # press whose key-up was lost, e.g. to a secure desktop or lock screen.
+    STALE_PRESS_SECONDS = 1.5
 
     def __init__(self):
         self.current_hotkey = ""
         self.current_mode = "hold"
 
+        # Replaced as a whole, so the hook thread never sees a partial list
+        self._bindings = ()
+
+        # Scan codes currently held down, with the time of their last down
+        # event, kept up to date by the hook
+        self._pressed = {}
+        self._hooked = False
+
+        # Callbacks run on a worker so the hook returns immediately
+        self._callbacks = queue.SimpleQueue()
+        self._worker = threading.Thread(
+            target=self._run_callbacks, daemon=True)
+        self._worker.start()
+
+        # Hook callback latency in seconds
+        self._latency_count = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
     def set_hotkey(self, hotkey, mode, press_callback, release_callback=None):
-        """Set up a new hotkey"""
-        # Remove any existing hotkey
-        keyboard.unhook_all()
+        """Replace all bindings with a single hotkey"""
+        self.clear_bindings()
+        self.add_binding(hotkey, mode, press_callback, release_callback)
 
         self.current_hotkey = hotkey
         self.current_mode = mode
 
-        # Set up hotkey based on current mode
-        if mode == "hold":
-            # For hold mode, we need both press and release callbacks
-            # Wrap the callbacks to handle the event parameter
-            def press_wrapper(e):
-                if self._check_modifiers():
-                    press_callback()
-
-            def release_wrapper(e):
-                if release_callback:
-                    release_callback()
+    def add_binding(self, hotkey, mode, press_callback, release_callback=None):
+        """
+        Add a hotkey binding next to the existing ones
 
-            # Set up the keyboard hooks
-            key = hotkey.split('+')[-1]  # Last part is the non-modifier key
-            keyboard.on_press_key(key, press_wrapper, suppress=False)
-            keyboard.on_release_key(key, release_wrapper, suppress=False)
+        Args:
+            hotkey: Key combination such as 'ctrl+shift' or 'alt+r'
+            mode: 'hold' or 'toggle'
+            press_callback: Function called when the combination is pressed
+            release_callback: Function called when it is released (hold mode)
 
-        else:  # toggle mode
-            # For toggle mode, we only need the press callback
-            def toggle_wrapper():
-                press_callback()
+        Returns:
+            The created HotkeyBinding
+        """
+        binding = HotkeyBinding(hotkey, mode, press_callback, release_callback)
+        self._bindings = self._bindings + (binding,)
 
-            # Set up the toggle hotkey
-            keyboard.add_hotkey(hotkey, toggle_wrapper)
+        if not self._hooked:
+            keyboard.hook(self._on_key_event)
+            self._hooked = True
 
         print(f"Hotkey '{hotkey}' set with mode: {mode}")
+        return binding
+
+    def clear_bindings(self):
+        """Remove all hotkey bindings"""
+        self._bindings = ()
+        # Re-arming starts from a clean state, dropping keys whose key-up
+        # was never seen
+        self._pressed = {}
+
+    def run_on_worker(self, callback):
+        """
+        Queue a callback on the hotkey worker thread
+
+        Useful for other triggers (e.g. the control server) so that they are
+        serialized with hotkey callbacks.
+        """
+        self._callbacks.put(callback)
+
+    def get_latency_stats(self):
+        """
+        Get hook callback latency statistics
+
+        Returns:
+            Dictionary with the event count and mean/max latency in microseconds
+        """
+        count = self._latency_count
+        return {
+            "count": count,
+            "mean_us": self._latency_total / count * 1e6 if count else 0.0,
+            "max_us": self._latency_max * 1e6
+        }
+
+    def _on_key_event(self, event):
+        """Global hook callback, must return as fast as possible"""
+        start = time.perf_counter()
+        scan_code = event.scan_code
+        pressed = self._pressed
+
+        if event.event_type == keyboard.KEY_DOWN:
+            last_seen = pressed.get(scan_code)
+            pressed[scan_code] = start
+            if last_seen is None:
+                self._on_key_down(scan_code)
+            elif start - last_seen > self.STALE_PRESS_SECONDS:
+                # Its key-up was lost: release it, then press it again
+                self._on_key_up(scan_code)
+                self._on_key_down(scan_code)
+            # Otherwise autorepeat of a key that is already down
+        else:
+            pressed.pop(scan_code, None)
+            self._on_key_up(scan_code)
 
-    def _check_modifiers(self):
-        """Check if modifier keys in the hotkey are pressed"""
-        hotkey_parts = self.current_hotkey.split('+')
+        elapsed = time.perf_counter() - start
+        self._latency_count += 1
+        self._latency_total += elapsed
+        if elapsed > self._latency_max:
+            self._latency_max = elapsed
 
-        # Skip checking modifiers if there's only one part
-        if len(hotkey_parts) <= 1:
-            return True
+    def _on_key_down(self, scan_code):
+        """Fire bindings completed by a newly pressed key"""
+        for binding in self._bindings:
+            if (not binding.active and scan_code in binding.scan_codes
+                    and binding.is_pressed(self._pressed)):
+                binding.active = True
+                self._callbacks.put(binding.press_callback)
 
-        # Check if all modifier keys are in the correct state
-        for mod in hotkey_parts[:-1]:  # All parts except the last one are modifiers
-            if not keyboard.is_pressed(mod):
-                return False
+    def _on_key_up(self, scan_code):
+        """Fire release callbacks of bindings broken by a released key"""
+        for binding in self._bindings:
+            if binding.active and scan_code in binding.scan_codes:
+                binding.active = False
+                if binding.release_callback:
+                    self._callbacks.put(binding.release_callback)
 
-        return True
+    def _run_callbacks(self):
+        """Worker loop running hotkey callbacks in order"""
+        while True:
+            callback = self._callbacks.get()
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in hotkey callback: {e}")
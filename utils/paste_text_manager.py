@@ -1,23 +1,209 @@
-import pyperclip
+import ctypes
+import os
+import sys
+import threading
 import time
+
+import pyperclip
 from pynput.keyboard import Controller, Key
 
 
 class PasteTextManager:
-    """Manages pasting of text using the clipboard."""
+    """Pastes text into the active application with adaptive delays"""
+
+    # Texts up to this length without newlines are typed directly
+    TYPE_MAX_CHARS = 24
+
+    # How long to wait for the clipboard to hold the new text
+    CLIPBOARD_TIMEOUT = 0.5
+    CLIPBOARD_POLL_INTERVAL = 0.005
 
-    def __init__(self):
+    # Delay before the previous clipboard is restored, learned per app. It
+    # never goes below the 100 ms slow targets (Electron, terminals, remote
+    # desktop) need to read the clipboard after Ctrl+V.
+    DEFAULT_RESTORE_DELAY = 0.1
+    MIN_RESTORE_DELAY = 0.1
+    MAX_RESTORE_DELAY = 1.0
+
+    # A history copy of the same text within this window counts as a
+    # failed paste for the app it was pasted into
+    REPASTE_WINDOW = 30.0
+
+    def __init__(self, config_manager=None, diagnostics=None, on_profiles_changed=None):
+        """
+        Initialize the paste manager
+
+        Args:
+            config_manager: Optional configuration manager used to persist
+                the per-application delay profiles
+            diagnostics: Optional Diagnostics instance receiving paste
+                latency and failures
+            on_profiles_changed: Optional function called with the profiles
+                to persist them, for an owner that keeps its own copy of the
+                configuration. Without it they are saved directly.
+        """
         self.keyboard = Controller()
+        self.config_manager = config_manager
+        self.diagnostics = diagnostics
+        self.on_profiles_changed = on_profiles_changed
+
+        self.restore_delays = {}
+        if self.config_manager:
+            self.restore_delays = self.config_manager.load_config().get(
+                "paste_profiles", {})
+
+        self._last_paste = None
 
     def paste_text(self, text):
-        """Paste text using clipboard (most reliable method)."""
-        # Copy text to clipboard
+        """Paste text into the active application"""
+        start_time = time.perf_counter()
+        app = self._get_foreground_app()
+
+        try:
+            if len(text) <= self.TYPE_MAX_CHARS and "\n" not in text:
+                # No clipboard round trip for short texts
+                self.keyboard.type(text)
+            else:
+                self._paste_with_clipboard(text, app)
+        except Exception as e:
+            print(f"Paste failed: {e}")
+            if self.diagnostics:
+                self.diagnostics.record_failure("paste", e)
+            return
+
+        if self.diagnostics:
+            self.diagnostics.record_timing(
+                "paste", time.perf_counter() - start_time)
+
+    def report_repaste(self, text):
+        """
+        Report that the user copied text from history by hand
+
+        If it is the text that was just pasted, the paste most likely
+        failed in that application, so its restore delay is increased.
+        """
+        if self._last_paste is None:
+            return
+
+        pasted_text, app, pasted_at = self._last_paste
+        if text != pasted_text or time.monotonic() - pasted_at > self.REPASTE_WINDOW:
+            return
+
+        self._last_paste = None
+        delay = min(self.MAX_RESTORE_DELAY, self._get_restore_delay(app) * 2)
+        self.restore_delays[app] = delay
+        self._save_profiles()
+
+        print(f"Paste into '{app}' looked failed, restore delay now {delay * 1000:.0f} ms")
+        if self.diagnostics:
+            self.diagnostics.record_failure(
+                "paste", f"re-pasted by hand in {app}")
+
+    def _paste_with_clipboard(self, text, app):
+        """Paste through the clipboard and restore its previous contents"""
+        try:
+            previous = pyperclip.paste()
+        except pyperclip.PyperclipException:
+            previous = None
+
         pyperclip.copy(text)
-        time.sleep(0.1)  # Small delay to ensure clipboard is updated
+        if not self._wait_for_clipboard(text):
+            raise RuntimeError("clipboard was not updated in time")
 
         # Press Ctrl+V to paste
         with self.keyboard.pressed(Key.ctrl):
             self.keyboard.press('v')
             self.keyboard.release('v')
 
-        time.sleep(0.1)  # Small delay after pasting
+        self._confirm_last_paste()
+        self._last_paste = (text, app, time.monotonic())
+
+        delay = self._get_restore_delay(app)
+
+        if previous is not None and previous != text:
+            timer = threading.Timer(
+                delay, self._restore_clipboard, args=(previous, text))
+            timer.daemon = True
+            timer.start()
+
+    def _confirm_last_paste(self):
+        """
+        Lower the delay of the previous paste's app if it was not re-pasted
+
+        Only a paste that outlived the re-paste window without a report
+        counts as a success, so the delay never shrinks on mere silence.
+        """
+        if self._last_paste is None:
+            return
+        _, app, pasted_at = self._last_paste
+        if time.monotonic() - pasted_at <= self.REPASTE_WINDOW:
+            return
+
+        delay = self._get_restore_delay(app)
+        if delay > self.MIN_RESTORE_DELAY:
+            self.restore_delays[app] = max(self.MIN_RESTORE_DELAY, delay * 0.9)
+
+    def _wait_for_clipboard(self, text):
+        """Poll the clipboard until it holds text or the timeout expires"""
+        deadline = time.perf_counter() + self.CLIPBOARD_TIMEOUT
+        while True:
+            if pyperclip.paste() == text:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.CLIPBOARD_POLL_INTERVAL)
+
+    def _restore_clipboard(self, previous, pasted_text):
+        """Put the previous clipboard back unless the user copied something"""
+        try:
+            if pyperclip.paste() == pasted_text:
+                pyperclip.copy(previous)
+        except pyperclip.PyperclipException as e:
+            print(f"Could not restore clipboard: {e}")
+
+    def _get_restore_delay(self, app):
+        """Get the learned restore delay for an application"""
+        return self.restore_delays.get(app, self.DEFAULT_RESTORE_DELAY)
+
+    def _save_profiles(self):
+        """Persist the per-application delay profiles"""
+        if self.on_profiles_changed:
+            self.on_profiles_changed(dict(self.restore_delays))
+            return
+        if not self.config_manager:
+            return
+        config = self.config_manager.load_config()
+        config["paste_profiles"] = self.restore_delays
+        self.config_manager.save_config(config)
+
+    def _get_foreground_app(self):
+        """Get the executable name of the focused application"""
+        if sys.platform != "win32":
+            return "default"
+
+        try:
+            from ctypes import wintypes
+
+            user32 = ctypes.windll.user32
+            kernel32 = ctypes.windll.kernel32
+
+            hwnd = user32.GetForegroundWindow()
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+
+            # PROCESS_QUERY_LIMITED_INFORMATION
+            handle = kernel32.OpenProcess(0x1000, False, pid.value)
+            if not handle:
+                return "default"
+            try:
+                size = wintypes.DWORD(260)
+                buffer = ctypes.create_unicode_buffer(size.value)
+                if kernel32.QueryFullProcessImageNameW(
+                        handle, 0, buffer, ctypes.byref(size)):
+                    return os.path.basename(buffer.value).lower()
+            finally:
+                kernel32.CloseHandle(handle)
+        except (AttributeError, OSError):
+            pass
+
+        return "default"
@@ -0,0 +1,271 @@
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+
+PROFILES_DIR = os.path.join(os.getcwd(), "profiles")
+
+
+class SamplingProfiler:
+    """Samples the Python stack of every thread at a fixed interval"""
+
+    MAX_DEPTH = 64
+
+    def __init__(self, interval=0.005):
+        """
+        Initialize the profiler
+
+        Args:
+            interval: Seconds between two samples
+        """
+        self.interval = interval
+        self.samples = 0
+        # (thread name, stack tuple from outermost frame) -> sample count
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling in a background thread"""
+        self._thread = threading.Thread(
+            target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        """Sampling loop, samples show waits as well as CPU work"""
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} "
+                                 f"({os.path.basename(code.co_filename)}:"
+                                 f"{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[(names.get(ident, str(ident)), tuple(stack))] += 1
+            self.samples += 1
+
+    def thread_summary(self, top=15):
+        """
+        Get the busiest functions of each thread
+
+        Returns:
+            Dictionary of thread name to sample count and top 'self' and
+            'inclusive' (function, samples) lists
+        """
+        threads = {}
+        for (thread, stack), count in self.stacks.items():
+            entry = threads.setdefault(
+                thread, {"samples": 0, "self": Counter(), "inclusive": Counter()})
+            entry["samples"] += count
+            if stack:
+                entry["self"][stack[-1]] += count
+            for function in set(stack):
+                entry["inclusive"][function] += count
+
+        return {
+            thread: {
+                "samples": entry["samples"],
+                "self": entry["self"].most_common(top),
+                "inclusive": entry["inclusive"].most_common(top)
+            }
+            for thread, entry in threads.items()
+        }
+
+    def collapsed_stacks(self):
+        """Get the samples in collapsed stack format, one 'a;b;c count' per line"""
+        lines = []
+        for (thread, stack), count in self.stacks.most_common():
+            lines.append(";".join((thread,) + stack) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+
+class ProfileSession:
+    """CPU and memory profile of the next N dictations or N seconds"""
+
+    def __init__(self, dictations=None, seconds=None, diagnostics=None,
+                 output_dir=PROFILES_DIR, on_finished=None):
+        """
+        Initialize the session, nothing is measured before start()
+
+        Args:
+            dictations: Stop after this many finished dictations
+            seconds: Stop after this many seconds
+            diagnostics: Optional Diagnostics whose summary is included
+            output_dir: Directory receiving the profile archive
+            on_finished: Function called with the archive path (or None on
+                failure), from a background thread
+        """
+        if not dictations and not seconds:
+            raise ValueError("A profile needs a number of dictations or seconds")
+
+        self.dictations = dictations
+        self.seconds = seconds
+        self.diagnostics = diagnostics
+        self.output_dir = output_dir
+        self.on_finished = on_finished
+
+        self.profiler = SamplingProfiler()
+        self.finished_dictations = 0
+        self._started_tracemalloc = False
+        self._start_snapshot = None
+        self._start_time = None
+        self._timer = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start sampling and tracing allocations"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._start_time = time.time()
+        self.profiler.start()
+
+        if self.seconds:
+            self._timer = threading.Timer(self.seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        print(f"Profiling started ({self._describe_limit()})")
+
+    def dictation_finished(self):
+        """Count a finished dictation, stopping when the limit is reached"""
+        self.finished_dictations += 1
+        if self.dictations and self.finished_dictations >= self.dictations:
+            self.stop()
+
+    def stop(self):
+        """Stop profiling and write the archive in a background thread"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+
+        if self._timer:
+            self._timer.cancel()
+        threading.Thread(target=self._finish, name="profile-writer",
+                         daemon=True).start()
+
+    @property
+    def active(self):
+        return not self._stopped
+
+    def _finish(self):
+        """Collect the results and write them"""
+        self.profiler.stop()
+        duration = time.time() - self._start_time
+        end_snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        path = None
+        try:
+            path = self._write_archive(duration, end_snapshot, current, peak)
+            print(f"Profile saved to {path}")
+        except OSError as e:
+            print(f"Could not save profile: {e}")
+
+        if self.on_finished:
+            self.on_finished(path)
+
+    def _write_archive(self, duration, end_snapshot, current, peak):
+        """Write the profile zip and return its path"""
+        memory_growth = [
+            {
+                "location": str(stat.traceback[0]),
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size
+            }
+            for stat in end_snapshot.compare_to(
+                self._start_snapshot, "lineno")[:30]
+        ]
+
+        profile = {
+            "started": time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(self._start_time)),
+            "duration_seconds": round(duration, 3),
+            "limit": self._describe_limit(),
+            "dictations": self.finished_dictations,
+            "python": sys.version,
+            "platform": platform.platform(),
+            "sample_interval_ms": self.profiler.interval * 1000,
+            "samples": self.profiler.samples,
+            "threads": self.profiler.thread_summary(),
+            "memory": {
+                "traced_current": current,
+                "traced_peak": peak,
+                "growth": memory_growth
+            },
+            "diagnostics": self.diagnostics.summary() if self.diagnostics else []
+        }
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, time.strftime(
+            "profile-%Y%m%d-%H%M%S.zip", time.localtime(self._start_time)))
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("profile.json", json.dumps(profile, indent=2))
+            archive.writestr("summary.txt", self._format_summary(profile))
+            archive.writestr("stacks.txt", self.profiler.collapsed_stacks())
+        return path
+
+    def _describe_limit(self):
+        if self.dictations:
+            return f"{self.dictations} dictations"
+        return f"{self.seconds} seconds"
+
+    @staticmethod
+    def _format_summary(profile):
+        """Human readable version of the profile"""
+        lines = [
+            f"Profile started {profile['started']}, "
+            f"{profile['duration_seconds']} s, {profile['dictations']} dictations",
+            f"Python {profile['python']} on {profile['platform']}",
+            f"{profile['samples']} samples every "
+            f"{profile['sample_interval_ms']:.0f} ms "
+            "(a sample is where a thread was, waiting or running)",
+            ""
+        ]
+
+        for thread, summary in sorted(profile["threads"].items(),
+                                      key=lambda item: -item[1]["samples"]):
+            lines.append(f"== Thread {thread} ({summary['samples']} samples)")
+            lines.append("  Self:")
+            for function, count in summary["self"]:
+                lines.append(f"    {count:7d}  {function}")
+            lines.append("  Inclusive:")
+            for function, count in summary["inclusive"]:
+                lines.append(f"    {count:7d}  {function}")
+            lines.append("")
+
+        memory = profile["memory"]
+        lines.append(f"== Memory (traced current {memory['traced_current']} B, "
+                     f"peak {memory['traced_peak']} B)")
+        for stat in memory["growth"]:
+            lines.append(f"  {stat['size_diff']:+10d} B  {stat['count_diff']:+7d} "
+                         f"blocks  {stat['location']}")
+
+        if profile["diagnostics"]:
+            lines.append("")
+            lines.append("== Diagnostics")
+            lines.extend(f"  {line}" for line in profile["diagnostics"])
+
+        return "\n".join(lines) + "\n"
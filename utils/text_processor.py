@@ -0,0 +1,143 @@
+import re
+import threading
+
+
+class TextProcessor:
+    """Applies user-defined replacements and voice commands to transcripts"""
+
+    # Punctuation the transcriber tends to put around a spoken command
+    _COMMAND_PATTERN = (
+        r"[,;:]?\s*(?<!\w)(?P<command>{commands})(?!\w)[,.;:!?]?(?P<trail>\s*)")
+    _REPLACEMENT_PATTERN = r"(?<!\w)(?P<replacement>{replacements})(?!\w)"
+    _NEWLINE_SPACES = re.compile(r"[ \t]*\n[ \t]*")
+
+    def __init__(self, replacements=None, commands=None):
+        """
+        Initialize the text processor
+
+        Args:
+            replacements: Dictionary mapping spoken words or phrases to the
+                text that should replace them, e.g. {"open ai": "OpenAI"}
+            commands: Dictionary mapping spoken commands to the text they
+                insert, e.g. {"new line": "\\n", "comma": ","}
+        """
+        self._rules_key = None
+        self._replacements = {}
+        self._commands = {}
+        self._pattern = None
+        self._lock = threading.Lock()
+        self.set_rules(replacements or {}, commands or {})
+
+    def set_rules(self, replacements, commands):
+        """
+        Update the rules, recompiling only when they actually changed
+
+        Args:
+            replacements: Dictionary of phrase replacements
+            commands: Dictionary of voice commands
+        """
+        rules_key = (tuple(sorted(replacements.items())),
+                     tuple(sorted(commands.items())))
+        if rules_key == self._rules_key:
+            return
+
+        lowered_replacements = {
+            key.lower(): value for key, value in replacements.items() if key}
+        lowered_commands = {
+            key.lower(): value for key, value in commands.items() if key}
+
+        parts = []
+        if lowered_commands:
+            parts.append(self._COMMAND_PATTERN.format(
+                commands=self._trie_regex(lowered_commands)))
+        if lowered_replacements:
+            parts.append(self._REPLACEMENT_PATTERN.format(
+                replacements=self._trie_regex(lowered_replacements)))
+
+        pattern = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+
+        # Swap everything at once so process() never sees mixed rules. The
+        # lookups are casefolded: under IGNORECASE some characters match a
+        # key but lowercase to something else (e.g. 'ſ' matches 's').
+        with self._lock:
+            self._rules_key = rules_key
+            self._replacements = {
+                key.casefold(): value for key, value in lowered_replacements.items()}
+            self._commands = {
+                key.casefold(): value for key, value in lowered_commands.items()}
+            self._pattern = pattern
+
+    def process(self, text):
+        """
+        Apply the rules to a transcript
+
+        Args:
+            text: The raw transcript
+
+        Returns:
+            The processed transcript
+        """
+        with self._lock:
+            pattern = self._pattern
+            replacements = self._replacements
+            commands = self._commands
+
+        if pattern is None or not text:
+            return text
+
+        def substitute(match):
+            # A match without a rule is left as it was
+            command = match.group("command") if commands else None
+            if command is not None:
+                value = commands.get(command.casefold())
+                return match.group(0) if value is None else value + match.group("trail")
+            value = replacements.get(match.group("replacement").casefold())
+            return match.group(0) if value is None else value
+
+        result = pattern.sub(substitute, text)
+        # Inserted line breaks should not leave spaces around them
+        if "\n" in result:
+            result = self._NEWLINE_SPACES.sub("\n", result)
+        return result.strip(" ")
+
+    @staticmethod
+    def _trie_regex(words):
+        """
+        Build a regex matching any of the words, structured as a trie
+
+        A plain alternation is tried branch by branch at every position,
+        while the trie form only follows branches sharing the prefix read
+        so far, which keeps thousands of rules cheap to match.
+        """
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        # Built bottom-up with an explicit stack, a recursive build would
+        # hit the recursion limit on long keys
+        patterns = {}
+        stack = [(trie, False)]
+        while stack:
+            node, children_built = stack.pop()
+            if not children_built:
+                stack.append((node, True))
+                stack.extend((child, False) for char, child in node.items() if char)
+                continue
+
+            is_end = "" in node
+            branches = [re.escape(char) + patterns.pop(id(child))
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                pattern = ""
+            elif len(branches) == 1 and not is_end:
+                pattern = branches[0]
+            else:
+                # Greedy optional group prefers the longest match
+                group = "(?:" + "|".join(branches) + ")"
+                pattern = group + "?" if is_end else group
+            patterns[id(node)] = pattern
+
+        return patterns[id(trie)]
@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+
+LEDGER_FILE = os.path.join(os.getcwd(), "usage_ledger.csv")
+ROLLUPS_FILE = os.path.join(os.getcwd(), "usage_rollups.json")
+
+# Estimated USD price per minute of audio
+MODEL_PRICES_PER_MINUTE = {
+    "whisper-1": 0.006,
+    "gpt-4o-transcribe": 0.006,
+    "gpt-4o-mini-transcribe": 0.003
+}
+DEFAULT_PRICE_PER_MINUTE = 0.006
+
+LEDGER_FIELDS = ["timestamp", "model", "audio_seconds", "bytes_uploaded",
+                 "latency_ms", "cost"]
+
+
+def estimate_cost(model, audio_seconds):
+    """Estimate the cost in USD of transcribing audio_seconds with model"""
+    price = MODEL_PRICES_PER_MINUTE.get(model, DEFAULT_PRICE_PER_MINUTE)
+    return audio_seconds / 60 * price
+
+
+class UsageLedger:
+    """Records every transcription call and keeps usage rollups up to date"""
+
+    def __init__(self, ledger_file=LEDGER_FILE, rollups_file=ROLLUPS_FILE):
+        """
+        Initialize the usage ledger
+
+        Args:
+            ledger_file: CSV file with one row per transcription call
+            rollups_file: JSON file with the running totals
+        """
+        self.ledger_file = ledger_file
+        self.rollups_file = rollups_file
+        self._lock = threading.Lock()
+        self.rollups = self._load_rollups()
+
+        # Disk writes happen on their own thread: record() is called on the
+        # shared event loop and in the threads waiting for a transcript
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+
+    def record(self, model, audio_seconds, bytes_uploaded, latency):
+        """
+        Record one transcription call
+
+        The totals are updated right away, the files are written in the
+        background.
+
+        Args:
+            model: Speech-to-text model
+            audio_seconds: Duration of the uploaded audio
+            bytes_uploaded: Size of the uploaded file
+            latency: API time in seconds
+        """
+        timestamp = time.time()
+        entry = {
+            "timestamp": round(timestamp, 3),
+            "model": model,
+            "audio_seconds": round(audio_seconds, 3),
+            "bytes_uploaded": bytes_uploaded,
+            "latency_ms": round(latency * 1000, 1),
+            "cost": round(estimate_cost(model, audio_seconds), 6)
+        }
+
+        with self._lock:
+            self._add_to_rollups(self.rollups, entry)
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run, name="usage-ledger", daemon=True)
+                self._writer.start()
+        self._queue.put(entry)
+
+    def close(self, timeout=2.0):
+        """Write the pending entries and stop the writer thread"""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        self._queue.put(None)
+        writer.join(timeout)
+
+    def _run(self):
+        """Writer loop, appends the queued entries and saves the rollups"""
+        while True:
+            entries = [self._queue.get()]
+            # Everything queued meanwhile goes out in one write
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in entries
+            entries = [entry for entry in entries if entry is not None]
+            if entries:
+                try:
+                    self._append_entries(entries)
+                    self._save_rollups()
+                except OSError as e:
+                    print(f"Could not write the usage ledger: {e}")
+            if stop:
+                return
+
+    def _append_entries(self, entries):
+        """Append rows to the ledger CSV (writer thread only)"""
+        is_new = not os.path.exists(self.ledger_file)
+        with open(self.ledger_file, "a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=LEDGER_FIELDS)
+            if is_new:
+                writer.writeheader()
+            writer.writerows(entries)
+
+    def get_summary(self):
+        """
+        Get usage for today, this month, per model and overall
+
+        Returns:
+            Dictionary with 'today', 'month', 'total' and 'models' totals,
+            each holding count, audio_seconds, bytes_uploaded, latency_ms
+            and cost
+        """
+        today, month = self._period_keys(time.time())
+        with self._lock:
+            return {
+                "today": dict(self.rollups["days"].get(today, self._empty_totals())),
+                "month": dict(self.rollups["months"].get(month, self._empty_totals())),
+                "total": dict(self.rollups["total"]),
+                "models": {model: dict(totals)
+                           for model, totals in self.rollups["models"].items()}
+            }
+
+    def _add_to_rollups(self, rollups, entry):
+        """Add one ledger entry to every rollup it belongs to"""
+        day, month = self._period_keys(float(entry["timestamp"]))
+        buckets = [
+            rollups["days"].setdefault(day, self._empty_totals()),
+            rollups["months"].setdefault(month, self._empty_totals()),
+            rollups["models"].setdefault(entry["model"], self._empty_totals()),
+            rollups["total"]
+        ]
+        for totals in buckets:
+            totals["count"] += 1
+            totals["audio_seconds"] += float(entry["audio_seconds"])
+            totals["bytes_uploaded"] += int(entry["bytes_uploaded"])
+            totals["latency_ms"] += float(entry["latency_ms"])
+            totals["cost"] += float(entry["cost"])
+
+    def _load_rollups(self):
+        """Load the rollups, rebuilding them from the ledger if needed"""
+        if os.path.exists(self.rollups_file):
+            try:
+                with open(self.rollups_file, "r") as file:
+                    return json.load(file)
+            except (ValueError, OSError) as e:
+                print(f"Rebuilding usage rollups: {e}")
+
+        rollups = self._empty_rollups()
+        if os.path.exists(self.ledger_file):
+            with open(self.ledger_file, "r", newline="") as file:
+                for entry in csv.DictReader(file):
+                    self._add_to_rollups(rollups, entry)
+        return rollups
+
+    def _save_rollups(self):
+        """Write the rollups to disk, serialized under the lock"""
+        with self._lock:
+            data = json.dumps(self.rollups)
+        with open(self.rollups_file, "w") as file:
+            file.write(data)
+
+    @staticmethod
+    def _period_keys(timestamp):
+        """Get the day and month keys of a timestamp in local time"""
+        local = time.localtime(timestamp)
+        return time.strftime("%Y-%m-%d", local), time.strftime("%Y-%m", local)
+
+    @staticmethod
+    def _empty_totals():
+        return {"count": 0, "audio_seconds": 0.0, "bytes_uploaded": 0,
+                "latency_ms": 0.0, "cost": 0.0}
+
+    @classmethod
+    def _empty_rollups(cls):
+        return {"days": {}, "months": {}, "models": {},
+                "total": cls._empty_totals()}
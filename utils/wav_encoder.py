@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+import wave
+
+
+class WavEncoder:
+    """Writes a WAV file chunk by chunk while audio is being captured"""
+
+    def __init__(self, filename, channels, sample_width, rate):
+        """
+        Open the file and start the writer thread
+
+        Args:
+            filename: Path of the WAV file to write
+            channels: Number of channels
+            sample_width: Bytes per sample
+            rate: Sample rate in Hz
+        """
+        self.filename = filename
+        self.error = None
+
+        # Set when finish() gave up waiting, the writer then deletes the file
+        self.abandoned = False
+
+        self._wave = wave.open(filename, 'wb')
+        self._wave.setnchannels(channels)
+        self._wave.setsampwidth(sample_width)
+        self._wave.setframerate(rate)
+
+        # Disk writes happen on their own thread, never on the capture one
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, data):
+        """Queue a chunk of PCM data, safe to call from any thread"""
+        self._queue.put(data)
+
+    def finish(self, timeout=5.0):
+        """
+        Write the remaining chunks and finalize the header
+
+        If the writer does not finish in time it keeps running and the file
+        is marked abandoned: it must not be written to again, and it is
+        deleted once the writer exits.
+
+        Returns:
+            The filename, or None if writing failed
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print("Incremental WAV encoding failed: timeout")
+            self.abandoned = True
+            # The writer may have exited before seeing the flag
+            if not self._thread.is_alive():
+                self._remove_file()
+            return None
+        if self.error:
+            print(f"Incremental WAV encoding failed: {self.error}")
+            return None
+        return self.filename
+
+    def _run(self):
+        """Writer loop, the header sizes are patched when the file closes"""
+        try:
+            while True:
+                data = self._queue.get()
+                if data is None:
+                    break
+                if self.error is None:
+                    try:
+                        self._wave.writeframesraw(data)
+                    except Exception as e:
+                        self.error = e
+        finally:
+            try:
+                self._wave.close()
+            except Exception as e:
+                self.error = self.error or e
+            if self.abandoned:
+                self._remove_file()
+
+    def _remove_file(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass